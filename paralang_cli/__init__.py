@@ -41,10 +41,17 @@ __copyright__ = "Luna Klatzer"
 
 from .__main__ import *
 from .logging import *
-from . import scripts
 
-# Importing colorama to enable colouring support for the console
-# as a backup option
-import colorama as lib_colorama
 
-lib_colorama.init(autoreset=True)
+def __getattr__(name: str):
+    # 'scripts' and the runtime compiler are loaded on first access, to keep
+    # the import of the module itself and therefore the CLI start-up cheap
+    if name == "scripts":
+        import importlib
+        return importlib.import_module(".scripts", __name__)
+    elif name == "RUNTIME_COMPILER":
+        return cli_get_runtime_compiler()
+    elif name == "cli_custom_theme":
+        from . import logging
+        return logging.cli_custom_theme
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,13 +1,40 @@
 # coding=utf-8
 """ Entry file for the CLI - Runs the default 'para' CLI if called directly """
-from paralang_base.compiler import ParaCompiler
+from __future__ import annotations
 
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from paralang_base.compiler import ParaCompiler
 
 __all__ = [
-    "RUNTIME_COMPILER"
+    "cli_get_runtime_compiler"
 ]
 
-RUNTIME_COMPILER: ParaCompiler = ParaCompiler()
+_runtime_compiler: Optional[ParaCompiler] = None
+
+
+def cli_get_runtime_compiler() -> ParaCompiler:
+    """
+    Returns the compiler instance used by the CLI. The instance is only created
+    on the first call and then cached for the rest of the runtime, so that
+    commands that do not need the compiler (e.g. '--version' or '--help') do
+    not have to import 'paralang_base' and the antlr4 runtime.
+    """
+    global _runtime_compiler
+    if _runtime_compiler is None:
+        from paralang_base.compiler import ParaCompiler
+        _runtime_compiler = ParaCompiler()
+    return _runtime_compiler
+
+
+def __getattr__(name: str):
+    # Kept for backwards compatibility, since the compiler was previously
+    # created on import as 'RUNTIME_COMPILER'
+    if name == "RUNTIME_COMPILER":
+        return cli_get_runtime_compiler()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     from .scripts.para import cli_run
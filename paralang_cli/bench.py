@@ -0,0 +1,372 @@
+# coding=utf-8
+"""
+Throughput benchmark of the compiler used by 'para bench', which measures
+how fast the installed 'paralang_base' validates and compiles a corpus of
+Para files.
+
+Every stage runs the whole corpus for a number of warm-up rounds, which are
+not measured, and then for the measured rounds. Files are processed one
+after another inside a fresh process per stage, so the results show the
+speed and memory usage of the compiler itself and not the parallelism of
+the machine. Results can be saved as JSON and compared with results of
+another 'paralang_base' version.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import (List, Dict, Any, Optional, Union, Callable, Tuple,
+                    Iterator)
+
+from .logging import (cli_capture_compiler_logs, ParaCLICollectHandler,
+                      cli_get_logger)
+from .profiling import cli_get_peak_rss
+
+__all__ = [
+    "BENCH_STAGES",
+    "BENCH_PERCENTILES",
+    "BenchStageResult",
+    "BenchReport",
+    "cli_syntax_check_bench_file",
+    "cli_compile_bench_file",
+    "cli_run_bench",
+]
+
+# Stages that can be measured using 'para bench'
+BENCH_STAGES: Tuple[str, ...] = ("syntax-check", "compile")
+
+# Percentiles of the per-file durations, which are reported for every stage
+BENCH_PERCENTILES: Tuple[int, ...] = (50, 90, 95, 99)
+
+# Version of the JSON format of saved results
+_RESULTS_FORMAT: int = 1
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    """ Returns the percentile of the values using linear interpolation """
+    values = sorted(values)
+    if not values:
+        return 0.0
+    rank = (len(values) - 1) * percentile / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class BenchStageResult:
+    """ The measured durations of a single stage """
+
+    def __init__(
+            self,
+            stage: str,
+            files: int,
+            lines: int,
+            rounds: List[float],
+            file_times: List[float],
+            failures: int = 0,
+            peak_rss: Optional[int] = None
+    ):
+        """
+        :param stage: The name of the stage
+        :param files: The amount of files of the corpus
+        :param lines: The amount of lines of the corpus
+        :param rounds: The duration in seconds of every measured round
+        :param file_times: The duration in seconds of every file in every
+         measured round
+        :param failures: The amount of files that failed in the last round
+        :param peak_rss: The peak memory usage in bytes of the process that
+         ran the stage
+        """
+        self._stage = stage
+        self._files = files
+        self._lines = lines
+        self._rounds = rounds
+        self._file_times = file_times
+        self._failures = failures
+        self._peak_rss = peak_rss
+
+    @property
+    def stage(self) -> str:
+        """ The name of the stage """
+        return self._stage
+
+    @property
+    def failures(self) -> int:
+        """ The amount of files that failed in the last round """
+        return self._failures
+
+    @property
+    def peak_rss(self) -> Optional[int]:
+        """ The peak memory usage in bytes of the process running the stage """
+        return self._peak_rss
+
+    @property
+    def median(self) -> float:
+        """ The median duration in seconds of a round """
+        return statistics.median(self._rounds) if self._rounds else 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        """ The files processed per second based on the median round """
+        return self._files / self.median if self.median else 0.0
+
+    @property
+    def lines_per_second(self) -> float:
+        """ The lines processed per second based on the median round """
+        return self._lines / self.median if self.median else 0.0
+
+    def percentiles(self) -> Dict[str, float]:
+        """ The percentiles of the per-file durations in seconds """
+        return {
+            f"p{p}": _percentile(self._file_times, p)
+            for p in BENCH_PERCENTILES
+        }
+
+    def to_json(self) -> Dict[str, Any]:
+        """ Returns the result as JSON compatible dictionary """
+        return {
+            "files": self._files,
+            "lines": self._lines,
+            "failures": self._failures,
+            "rounds": self._rounds,
+            "median": self.median,
+            "min": min(self._rounds) if self._rounds else 0.0,
+            "files_per_second": self.files_per_second,
+            "lines_per_second": self.lines_per_second,
+            "file_percentiles": self.percentiles(),
+            "peak_rss": self._peak_rss
+        }
+
+
+class BenchReport:
+    """
+    Results of all stages of a benchmark run together with the versions and
+    the machine they were measured with
+    """
+
+    def __init__(
+            self,
+            stages: Dict[str, Dict[str, Any]],
+            info: Optional[Dict[str, Any]] = None
+    ):
+        """
+        :param stages: The JSON results of the stages keyed by their name
+        :param info: The versions, machine and options of the run. If None
+         the information of the current process is used
+        """
+        from . import __version__
+        from .utils import cli_get_base_version
+
+        self._stages = stages
+        self._info = info or {
+            "paralang_base": cli_get_base_version(),
+            "paralang_cli": __version__,
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        }
+
+    @property
+    def stages(self) -> Dict[str, Dict[str, Any]]:
+        """ The JSON results of the stages keyed by their name """
+        return self._stages
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """ The versions, machine and options of the run """
+        return self._info
+
+    @classmethod
+    def load(cls, path: Union[str, PathLike, Path]) -> BenchReport:
+        """
+        Loads saved results
+
+        :raises ValueError: If the file is not a supported results file
+        :raises OSError: If the file can not be read
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if not isinstance(data, dict) \
+                or data.get("format") != _RESULTS_FORMAT \
+                or not isinstance(data.get("stages"), dict):
+            raise ValueError(f"Unsupported benchmark results file '{path}'")
+        return cls(data["stages"], data.get("info") or {})
+
+    def save(self, path: Union[str, PathLike, Path]) -> None:
+        """ Writes the results as JSON """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "format": _RESULTS_FORMAT,
+                "info": self._info,
+                "stages": self._stages
+            }, file, indent=2, sort_keys=True)
+
+    def compare(self, baseline: BenchReport) -> Dict[str, float]:
+        """
+        Returns the relative change of the lines per second of every stage
+        measured by both reports. Negative values mean the stage got slower.
+
+        Stages where files failed in either report are not compared, since
+        failing files usually finish faster than files that are processed
+        completely (see 'incomparable()')
+        """
+        changes = {}
+        incomparable = self.incomparable(baseline)
+        for stage, result in self._stages.items():
+            previous = baseline.stages.get(stage, {})
+            if stage in incomparable:
+                continue
+            elif previous.get("lines_per_second") and \
+                    result.get("lines_per_second"):
+                changes[stage] = (
+                    result["lines_per_second"]
+                    / previous["lines_per_second"] - 1
+                )
+        return changes
+
+    def incomparable(self, baseline: BenchReport) -> List[str]:
+        """
+        Returns the stages measured by both reports, which can not be
+        compared, since files failed in either of them
+        """
+        return [
+            stage for stage, result in self._stages.items()
+            if stage in baseline.stages and (
+                result.get("failures") or
+                baseline.stages[stage].get("failures")
+            )
+        ]
+
+
+def cli_syntax_check_bench_file(
+        file: str,
+        encoding: str,
+        project_root: str
+) -> bool:
+    """
+    Validates the syntax of the file without logging anything
+
+    :param project_root: Unused, since includes are not resolved by the
+     syntax check. Kept for the signature shared by all stages
+    :returns: True if the file is valid
+    """
+    from .syntax_check import cli_syntax_check_file
+
+    return cli_syntax_check_file(file, encoding).success
+
+
+def cli_compile_bench_file(
+        file: str,
+        encoding: str,
+        project_root: str
+) -> bool:
+    """
+    Compiles the file without writing the results or logging anything
+
+    :returns: True if the file was compiled successfully
+    """
+    import asyncio
+    from paralang_base.compiler import CompileProcess
+
+    async def _compile():
+        await CompileProcess([file], project_root, encoding).compile()
+
+    collector = ParaCLICollectHandler()
+    with cli_capture_compiler_logs(collector):
+        try:
+            asyncio.run(_compile())
+        except Exception:
+            return False
+    return not any(lvl >= logging.ERROR for lvl, _ in collector.diagnostics)
+
+
+_STAGE_FUNCTIONS: Dict[str, Callable[[str, str, str], bool]] = {
+    "syntax-check": cli_syntax_check_bench_file,
+    "compile": cli_compile_bench_file,
+}
+
+
+def _run_stage(
+        stage: str,
+        files: List[str],
+        lines: int,
+        encoding: str,
+        project_root: str,
+        rounds: int,
+        warmup: int
+) -> BenchStageResult:
+    """
+    Runs the rounds of a single stage. This function is run in a fresh
+    process, so the peak memory usage only covers this stage
+    """
+    from .__main__ import cli_get_runtime_compiler
+
+    # Creating the compiler, so its start-up is not part of the results
+    cli_get_runtime_compiler()
+    func = _STAGE_FUNCTIONS[stage]
+    round_times: List[float] = []
+    file_times: List[float] = []
+    failures = 0
+    for i in range(warmup + rounds):
+        failures = 0
+        durations = []
+        for file in files:
+            start = time.perf_counter()
+            failures += 0 if func(file, encoding, project_root) else 1
+            durations.append(time.perf_counter() - start)
+        if i >= warmup:
+            round_times.append(sum(durations))
+            file_times.extend(durations)
+
+    return BenchStageResult(
+        stage, len(files), lines, round_times, file_times, failures,
+        peak_rss=cli_get_peak_rss(children=False)
+    )
+
+
+def cli_run_bench(
+        files: List[str],
+        encoding: str,
+        project_root: str,
+        stages: Tuple[str, ...] = BENCH_STAGES,
+        rounds: int = 5,
+        warmup: int = 1
+) -> Iterator[BenchStageResult]:
+    """
+    Runs the benchmark of the passed stages and yields the result of every
+    stage once it finished. Every stage is run in a freshly spawned process,
+    so that the peak memory usage of a stage does not include the previous
+    stages. The compiler is created before the first round, so its start-up
+    is not part of the results.
+
+    :param files: The corpus of Para files
+    :param encoding: The encoding the files should be opened with
+    :param project_root: The root folder includes are resolved against
+    :param stages: The stages that should be measured (see BENCH_STAGES)
+    :param rounds: The amount of measured rounds per stage
+    :param warmup: The amount of rounds run before measuring
+    """
+    from .progress import cli_count_lines
+
+    lines = sum(cli_count_lines(f) for f in files)
+    context = multiprocessing.get_context("spawn")
+    for stage in stages:
+        cli_get_logger().debug(
+            f"Running the stage '{stage}' ({warmup} warm-up rounds, "
+            f"{rounds} rounds)"
+        )
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            yield executor.submit(
+                _run_stage, stage, files, lines, encoding, project_root,
+                rounds, warmup
+            ).result()
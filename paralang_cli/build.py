@@ -0,0 +1,845 @@
+# coding=utf-8
+"""
+Incremental build implementation for the CLI, which compiles every passed
+file as its own translation unit using a worker pool.
+
+Units that include each other are compiled in dependency order, while
+independent units are compiled concurrently. The input hashes of every
+successfully compiled unit are stored in a manifest inside the build folder,
+so unchanged units are skipped on rebuilds.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import (List, Dict, Tuple, Set, Optional, Union, Iterator,
+                    Any, TYPE_CHECKING)
+
+from .__main__ import cli_get_runtime_compiler
+from .cache import (cli_hash_file, cli_get_key_path, cli_mask_path,
+                    cli_unmask_path)
+from .logging import (cli_get_rich_console as get_console, cli_get_logger,
+                      cli_capture_compiler_logs, ParaCLICollectHandler)
+from .profiling import cli_traced, cli_is_profiling
+
+if TYPE_CHECKING:
+    from .remote import RemoteCache
+    from .store import ArtifactStore
+
+__all__ = [
+    "BUILD_MANIFEST_NAME",
+    "BuildManifest",
+    "BuildGraph",
+    "BuildUnitResult",
+    "cli_scan_include_names",
+    "cli_resolve_include",
+    "cli_scan_includes",
+    "cli_run_build_dir_validation",
+    "cli_compile_unit",
+    "cli_run_build",
+    "cli_get_current_executable",
+    "cli_log_build_unit_result",
+]
+
+# Name of the manifest file, which is stored inside the build folder
+BUILD_MANIFEST_NAME: str = ".para-manifest.json"
+
+# Version of the manifest format. Manifests of other versions are ignored
+_MANIFEST_FORMAT: int = 1
+
+# Matches the numbered build folders created by 'cli_check_destination()',
+# if the default build folder could not be used
+_NUMBERED_BUILD_REGEX = re.compile(r"build_(\d+)")
+
+# Matches string includes ('#include "file"'). Library includes and computed
+# includes can not be resolved without the Pre-Processor and are ignored
+_INCLUDE_REGEX = re.compile(
+    rb'^[ \t]*#[ \t]*include[ \t]*"([^"\r\n]+)"', flags=re.MULTILINE
+)
+
+
+class BuildManifest:
+    """
+    Manifest storing the input hashes of all translation units that were
+    successfully compiled into the build folder
+    """
+
+    def __init__(
+            self,
+            path: Union[str, PathLike, Path],
+            encoding: str,
+            version: Optional[str] = None,
+            units: Optional[Dict[str, str]] = None,
+            executable: Optional[Dict[str, Any]] = None,
+            outputs: Optional[Dict[str, Dict[str, Dict[str, str]]]] = None
+    ):
+        """
+        :param path: The path of the manifest file
+        :param encoding: The encoding the units were compiled with
+        :param version: The version of 'paralang_base' the units were compiled
+         with. If None the installed version will be used
+        :param units: The input hashes of the units, keyed by their absolute
+         path
+        :param executable: The path, size, modification time and units of the
+         executable that was linked from the units
+        :param outputs: The digests of the files the units wrote into the
+         build and dist folder, if they were built using an artifact store
+        """
+        from .utils import cli_get_base_version
+
+        self._path = Path(path)
+        self._encoding = encoding
+        self._version = version or cli_get_base_version()
+        self._units: Dict[str, str] = units or {}
+        self._executable: Optional[Dict[str, Any]] = executable
+        self._outputs: Dict[str, Dict[str, Dict[str, str]]] = outputs or {}
+
+    @property
+    def path(self) -> Path:
+        """ The path of the manifest file """
+        return self._path
+
+    @property
+    def units(self) -> Dict[str, str]:
+        """ The input hashes of the units, keyed by their absolute path """
+        return self._units
+
+    def outputs(self, file: str) -> Dict[str, Dict[str, str]]:
+        """
+        Returns the digests of the files the unit wrote into the build and
+        dist folder, keyed by the folder ('build' or 'dist') and the relative
+        path of the file
+        """
+        return self._outputs.get(file, {})
+
+    @property
+    def digests(self) -> Set[str]:
+        """ The digests of all outputs of the units """
+        return {
+            digest for outputs in self._outputs.values()
+            for files in outputs.values() for digest in files.values()
+        }
+
+    @classmethod
+    def load(
+            cls,
+            build_path: Union[str, PathLike, Path],
+            encoding: str
+    ) -> BuildManifest:
+        """
+        Loads the manifest of the passed build folder. If it does not exist,
+        is corrupted or was written for another encoding or compiler version,
+        an empty manifest is returned, which causes a full rebuild.
+        """
+        from .utils import cli_get_base_version
+
+        path = Path(build_path) / BUILD_MANIFEST_NAME
+        version = cli_get_base_version()
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("format") == _MANIFEST_FORMAT \
+                    and data.get("version") == version \
+                    and data.get("encoding") == encoding:
+                units = {str(k): str(v) for k, v in data["units"].items()}
+                executable = data.get("executable")
+                if not isinstance(executable, dict):
+                    executable = None
+                outputs = data.get("outputs")
+                if not isinstance(outputs, dict):
+                    outputs = None
+                return cls(
+                    path, encoding, version, units, executable, outputs
+                )
+        except (OSError, ValueError, KeyError, AttributeError):
+            ...
+        return cls(path, encoding, version)
+
+    @staticmethod
+    def exists(build_path: Union[str, PathLike, Path]) -> bool:
+        """ Returns True if the passed build folder contains a manifest """
+        return (Path(build_path) / BUILD_MANIFEST_NAME).is_file()
+
+    def is_current(self, file: str, input_hash: str) -> bool:
+        """ Returns True if the unit was compiled with the same inputs """
+        return self._units.get(file) == input_hash
+
+    def update(
+            self,
+            file: str,
+            input_hash: str,
+            outputs: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> None:
+        """
+        Records that the unit was compiled with the passed inputs and
+        optionally the digests of its outputs
+        """
+        self._units[file] = input_hash
+        if outputs is not None:
+            self._outputs[file] = outputs
+
+    def remove(self, file: str) -> None:
+        """ Removes the unit, so that it will be recompiled """
+        self._units.pop(file, None)
+        self._outputs.pop(file, None)
+
+    def set_executable(
+            self,
+            path: Union[str, PathLike, Path],
+            units: List[str]
+    ) -> None:
+        """
+        Records the executable linked from the passed units. The size and
+        modification time are stored as well, so that replaced or modified
+        executables are detected.
+
+        :raises OSError: If the executable does not exist
+        """
+        stat = os.stat(path)
+        self._executable = {
+            "path": os.path.abspath(path),
+            "units": sorted(units),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns
+        }
+
+    def clear_executable(self) -> None:
+        """ Marks the recorded executable as outdated """
+        self._executable = None
+
+    def get_executable(self, units: List[str]) -> Optional[str]:
+        """
+        Returns the path of the executable if it was linked from the passed
+        units, all of them are still recorded and the executable was not
+        modified since. Else None is returned.
+        """
+        executable = self._executable
+        if executable is None or executable.get("units") != sorted(units):
+            return None
+        elif any(unit not in self._units for unit in units):
+            return None
+
+        try:
+            stat = os.stat(executable["path"])
+        except (OSError, KeyError, TypeError):
+            return None
+        if stat.st_size != executable.get("size") or \
+                stat.st_mtime_ns != executable.get("mtime_ns"):
+            return None
+        return executable["path"]
+
+    def save(self) -> None:
+        """ Writes the manifest atomically into the build folder """
+        tmp_path = self._path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "format": _MANIFEST_FORMAT,
+                "version": self._version,
+                "encoding": self._encoding,
+                "units": self._units,
+                "executable": self._executable,
+                "outputs": self._outputs
+            }, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+
+def cli_scan_include_names(content: bytes) -> List[str]:
+    """
+    Returns the names of the string includes of the passed file content in
+    the order they appear in
+    """
+    return [
+        os.fsdecode(match.group(1))
+        for match in _INCLUDE_REGEX.finditer(content)
+    ]
+
+
+def cli_resolve_include(
+        name: str,
+        file: str,
+        project_root: Union[str, PathLike, Path]
+) -> Optional[str]:
+    """
+    Resolves the name of a string include of the passed file relative to the
+    directory of the file first and then relative to the project root.
+
+    :returns: The absolute path of the included file or None if it does not
+     exist
+    """
+    for base in (os.path.dirname(file), str(project_root)):
+        path = os.path.abspath(os.path.join(base, name))
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def cli_scan_includes(
+        file: str,
+        project_root: Union[str, PathLike, Path]
+) -> List[str]:
+    """
+    Scans the passed file for string includes and returns the absolute paths
+    of the included files that exist. Includes are resolved relative to the
+    directory of the file first and then relative to the project root.
+
+    This is only a fast approximation of the Pre-Processor, which is used to
+    detect dependencies between units, and does not evaluate conditional
+    directives.
+    """
+    try:
+        with open(file, "rb") as f:
+            content = f.read()
+    except OSError:
+        return []
+
+    includes = []
+    for name in cli_scan_include_names(content):
+        path = cli_resolve_include(name, file, project_root)
+        if path is not None:
+            includes.append(path)
+    return includes
+
+
+@cli_traced
+def cli_run_build_dir_validation(
+        overwrite_build: bool,
+        overwrite_dist: bool,
+        work_dir: Union[str, PathLike, Path] = None
+) -> Tuple[str, str]:
+    """
+    Returns the build and dist folder for an incremental build. If the build
+    folder already contains a manifest, it is reused (unless it should be
+    overwritten) and no prompt is shown. Otherwise the folders are validated
+    using 'cli_run_output_dir_validation()'.
+    """
+    from paralang_base import const
+    from .utils import (cli_run_output_dir_validation,
+                        cli_remove_in_background)
+
+    work_dir = work_dir or os.getcwd()
+    build_path = str(const.DEFAULT_BUILD_PATH)
+    dist_path = str(const.DEFAULT_DIST_PATH)
+    if not overwrite_build and BuildManifest.exists(build_path):
+        if overwrite_dist and os.path.exists(dist_path):
+            cli_remove_in_background(dist_path)
+        os.makedirs(dist_path, exist_ok=True)
+        return build_path, dist_path
+    return cli_run_output_dir_validation(
+        overwrite_build, overwrite_dist, work_dir
+    )
+
+
+class BuildGraph:
+    """
+    Dependency graph of the translation units of a build. A unit depends on
+    all other units it includes, directly or transitively.
+    """
+
+    def __init__(
+            self,
+            files: List[str],
+            project_root: Union[str, PathLike, Path],
+            encoding: str,
+            debug: bool = False
+    ):
+        """
+        :param files: The translation units that should be compiled
+        :param project_root: The root the includes are resolved against
+        :param encoding: The encoding the units are compiled with
+        :param debug: Whether the units are compiled in debug mode
+        """
+        from .utils import cli_get_base_version
+
+        self._units = list(dict.fromkeys(os.path.abspath(f) for f in files))
+        self._project_root = project_root
+        self._options = (encoding, cli_get_base_version(), str(debug))
+
+        # Includes of every scanned file, including files that are not units
+        self._includes: Dict[str, List[str]] = {}
+        self._content_hashes: Dict[str, str] = {}
+        self._input_hashes: Dict[str, str] = {}
+
+        unit_set = set(self._units)
+        self._deps: Dict[str, Set[str]] = {
+            unit: {
+                f for f in self._transitive_includes(unit)
+                if f in unit_set and f != unit
+            }
+            for unit in self._units
+        }
+
+    @property
+    def units(self) -> List[str]:
+        """ The absolute paths of the units in the order they were passed """
+        return self._units
+
+    def dependencies(self, unit: str) -> Set[str]:
+        """ Returns the units the passed unit depends on """
+        return self._deps[unit]
+
+    def _transitive_includes(self, file: str) -> List[str]:
+        """ Returns all files the passed file includes, sorted """
+        seen: Set[str] = set()
+        stack = [file]
+        while stack:
+            current = stack.pop()
+            if current not in self._includes:
+                self._includes[current] = cli_scan_includes(
+                    current, self._project_root
+                )
+            for include in self._includes[current]:
+                if include not in seen:
+                    seen.add(include)
+                    stack.append(include)
+        seen.discard(file)
+        return sorted(seen)
+
+    def _content_hash(self, file: str) -> str:
+        if file not in self._content_hashes:
+            try:
+                self._content_hashes[file] = cli_hash_file(file)
+            except OSError:
+                # Missing files always cause a rebuild, which reports them
+                self._content_hashes[file] = "missing"
+        return self._content_hashes[file]
+
+    def input_hash(self, unit: str) -> str:
+        """
+        Returns the hash of all inputs of the unit, which are the content of
+        the unit and all its includes, the encoding, the compiler version and
+        whether the unit is compiled in debug mode.
+
+        Paths are hashed relative to the project root, so that checkouts in
+        different folders share the entries of a remote cache.
+        """
+        if unit not in self._input_hashes:
+            sha = hashlib.sha256()
+            for file in [unit, *self._transitive_includes(unit)]:
+                path = cli_get_key_path(file, self._project_root)
+                sha.update(path.encode("utf-8", "surrogateescape") + b"\0")
+                sha.update(self._content_hash(file).encode("ascii") + b"\0")
+            for option in self._options:
+                sha.update(option.encode("utf-8") + b"\0")
+            self._input_hashes[unit] = sha.hexdigest()
+        return self._input_hashes[unit]
+
+    def waves(self, units: Optional[List[str]] = None) -> List[List[str]]:
+        """
+        Orders the passed units (by default all units) into waves, where every
+        unit only depends on units of previous waves. All units of a wave can
+        be compiled concurrently.
+
+        Units that are part of an include cycle can not be ordered and are
+        placed in the last wave.
+        """
+        remaining = set(self._units if units is None else units)
+        waves = []
+        while remaining:
+            wave = [
+                u for u in self._units
+                if u in remaining and not (self._deps[u] & remaining)
+            ]
+            if not wave:
+                cli_get_logger().warning(
+                    "Detected an include cycle between the units: "
+                    + ", ".join(sorted(remaining))
+                )
+                wave = [u for u in self._units if u in remaining]
+            waves.append(wave)
+            remaining.difference_update(wave)
+        return waves
+
+
+class BuildUnitResult:
+    """
+    Result of building a single translation unit, which stores the
+    diagnostics that were logged while compiling the unit
+    """
+
+    def __init__(
+            self,
+            file: str,
+            diagnostics: List[Tuple[int, str]],
+            duration: float,
+            success: bool,
+            skipped: bool = False,
+            restored: bool = False,
+            outputs: Optional[Dict[str, Dict[str, str]]] = None
+    ):
+        """
+        :param file: The unit that was built
+        :param diagnostics: The logged records as a tuple of level and message
+        :param duration: The time in seconds the build took
+        :param success: If set to True the unit was compiled successfully
+        :param skipped: If set to True the unit was up-to-date and skipped
+        :param restored: If set to True the outputs of the unit were restored
+         from the artifact store instead of compiling it
+        :param outputs: The digests of the outputs that were added to the
+         artifact store, keyed by the folder and the relative path
+        """
+        self._file = file
+        self._diagnostics = diagnostics
+        self._duration = duration
+        self._success = success
+        self._skipped = skipped
+        self._restored = restored
+        self._outputs = outputs or {}
+
+    @property
+    def file(self) -> str:
+        """ The unit that was built """
+        return self._file
+
+    @property
+    def diagnostics(self) -> List[Tuple[int, str]]:
+        """ The logged records as a tuple of level and message """
+        return self._diagnostics
+
+    @property
+    def duration(self) -> float:
+        """ The time in seconds the build took """
+        return self._duration
+
+    @property
+    def success(self) -> bool:
+        """ Returns True if the unit was compiled successfully """
+        return self._success
+
+    @property
+    def skipped(self) -> bool:
+        """ Returns True if the unit was up-to-date and not compiled """
+        return self._skipped
+
+    @property
+    def restored(self) -> bool:
+        """ Returns True if the unit was restored from the artifact store """
+        return self._restored
+
+    @property
+    def outputs(self) -> Dict[str, Dict[str, str]]:
+        """ The digests of the outputs added to the artifact store """
+        return self._outputs
+
+    @property
+    def errors(self) -> int:
+        """ Amount of errors (including critical errors) for this unit """
+        return sum(
+            1 for level, _ in self.diagnostics if level >= logging.ERROR
+        )
+
+    @property
+    def warnings(self) -> int:
+        """ Amount of warnings for this unit """
+        return sum(
+            1 for level, _ in self.diagnostics if level == logging.WARNING
+        )
+
+
+def cli_compile_unit(
+        file: str,
+        project_root: str,
+        encoding: str,
+        build_path: str,
+        dist_path: str,
+        debug: bool = False,
+        store: Optional[ArtifactStore] = None
+) -> BuildUnitResult:
+    """
+    Compiles a single translation unit, writes the results into the build and
+    dist folder and collects the logged diagnostics.
+
+    If an artifact store is passed, the results are written into a staging
+    folder and added to the store instead, and their digests are returned as
+    the outputs of the result. Linking them into the build and dist folder is
+    left to the caller.
+
+    This function is also used as the worker of the process pool, where every
+    worker process uses and keeps its own runtime compiler.
+    """
+    import asyncio
+    from paralang_base.compiler import CompileProcess
+
+    stage = store.create_staging_dir() if store is not None else None
+
+    async def _compile():
+        result = await CompileProcess([file], project_root, encoding).compile()
+        if stage is None:
+            result.write_results(build_path, dist_path)
+        else:
+            result.write_results(str(stage / "build"), str(stage / "dist"))
+
+    # Creating the compiler, so its initialisation is not part of the unit
+    cli_get_runtime_compiler()
+
+    collector = ParaCLICollectHandler()
+    level = logging.DEBUG if debug else logging.INFO
+    success = True
+    start = time.perf_counter()
+    with cli_capture_compiler_logs(collector, level) as base_logger:
+        try:
+            asyncio.run(_compile())
+        # Failing units should not stop the compilation of other units
+        except Exception as e:
+            base_logger.error(
+                f"Failed to compile '{file}': {str(e) or type(e).__name__}"
+            )
+            success = False
+
+    outputs = {}
+    if stage is not None:
+        if success:
+            outputs = {
+                name: store.add_folder(stage / name, move=True)
+                for name in ("build", "dist")
+            }
+        shutil.rmtree(stage, ignore_errors=True)
+
+    return BuildUnitResult(
+        file, collector.diagnostics, time.perf_counter() - start,
+        success=success and not any(
+            lvl >= logging.ERROR for lvl, _ in collector.diagnostics
+        ),
+        outputs=outputs
+    )
+
+
+def cli_run_build(
+        files: List[str],
+        encoding: str,
+        build_path: Union[str, PathLike, Path],
+        dist_path: Union[str, PathLike, Path],
+        project_root: Union[str, PathLike, Path] = None,
+        jobs: Optional[int] = None,
+        debug: bool = False,
+        store: Optional[ArtifactStore] = None,
+        prune: bool = True,
+        remote: Optional[RemoteCache] = None
+) -> Iterator[BuildUnitResult]:
+    """
+    Builds the passed translation units and yields the result of every unit
+    once it finished. Units that are up-to-date according to the manifest of
+    the build folder are skipped and yielded first.
+
+    If an artifact store is passed, the build and dist folder are views of
+    the store. Stale units that were compiled before with the same inputs are
+    restored from the store and yielded after the skipped units, while the
+    outputs of compiled units are added to it.
+
+    Units are compiled in waves of independent units, which are compiled in a
+    process pool if more than one job is allowed. Units whose dependencies
+    failed are still compiled, so all errors are reported at once.
+
+    :param files: The translation units that should be compiled
+    :param encoding: The encoding the files should be opened with
+    :param build_path: The build folder, which also stores the manifest
+    :param dist_path: The dist folder
+    :param project_root: The root of the project. If None the current working
+     directory will be used
+    :param jobs: The amount of worker processes. If None the amount of CPUs
+     will be used
+    :param debug: If set to True debug messages will be collected as well
+    :param store: The artifact store the outputs are stored in. If None the
+     outputs are written directly into the build and dist folder
+    :param prune: If set to True the artifact store is pruned after the
+     build, if the outputs added by it exceed the estimated size of the
+     store (see 'ParaCLICache.prune_if_needed()')
+    :param remote: The remote cache, which is looked up using a single batch
+     for the stale units missing in the artifact store. Compiled units are
+     uploaded in the background. Requires an artifact store to be passed
+    """
+    project_root = os.path.abspath(project_root or os.getcwd())
+    manifest = BuildManifest.load(build_path, encoding)
+    folders = (("build", build_path), ("dist", dist_path))
+
+    def _checkout(unit: str, outputs: Dict[str, Dict[str, str]]) -> None:
+        for name, folder in folders:
+            store.checkout(
+                outputs.get(name, {}), folder, manifest.outputs(unit).get(name)
+            )
+    graph = BuildGraph(files, project_root, encoding, debug)
+
+    stale = []
+    for unit in graph.units:
+        if manifest.is_current(unit, graph.input_hash(unit)):
+            yield BuildUnitResult(unit, [], 0.0, success=True, skipped=True)
+        else:
+            stale.append(unit)
+
+    # Removed units are dropped, so the manifest does not grow indefinitely
+    for unit in set(manifest.units) - set(graph.units):
+        if store is not None:
+            _checkout(unit, {})
+        manifest.remove(unit)
+    if stale:
+        manifest.clear_executable()
+
+    if store is not None and remote is not None and stale:
+        from .remote import cli_remote_fetch_units
+        cli_remote_fetch_units(
+            remote, store, [graph.input_hash(u) for u in stale]
+        )
+
+    hits = 0
+    for unit in list(stale) if store is not None else []:
+        start = time.perf_counter()
+        entry = store.load_unit(graph.input_hash(unit))
+        if entry is None:
+            continue
+        outputs, diagnostics = entry
+        diagnostics = cli_unmask_path(diagnostics, project_root)
+        _checkout(unit, outputs)
+        manifest.update(unit, graph.input_hash(unit), outputs)
+        stale.remove(unit)
+        hits += 1
+        yield BuildUnitResult(
+            unit, diagnostics, time.perf_counter() - start, success=True,
+            restored=True
+        )
+
+    args = (
+        project_root, encoding, str(build_path), str(dist_path), debug, store
+    )
+    workers = 1 if cli_is_profiling() else min(
+        jobs or os.cpu_count() or 1, len(stale)
+    )
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    futures = []
+    try:
+        for wave in graph.waves(stale):
+            if executor is None or len(wave) == 1:
+                results = (cli_compile_unit(u, *args) for u in wave)
+            else:
+                futures = [
+                    executor.submit(cli_compile_unit, u, *args) for u in wave
+                ]
+                results = (f.result() for f in futures)
+
+            for result in results:
+                input_hash = graph.input_hash(result.file)
+                if result.success and store is not None:
+                    _checkout(result.file, result.outputs)
+                    diagnostics = cli_mask_path(
+                        result.diagnostics, project_root
+                    )
+                    store.store_unit(input_hash, result.outputs, diagnostics)
+                    if remote is not None:
+                        from .remote import cli_remote_upload_unit
+                        cli_remote_upload_unit(
+                            remote, store, input_hash, result.outputs,
+                            diagnostics
+                        )
+                    manifest.update(result.file, input_hash, result.outputs)
+                elif result.success:
+                    manifest.update(result.file, input_hash)
+                else:
+                    manifest.remove(result.file)
+                yield result
+    finally:
+        if executor is not None:
+            # Units of an aborted build that did not start yet are dropped
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+        manifest.save()
+        if store is not None:
+            store.update_view(manifest.path, manifest.digests)
+            store.record_stats(hits, len(stale))
+            if prune:
+                store.prune_if_needed()
+
+
+def _find_build_folders(project_root: str) -> List[str]:
+    """
+    Returns the default build folder of the project followed by the numbered
+    build folders, which are used if the default one could not be used
+    """
+    try:
+        names = os.listdir(project_root)
+    except OSError:
+        return []
+    numbered = sorted(
+        (int(match.group(1)), name) for name in names
+        if (match := _NUMBERED_BUILD_REGEX.fullmatch(name))
+    )
+    return [
+        os.path.join(project_root, name)
+        for name in (["build"] if "build" in names else [])
+        + [name for _, name in numbered]
+    ]
+
+
+def cli_get_current_executable(
+        files: List[str],
+        encoding: str,
+        build_path: Union[str, PathLike, Path] = None,
+        project_root: Union[str, PathLike, Path] = None,
+        debug: bool = False
+) -> Optional[str]:
+    """
+    Returns the path of the executable built from the passed files, if it is
+    up-to-date with the sources, else None.
+
+    This only reads the manifest and hashes the sources, so it never imports
+    the compiler, which allows running up-to-date programs without any
+    compiler start-up costs.
+
+    :param files: The translation units of the program
+    :param encoding: The encoding the files are opened with
+    :param build_path: The build folder. If None './build' and the numbered
+     build folders ('./build_2', ...) are searched
+    :param project_root: The root of the project. If None the current working
+     directory will be used
+    :param debug: Whether the program was compiled in debug mode
+    """
+    project_root = os.path.abspath(project_root or os.getcwd())
+    folders = [
+        folder for folder in (
+            [build_path] if build_path else _find_build_folders(project_root)
+        ) if BuildManifest.exists(folder)
+    ]
+    if not folders:
+        return None
+
+    graph = BuildGraph(files, project_root, encoding, debug)
+    for folder in folders:
+        manifest = BuildManifest.load(folder, encoding)
+        executable = manifest.get_executable(graph.units)
+        if executable is not None and all(
+                manifest.is_current(unit, graph.input_hash(unit))
+                for unit in graph.units
+        ):
+            return executable
+    return None
+
+
+def cli_log_build_unit_result(result: BuildUnitResult) -> None:
+    """
+    Replays the diagnostics of the result through the CLI logger and prints
+    the state of the unit.
+
+    Requires the CLI logging to be initialised!
+    """
+    cli_logger = cli_get_logger()
+    for level, msg in result.diagnostics:
+        cli_logger.log(level, msg)
+
+    if result.skipped:
+        state = "[white](up-to-date)[/white]"
+    elif result.restored:
+        state = f"[white](restored, {result.duration:.3f}s)[/white]"
+    else:
+        state = f"[white]({result.duration:.3f}s)[/white]"
+    get_console().print(
+        f"[bold bright_cyan]{result.file}[/bold bright_cyan] - "
+        f"[bold yellow]{result.warnings} Warnings [/bold yellow]"
+        f"[bold red]{result.errors} Errors[/bold red] {state}",
+        highlight=False
+    )
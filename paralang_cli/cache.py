@@ -0,0 +1,334 @@
+# coding=utf-8
+""" Persistent on-disk cache used by the CLI to avoid repeating work """
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union, List, Tuple, Dict, Any
+
+__all__ = [
+    "DEFAULT_CACHE_MAX_SIZE",
+    "ParaCLICache",
+    "cli_get_cache_dir",
+    "cli_hash_file",
+    "cli_get_key_path",
+    "cli_mask_path",
+    "cli_unmask_path",
+]
+
+# Default maximum size in bytes of a cache namespace (64 MiB)
+DEFAULT_CACHE_MAX_SIZE: int = 64 * 1024 * 1024
+# Size of the chunks used for hashing files
+_HASH_CHUNK_SIZE: int = 1024 * 1024
+# Placeholder replacing a folder in cached diagnostics. Keys of entries that
+# are shared between machines do not contain absolute paths, so the cached
+# diagnostics must not contain them either
+_PATH_PLACEHOLDER: str = "${PARA_PATH}"
+# Time in seconds after which a hit marks an entry as recently used again.
+# Entries used more recently are not touched, so hits do not write anything
+_TOUCH_INTERVAL: int = 60 * 60
+
+
+def cli_get_cache_dir() -> Path:
+    """
+    Returns the base directory of the CLI cache. This can be overwritten using
+    the environment variable 'PARA_CACHE_DIR', else the platform specific
+    cache location is used.
+    """
+    if os.environ.get("PARA_CACHE_DIR"):
+        return Path(os.environ["PARA_CACHE_DIR"]).resolve()
+    elif sys.platform in ['cygwin', 'win32']:  # pragma: no cover
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / \
+            "Local"
+        return Path(base).resolve() / "para" / "cache"
+    elif sys.platform == "darwin":  # pragma: no cover
+        return Path.home() / "Library" / "Caches" / "para"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        return Path(base).resolve() / "para"
+
+
+def cli_hash_file(
+        path: Union[str, PathLike, Path],
+        *extra: str
+) -> str:
+    """
+    Creates the sha256 hex-digest of the content of the passed file. Additional
+    strings may be passed, which will be added to the hash as well.
+
+    :raises OSError: If the file can not be read
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(_HASH_CHUNK_SIZE):
+            h.update(chunk)
+    for i in extra:
+        h.update(b"\0")
+        h.update(i.encode("utf-8"))
+    return h.hexdigest()
+
+
+def cli_get_key_path(
+        path: Union[str, PathLike, Path],
+        root: Union[str, PathLike, Path]
+) -> str:
+    """
+    Returns the path relative to the root using forward slashes, which is
+    used for cache keys, so that checkouts in different folders or on
+    different machines create the same keys. If the path has no relative
+    path to the root (e.g. another drive), the absolute path is returned
+    """
+    try:
+        return os.path.relpath(path, root).replace(os.sep, "/")
+    except ValueError:
+        return os.path.abspath(path)
+
+
+def cli_mask_path(
+        diagnostics: List[Tuple[int, str]],
+        path: Union[str, PathLike, Path]
+) -> List[Tuple[int, str]]:
+    """
+    Replaces the passed absolute path in the diagnostics with a placeholder,
+    before they are cached (see 'cli_unmask_path()')
+    """
+    path = os.fspath(path)
+    if os.path.dirname(path) == path:
+        return list(diagnostics)  # The root of the filesystem is kept
+    return [
+        (level, msg.replace(path, _PATH_PLACEHOLDER))
+        for level, msg in diagnostics
+    ]
+
+
+def cli_unmask_path(
+        diagnostics: List[Tuple[int, str]],
+        path: Union[str, PathLike, Path]
+) -> List[Tuple[int, str]]:
+    """
+    Replaces the placeholder of 'cli_mask_path()' in cached diagnostics with
+    the passed absolute path
+    """
+    # The placeholder is followed by a separator in the diagnostics, so the
+    # trailing separator of a filesystem root is removed
+    path = os.fspath(path).rstrip("/\\")
+    return [
+        (level, msg.replace(_PATH_PLACEHOLDER, path))
+        for level, msg in diagnostics
+    ]
+
+
+class ParaCLICache:
+    """
+    Simple content-addressed file cache, where every entry is stored as a
+    single file named after its key. Entries are evicted in least recently
+    used order once the size of the namespace exceeds the maximum size.
+
+    The size of the namespace is estimated in the statistics file, so that
+    'prune_if_needed()' only walks the entries once the estimate exceeds the
+    maximum size.
+    """
+
+    def __init__(
+            self,
+            namespace: str,
+            cache_dir: Union[str, PathLike, Path] = None,
+            max_size: int = DEFAULT_CACHE_MAX_SIZE
+    ):
+        """
+        :param namespace: The name of the sub-folder, which stores the entries
+        :param cache_dir: The base directory of the cache. If None the
+         default from 'cli_get_cache_dir()' is used
+        :param max_size: The maximum size in bytes of the namespace
+        """
+        if cache_dir is None:
+            cache_dir = cli_get_cache_dir()
+        self._path = Path(cache_dir) / namespace
+        self._max_size = max_size
+        # Bytes written by 'put()' since the size estimate was last updated
+        self._added = 0
+
+    @property
+    def path(self) -> Path:
+        """ The directory containing the entries of this cache """
+        return self._path
+
+    @property
+    def max_size(self) -> int:
+        """ The maximum size in bytes of this cache """
+        return self._max_size
+
+    def _entry_path(self, key: str) -> Path:
+        return self._path / key[:2] / key
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """ Returns the last access time, size and path of all entries """
+        entries = []
+        if not self._path.exists():
+            return entries
+
+        for root, _, files in os.walk(self._path):
+            for name in files:
+                path = Path(root) / name
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the data of the entry with the passed key or None if it does
+        not exist. A hit will mark the entry as recently used, unless it was
+        already marked within the last hour.
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+                mtime = os.fstat(file.fileno()).st_mtime
+            if time.time() - mtime > _TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Stores the passed data under the key. The entry is written to a
+        temporary file first and then moved, so that readers never see
+        partially written entries.
+        """
+        path = self._entry_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp, path)
+            self._added += len(data)
+        except OSError:
+            # Failing to write a cache entry should never break a command
+            ...
+
+    @property
+    def _stats_path(self) -> Path:
+        # Stored next to the entries, so it is never evicted by prune()
+        return self._path.parent / f"{self._path.name}.stats.json"
+
+    def _read_stats(self) -> Dict[str, Any]:
+        """
+        Returns the content of the statistics file, where 'size' is the
+        estimated size of the namespace or None if it is unknown
+        """
+        try:
+            with open(self._stats_path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            size = data.get("size")
+            return {
+                "hits": int(data.get("hits", 0)),
+                "misses": int(data.get("misses", 0)),
+                "size": int(size) if size is not None else None
+            }
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {"hits": 0, "misses": 0, "size": None}
+
+    def _write_stats(self, stats: Dict[str, Any]) -> None:
+        """ Writes the statistics file atomically """
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self._path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(stats, file)
+            os.replace(tmp, self._stats_path)
+        except OSError:
+            ...
+
+    def load_stats(self) -> Dict[str, int]:
+        """ Returns the total amount of hits and misses of this cache """
+        stats = self._read_stats()
+        return {"hits": stats["hits"], "misses": stats["misses"]}
+
+    def record_stats(self, hits: int, misses: int) -> None:
+        """ Adds the passed amount of hits and misses to the statistics """
+        if hits == 0 and misses == 0:
+            return
+
+        stats = self._read_stats()
+        stats["hits"] += hits
+        stats["misses"] += misses
+        self._write_stats(stats)
+
+    def size(self) -> int:
+        """ Returns the current size of the cache in bytes """
+        return sum(size for _, size, _ in self._entries())
+
+    def prune(self) -> int:
+        """
+        Removes the least recently used entries until the cache is smaller
+        than the maximum size.
+
+        :returns: The amount of removed entries
+        """
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda i: i[0]):
+            if total <= self._max_size:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        stats = self._read_stats()
+        stats["size"] = total
+        self._write_stats(stats)
+        self._added = 0
+        return removed
+
+    def prune_if_needed(self) -> int:
+        """
+        Prunes the cache if entries were written using this instance and the
+        estimated size of the namespace exceeds the maximum size. Runs that
+        only read entries therefore never walk the namespace.
+
+        Replaced entries are counted twice by the estimate, which is
+        corrected the next time the cache is pruned.
+
+        :returns: The amount of removed entries
+        """
+        if self._added == 0:
+            return 0
+
+        stats = self._read_stats()
+        if stats["size"] is not None \
+                and stats["size"] + self._added <= self._max_size:
+            stats["size"] += self._added
+            self._write_stats(stats)
+            self._added = 0
+            return 0
+        return self.prune()
+
+    def entries(self) -> int:
+        """ Returns the amount of entries of this cache """
+        return len(self._entries())
+
+    def clear(self) -> None:
+        """ Removes all entries and the statistics of this cache """
+        if self._path.exists():
+            shutil.rmtree(self._path, ignore_errors=True)
+        try:
+            self._stats_path.unlink()
+        except OSError:
+            ...
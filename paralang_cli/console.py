@@ -0,0 +1,348 @@
+# coding=utf-8
+"""
+Detection of the terminal capabilities and a plain console, which is used
+instead of rich in non-interactive environments like CI jobs or when the
+output is piped.
+
+The detected capabilities are stored in the environment variable
+'PARA_TERMINAL_CAPS', so child invocations writing to the same output do not
+have to detect them again.
+"""
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import sys
+import threading
+from typing import Optional, Tuple, Any, TextIO
+
+__all__ = [
+    "TERMINAL_CAPS_ENV",
+    "CI_ENV_VARS",
+    "TerminalCapabilities",
+    "ParaCLIPlainConsole",
+    "ParaCLIOutputMultiplexer",
+    "cli_install_output_multiplexer",
+    "cli_uninstall_output_multiplexer",
+    "cli_get_terminal_capabilities",
+    "cli_use_rich_console",
+    "cli_init_colorama",
+]
+
+# Environment variable caching the detected terminal capabilities
+TERMINAL_CAPS_ENV: str = "PARA_TERMINAL_CAPS"
+# Environment variables, which are set by common CI services
+CI_ENV_VARS: Tuple[str, ...] = (
+    "CI", "GITHUB_ACTIONS", "GITLAB_CI", "BUILDKITE", "JENKINS_URL",
+    "TF_BUILD", "TEAMCITY_VERSION", "CIRCLECI", "TRAVIS"
+)
+# Minimum width of the console
+MIN_CONSOLE_WIDTH: int = 120
+
+# Matches rich markup tags, like '[bold red]' or '[/]', but not escaped
+# brackets or text in brackets, which does not start like a tag
+_MARKUP_TAG_REGEX = re.compile(r"(\\*)\[([a-z#/@][^\[]*?)]")
+
+_capabilities: Optional[TerminalCapabilities] = None
+_colorama_initialised: bool = False
+_multiplexer: Optional[ParaCLIOutputMultiplexer] = None
+
+
+class TerminalCapabilities:
+    """ Capabilities of the terminal the CLI writes to """
+
+    def __init__(
+            self,
+            interactive: bool,
+            ci: bool,
+            width: int,
+            color: bool,
+            output_id: str = ""
+    ):
+        """
+        :param interactive: If set to True stdout is a terminal
+        :param ci: If set to True the CLI is run in a CI environment
+        :param width: The width of the console
+        :param color: If set to True colours may be used
+        :param output_id: Identity of stdout the capabilities were detected
+         for. Cached capabilities are only reused for the same output
+        """
+        self.interactive = interactive
+        self.ci = ci
+        self.width = width
+        self.color = color
+        self.output_id = output_id
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, TerminalCapabilities) and \
+            self.to_env() == other.to_env()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_env()!r})"
+
+    def to_env(self) -> str:
+        """ Serialises the capabilities for the environment variable """
+        return ";".join([
+            f"interactive={int(self.interactive)}",
+            f"ci={int(self.ci)}",
+            f"width={self.width}",
+            f"color={int(self.color)}",
+            f"output={self.output_id}"
+        ])
+
+    @classmethod
+    def from_env(cls, value: str) -> Optional[TerminalCapabilities]:
+        """
+        Parses the value of the environment variable. Returns None if the
+        value is invalid
+        """
+        try:
+            fields = dict(f.split("=", 1) for f in value.split(";"))
+            return cls(
+                interactive=fields["interactive"] == "1",
+                ci=fields["ci"] == "1",
+                width=int(fields["width"]),
+                color=fields["color"] == "1",
+                output_id=fields["output"]
+            )
+        except (KeyError, ValueError):
+            return None
+
+    @classmethod
+    def detect(cls, output_id: str = "") -> TerminalCapabilities:
+        """ Detects the capabilities of the current process """
+        ci = any(os.environ.get(var) for var in CI_ENV_VARS)
+        try:
+            interactive = sys.stdout is not None and sys.stdout.isatty()
+        except ValueError:
+            interactive = False
+        color = interactive and "NO_COLOR" not in os.environ and \
+            os.environ.get("TERM") != "dumb"
+
+        width = MIN_CONSOLE_WIDTH
+        if "PYCHARM_HOSTED" in os.environ:
+            width = 150
+        elif interactive:
+            width = max(shutil.get_terminal_size().columns, width)
+        return cls(interactive, ci, width, color, output_id)
+
+
+def _get_output_id() -> str:
+    """
+    Returns the identity of stdout, which changes if the output of a child
+    invocation is redirected
+    """
+    try:
+        stat = os.fstat(sys.stdout.fileno())
+        return f"{stat.st_dev}:{stat.st_ino}"
+    except (AttributeError, ValueError, OSError):
+        return ""
+
+
+def cli_get_terminal_capabilities(
+        refresh: bool = False
+) -> TerminalCapabilities:
+    """
+    Returns the capabilities of the terminal. They are detected once and
+    cached in the environment, from where child invocations load them if
+    they write to the same output.
+
+    :param refresh: If set to True the capabilities are detected again
+    """
+    global _capabilities
+    if _capabilities is not None and not refresh:
+        return _capabilities
+
+    output_id = _get_output_id()
+    cached = None if refresh else TerminalCapabilities.from_env(
+        os.environ.get(TERMINAL_CAPS_ENV, "")
+    )
+    if cached is not None and cached.output_id == output_id:
+        _capabilities = cached
+    else:
+        _capabilities = TerminalCapabilities.detect(output_id)
+        os.environ[TERMINAL_CAPS_ENV] = _capabilities.to_env()
+    return _capabilities
+
+
+def cli_use_rich_console() -> bool:
+    """
+    Returns whether the rich console should be used. In CI environments and
+    if the output is not a terminal the plain console is used instead
+    """
+    caps = cli_get_terminal_capabilities()
+    return caps.interactive and not caps.ci
+
+
+def cli_init_colorama() -> None:
+    """
+    Initialises colorama as a backup for colouring the console on Windows.
+    Does nothing if it was already initialised or the rich console is not
+    used
+    """
+    global _colorama_initialised
+    if _colorama_initialised or not cli_use_rich_console():
+        return
+
+    import colorama
+    colorama.init(autoreset=True)
+    _colorama_initialised = True
+
+
+class ParaCLIPlainConsole:
+    """
+    Minimal replacement of the rich Console, which writes the text without
+    markup and decorations onto stdout. It implements the subset of the
+    rich API used by the CLI.
+    """
+    is_terminal: bool = False
+    is_dumb_terminal: bool = False
+
+    def __init__(
+            self,
+            width: int = MIN_CONSOLE_WIDTH,
+            file: Optional[TextIO] = None
+    ):
+        """
+        :param width: The width used for rules and centered text
+        :param file: The stream the console writes to. Defaults to stdout at
+         the time of writing
+        """
+        self.width = width
+        self._file = file
+
+    @property
+    def file(self) -> TextIO:
+        """ The stream the console writes to """
+        return self._file or sys.stdout
+
+    @staticmethod
+    def _strip_markup(text: str) -> str:
+        def _replace(match: re.Match) -> str:
+            backslashes = match.group(1)
+            if len(backslashes) % 2:
+                # Escaped tag, which is printed literally
+                return f"{backslashes[:len(backslashes) // 2]}" \
+                       f"[{match.group(2)}]"
+            return backslashes[:len(backslashes) // 2]
+        return _MARKUP_TAG_REGEX.sub(_replace, text)
+
+    def print(
+            self,
+            *objects: Any,
+            sep: str = " ",
+            end: str = "\n",
+            justify: Optional[str] = None,
+            markup: Optional[bool] = None,
+            **_
+    ) -> None:
+        """ Writes the objects without markup """
+        text = sep.join(str(o) for o in objects)
+        if markup is not False:
+            text = self._strip_markup(text)
+        if justify == "center":
+            text = "\n".join(
+                line.center(self.width).rstrip() for line in text.split("\n")
+            )
+        self.file.write(text + end)
+
+    def rule(self, title: str = "", **_) -> None:
+        """ Writes a horizontal line with an optional title """
+        title = self._strip_markup(str(title)).strip()
+        if title:
+            self.print(f" {title} ".center(self.width, "-"), markup=False)
+        else:
+            self.print("-" * self.width, markup=False)
+
+    def input(self, prompt: str = "", **_) -> str:
+        """ Writes the prompt and reads a line from stdin """
+        self.print(prompt, end="")
+        return input()
+
+
+class _MultiplexedStream:
+    """
+    Proxy of stdout or stderr, which writes through the multiplexer. All
+    other attributes are passed to the original stream
+    """
+
+    def __init__(self, multiplexer: ParaCLIOutputMultiplexer, stream: TextIO):
+        self._multiplexer = multiplexer
+        self._stream = stream
+
+    def write(self, text: str) -> int:
+        return self._multiplexer.write(self._stream, text)
+
+    def writelines(self, lines) -> None:
+        for line in lines:
+            self.write(line)
+
+    def flush(self) -> None:
+        with self._multiplexer.lock:
+            self._stream.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class ParaCLIOutputMultiplexer:
+    """
+    Serialises the writes onto stdout and stderr. Before writing onto one
+    stream, the other one is flushed if it was written to last, so the
+    output appears in the order it was written, even if stdout is buffered
+    (e.g. when piped) and stderr is not.
+
+    Writes onto the same stream stay buffered, so continuous output does not
+    cause additional flushes.
+    """
+
+    def __init__(self, stdout: TextIO, stderr: TextIO):
+        """
+        :param stdout: The original stdout
+        :param stderr: The original stderr
+        """
+        self.lock = threading.RLock()
+        self.stdout = stdout
+        self.stderr = stderr
+        self._last: Optional[TextIO] = None
+
+    def write(self, stream: TextIO, text: str) -> int:
+        """ Writes the text onto the stream after flushing the other one """
+        with self.lock:
+            if self._last is not None and self._last is not stream:
+                self._last.flush()
+            self._last = stream
+            return stream.write(text)
+
+    def flush(self) -> None:
+        """ Flushes both streams """
+        with self.lock:
+            self.stdout.flush()
+            self.stderr.flush()
+
+
+def cli_install_output_multiplexer() -> ParaCLIOutputMultiplexer:
+    """
+    Replaces sys.stdout and sys.stderr with proxies writing through a shared
+    ParaCLIOutputMultiplexer, so banners, logs and diagnostics keep their
+    order across both streams. Returns the active multiplexer if it is
+    already installed
+    """
+    global _multiplexer
+    if _multiplexer is None:
+        _multiplexer = ParaCLIOutputMultiplexer(sys.stdout, sys.stderr)
+        sys.stdout = _MultiplexedStream(_multiplexer, sys.stdout)
+        sys.stderr = _MultiplexedStream(_multiplexer, sys.stderr)
+    return _multiplexer
+
+
+def cli_uninstall_output_multiplexer() -> None:
+    """ Flushes the streams and restores the original sys.stdout/stderr """
+    global _multiplexer
+    if _multiplexer is None:
+        return
+
+    _multiplexer.flush()
+    sys.stdout, sys.stderr = _multiplexer.stdout, _multiplexer.stderr
+    _multiplexer = None
@@ -0,0 +1,276 @@
+# coding=utf-8
+"""
+Persistent import-graph index of the Para files of a project, which is used
+by 'paraproj graph' and 'paraproj affected'.
+
+The index stores the string includes of every file together with its size,
+modification time and content hash. Updating the index only reads files
+whose size or modification time changed and only rescans the includes of
+files whose content changed. Includes are stored by name and resolved when
+the graph is queried, so adding or removing a file changes the resolution
+of unchanged files as well.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+from os import PathLike
+from pathlib import Path
+from typing import List, Dict, Set, Optional, Union, Iterable, Any
+
+from .build import cli_scan_include_names, cli_resolve_include
+from .cache import cli_get_cache_dir
+
+__all__ = [
+    "GraphError",
+    "ImportGraphIndex",
+    "cli_git_changed_files",
+]
+
+# Version of the index format. Indexes of other versions are rebuilt
+_INDEX_FORMAT: int = 1
+
+
+class GraphError(RuntimeError):
+    """ Exception raised if the change set of a query can not be determined """
+
+
+class ImportGraphIndex:
+    """
+    Import-graph index of all Para files inside a project. The index of a
+    project is stored in the 'graph' folder of the local cache, keyed by the
+    path of the project.
+    """
+
+    def __init__(
+            self,
+            project_root: Union[str, PathLike, Path],
+            path: Union[str, PathLike, Path] = None
+    ):
+        """
+        :param project_root: The root folder of the project
+        :param path: The file the index is stored in. If None the index is
+         stored inside the local cache
+        """
+        self._root = os.path.realpath(project_root)
+        if path is None:
+            key = hashlib.sha256(self._root.encode("utf-8")).hexdigest()
+            path = cli_get_cache_dir() / "graph" / f"{key[:32]}.json"
+        self._path = Path(path)
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dependents: Optional[Dict[str, Set[str]]] = None
+
+    @property
+    def project_root(self) -> str:
+        """ The absolute path of the root folder of the project """
+        return self._root
+
+    @property
+    def path(self) -> Path:
+        """ The file the index is stored in """
+        return self._path
+
+    @property
+    def files(self) -> List[str]:
+        """ The absolute paths of all indexed files, sorted """
+        return sorted(self._entries)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """ Loads the index or returns an empty index if it is unusable """
+        try:
+            with open(self._path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("format") != _INDEX_FORMAT \
+                    or data.get("root") != self._root:
+                return {}
+            return {
+                os.path.join(self._root, str(rel)): {
+                    "size": int(entry["size"]),
+                    "mtime_ns": int(entry["mtime_ns"]),
+                    "hash": str(entry["hash"]),
+                    "includes": [str(i) for i in entry["includes"]]
+                }
+                for rel, entry in data["files"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+
+    def save(self) -> None:
+        """ Writes the index atomically """
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "format": _INDEX_FORMAT,
+                "root": self._root,
+                "files": {
+                    os.path.relpath(f, self._root): entry
+                    for f, entry in sorted(self._entries.items())
+                }
+            }, file, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+    def update(self) -> int:
+        """
+        Updates the index with the current state of the project and saves it.
+        Files are only read if their size or modification time changed.
+
+        :returns: The amount of files whose content changed and which were
+         rescanned
+        """
+        from .syntax_check import cli_collect_files
+
+        files = [os.path.abspath(f) for f in cli_collect_files([self._root])]
+        entries = {}
+        rescanned = 0
+        for file in files:
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+
+            entry = self._entries.get(file)
+            if entry is not None and entry["size"] == stat.st_size \
+                    and entry["mtime_ns"] == stat.st_mtime_ns:
+                entries[file] = entry
+                continue
+
+            try:
+                with open(file, "rb") as f:
+                    content = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha256(content).hexdigest()
+            if entry is None or entry["hash"] != digest:
+                includes = cli_scan_include_names(content)
+                rescanned += 1
+            else:
+                includes = entry["includes"]
+            entries[file] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": digest,
+                "includes": includes
+            }
+
+        changed = entries != self._entries
+        self._entries = entries
+        self._dependents = None
+        if changed or not self._path.exists():
+            self.save()
+        return rescanned
+
+    def includes(self, file: str) -> List[str]:
+        """
+        Returns the absolute paths of the existing files the passed file
+        includes directly
+        """
+        entry = self._entries.get(os.path.abspath(file))
+        if entry is None:
+            return []
+
+        includes = []
+        for name in entry["includes"]:
+            path = cli_resolve_include(name, file, self._root)
+            if path is not None and path not in includes:
+                includes.append(path)
+        return includes
+
+    def dependents(self, file: str) -> Set[str]:
+        """ Returns the indexed files that include the passed file directly """
+        if self._dependents is None:
+            self._dependents = {}
+            for indexed in self._entries:
+                for include in self.includes(indexed):
+                    self._dependents.setdefault(include, set()).add(indexed)
+        return self._dependents.get(os.path.abspath(file), set())
+
+    def _includers(self, file: str) -> Set[str]:
+        """
+        Returns the indexed files whose includes referred to the removed
+        file, since the includes can not be resolved anymore
+        """
+        return {
+            indexed for indexed, entry in self._entries.items() if any(
+                os.path.abspath(os.path.join(base, name)) == file
+                for name in entry["includes"]
+                for base in (os.path.dirname(indexed), self._root)
+            )
+        }
+
+    def affected(
+            self,
+            changed: Iterable[Union[str, PathLike, Path]]
+    ) -> List[str]:
+        """
+        Returns the indexed files that are affected by the passed changed
+        files, which are the changed files themselves and all files that
+        include them directly or transitively.
+
+        Removed files are not part of the result, but the files that included
+        them when they were last indexed are.
+        """
+        stack = [os.path.realpath(f) for f in changed]
+        for file in list(stack):
+            if not os.path.exists(file):
+                stack.extend(self._includers(file))
+
+        affected: Set[str] = set()
+        seen = set(stack)
+        while stack:
+            file = stack.pop()
+            if file in self._entries and os.path.exists(file):
+                affected.add(file)
+            for dependent in self.dependents(file):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return sorted(affected)
+
+
+def _run_git(args: List[str], cwd: str) -> bytes:
+    """
+    Runs git and returns its output
+
+    :raises GraphError: If git is not available or fails
+    """
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=cwd, check=True, capture_output=True
+        ).stdout
+    except FileNotFoundError as e:
+        raise GraphError("Git is not available") from e
+    except subprocess.CalledProcessError as e:
+        error = e.stderr.decode("utf-8", "replace").strip()
+        raise GraphError(f"'git {' '.join(args)}' failed: {error}") from e
+
+
+def cli_git_changed_files(
+        rev: str,
+        cwd: Union[str, PathLike, Path] = None
+) -> List[str]:
+    """
+    Returns the absolute paths of the files that changed since the passed
+    git revision, including uncommitted changes, removed files and untracked
+    files.
+
+    :raises GraphError: If the folder is not inside a git repository or the
+     revision does not exist
+    """
+    cwd = os.path.abspath(cwd or os.getcwd())
+    top = os.fsdecode(
+        _run_git(["rev-parse", "--show-toplevel"], cwd).strip()
+    )
+    diff = _run_git(
+        ["diff", "--name-only", "--no-renames", "-z", rev, "--"], top
+    )
+    untracked = _run_git(
+        ["ls-files", "--others", "--exclude-standard", "-z"], top
+    )
+    names = (diff + untracked).split(b"\0")
+    return sorted({
+        os.path.normpath(os.path.join(top, os.fsdecode(n)))
+        for n in names if n
+    })
@@ -0,0 +1,226 @@
+# coding=utf-8
+"""
+Streaming ingestion of Para source files with bounded memory usage.
+
+'paralang_base' reads a file at once, decodes it, converts it into a list of
+code points, removes the comments and then converts the result into a list
+of code points again, which keeps several full copies of the text in memory
+(roughly 20 bytes per character for ASCII sources).
+
+The streaming ingestion instead reads the file in chunks, which are decoded
+and validated incrementally and have their comments removed on the fly. Only
+the final text is kept, together with a compact buffer of its code points
+(1 byte per character for Latin-1 text and 4 bytes otherwise), from which
+the lexer reads.
+"""
+from __future__ import annotations
+
+import codecs
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union, List, Literal, Sequence
+
+import antlr4
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "ParaCLICommentStripper",
+    "ParaCLISourceStream",
+    "cli_validate_encoding",
+]
+
+# Size in bytes of the chunks files are read in (1 MiB)
+DEFAULT_CHUNK_SIZE: int = 1024 * 1024
+
+
+class ParaCLICommentStripper:
+    """
+    Incremental version of 'ParaCompiler.remove_comments_from_str()', which
+    normalises the line endings and removes '//' and '/* */' comments from
+    text that is passed in chunks. The output is identical to removing the
+    comments from the whole text at once.
+    """
+
+    def __init__(self):
+        self._state: Literal["std", "one_c", "mult_c"] = "std"
+        self._prev: str = ""
+        # A trailing '\r' is held back, since it may be part of a '\r\n'
+        self._carriage_return: bool = False
+        # The last character of the output is held back, since it is removed
+        # if the next chunk starts a comment
+        self._pending: str = ""
+
+    def feed(self, text: str) -> str:
+        """ Processes the next chunk and returns the text without comments """
+        if self._carriage_return:
+            text = "\r" + text
+            self._carriage_return = False
+        if text.endswith("\r"):
+            text = text[:-1]
+            self._carriage_return = True
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        out: List[str] = [self._pending]
+        i, n = 0, len(text)
+        while i < n:
+            if self._state == "std":
+                if self._prev == "/" and text[i] in "/*":
+                    self._drop_last(out)
+                    self._state = "one_c" if text[i] == "/" else "mult_c"
+                    self._prev = text[i]
+                    i += 1
+                    continue
+
+                end = text.find("/", i)
+                end = n if end == -1 else end + 1
+                out.append(text[i:end])
+                self._prev = text[end - 1]
+                i = end
+            elif self._state == "one_c":
+                end = text.find("\n", i)
+                if end == -1:
+                    self._prev = text[-1]
+                    break
+                out.append("\n")
+                self._state = "std"
+                self._prev = "\n"
+                i = end + 1
+            else:
+                if self._prev == "*" and text[i] == "/":
+                    end = i - 1
+                else:
+                    end = text.find("*/", i)
+                    if end == -1:
+                        self._prev = text[-1]
+                        break
+                out.append("\n")
+                self._state = "std"
+                self._prev = "/"
+                i = end + 2
+
+        result = "".join(out)
+        self._pending = result[-1:]
+        return result[:-1]
+
+    @staticmethod
+    def _drop_last(out: List[str]) -> None:
+        while out and not out[-1]:
+            out.pop()
+        if out:
+            out[-1] = out[-1][:-1]
+
+    def close(self) -> str:
+        """ Returns the remaining text once all chunks were passed """
+        result = self.feed("\n" if self._carriage_return else "")
+        result += self._pending
+        self._pending = ""
+        return result
+
+
+def _read_chunks(
+        path: Union[str, PathLike, Path],
+        encoding: str,
+        chunk_size: int
+):
+    """
+    Reads and incrementally decodes the file, yielding the decoded chunks.
+
+    :raises UnicodeDecodeError: If the file is not valid in the encoding. The
+     position is relative to the start of the file
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    offset = 0
+    with open(path, "rb") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            try:
+                yield decoder.decode(chunk, final=not chunk)
+            except UnicodeDecodeError as e:
+                raise UnicodeDecodeError(
+                    e.encoding, e.object, e.start, e.end,
+                    f"{e.reason} (at byte {offset + e.start})"
+                ) from None
+            if not chunk:
+                break
+            offset += len(chunk)
+
+
+def cli_validate_encoding(
+        path: Union[str, PathLike, Path],
+        encoding: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> None:
+    """
+    Validates that the file can be decoded using the encoding, while only
+    keeping a single chunk in memory
+
+    :raises UnicodeDecodeError: If the file is not valid in the encoding
+    :raises LookupError: If the encoding does not exist
+    :raises OSError: If the file can not be read
+    """
+    for _ in _read_chunks(path, encoding, chunk_size):
+        ...
+
+
+def _code_points(text: str) -> Sequence[int]:
+    """
+    Returns a compact sequence of the code points of the text, which is
+    indexed like the list created by antlr4
+    """
+    try:
+        return text.encode("latin-1")
+    except UnicodeEncodeError:
+        return memoryview(text.encode("utf-32-le")).cast("I")
+
+
+class ParaCLISourceStream(antlr4.InputStream):
+    """
+    InputStream of the antlr4 lexer, which stores the code points of the
+    text in a compact buffer instead of a list of integers
+    """
+    __slots__ = ("fileName",)
+
+    def __init__(
+            self,
+            data: str,
+            name: str = "<empty>",
+            file_name: Optional[str] = None
+    ):
+        """
+        :param data: The text that should be lexed
+        :param name: The name of the stream shown in diagnostics
+        :param file_name: The path of the file the text was read from
+        """
+        self.fileName = file_name
+        super().__init__(data)
+        self.name = name
+
+    def _loadString(self):
+        self._index = 0
+        self.data = _code_points(self.strdata)
+        self._size = len(self.strdata)
+
+    @classmethod
+    def from_file(
+            cls,
+            path: Union[str, PathLike, Path],
+            encoding: str,
+            chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> ParaCLISourceStream:
+        """
+        Reads the file in chunks, decodes them incrementally and removes the
+        comments, without ever keeping a full copy of the original text.
+
+        :raises UnicodeDecodeError: If the file is not valid in the encoding
+        :raises OSError: If the file can not be read
+        """
+        path = Path(path)
+        stripper = ParaCLICommentStripper()
+        parts = [
+            stripper.feed(chunk)
+            for chunk in _read_chunks(path, encoding, chunk_size)
+        ]
+        parts.append(stripper.close())
+        data = "".join(parts)
+        del parts
+        return cls(data, name=path.name, file_name=str(path))
@@ -1,29 +1,50 @@
 """ Graphical logging for the Para CLI """
+from __future__ import annotations
+
+import atexit
+import contextlib
+import copy
+import gzip
 import logging
 import os
 import platform
+import queue
 import re
 import shutil
-import sys
+import threading
+import time
 import traceback
 from logging import StreamHandler
+from logging.handlers import QueueHandler, BaseRotatingHandler
 from pathlib import Path
 from types import TracebackType
-from typing import Optional, Callable, Tuple, Type, Union, Literal
+from typing import (Optional, Callable, Tuple, Type, Union, Literal, List,
+                    Dict, Iterator, TYPE_CHECKING)
+
+from .profiling import cli_traced
 
-from paralang_base import const
-from rich.console import Console
-from rich.theme import Theme
+if TYPE_CHECKING:
+    from rich.console import Console
+    from .console import ParaCLIPlainConsole
 
 __all__ = [
     "cli_set_avoid_print_banner_overwrite",
-    "cli_custom_theme",
     "ParaCLIStreamHandler",
     "ParaCLIFileHandler",
     "ParaCLIFormatter",
+    "ParaCLICollectHandler",
+    "ParaCLIQueueHandler",
+    "ParaCLIQueueListener",
+    "cli_set_queued_logging",
+    "cli_enable_queued_logging",
+    "cli_flush_logging",
+    "cli_stop_queued_logging",
+    "cli_capture_compiler_logs",
     "cli_output_console",
     "cli_init_rich_console",
     "cli_get_rich_console",
+    "cli_init_logging",
+    "cli_get_logger",
     "cli_log_traceback",
     "cli_ansi_col",
     "cli_print_para_banner",
@@ -36,21 +57,44 @@ __all__ = [
     "logger",
     "OVERWRITE_AVOID_PRINT_BANNER",
     "CLICK_FORMAT_IGNORE_REGEX",
+    "PARAC_LOGGER_NAME",
+    "BASE_LOGGER_NAME",
 ]
 
 CLICK_FORMAT_IGNORE_REGEX: str = \
     f"{re.escape('[')}[^{re.escape('[')}{re.escape(']')}]*?{re.escape(']')}"
+# Name of the logger used for the CLI output, which is also used by the
+# compiler after calling 'ParaCompiler.init_cli_logging()'
+PARAC_LOGGER_NAME: str = "parac"
+# Name of the logger of the compiler module, which receives all diagnostics
+BASE_LOGGER_NAME: str = "paralang_base"
 # If this flag is set to True no banners will be printed
 # and instead only newlines
 OVERWRITE_AVOID_PRINT_BANNER: bool = False
 cli_output_console: Optional[Console] = None
-cli_custom_theme = Theme({
+# If set to True 'cli_init_logging' will enable the queued logging mode
+QUEUED_LOGGING: bool = False
+# Listener of the queued logging mode, if it is enabled
+_queue_listener: Optional[ParaCLIQueueListener] = None
+# Styles of the rich theme 'cli_custom_theme', which is only created once it
+# is accessed, since the plain console does not require rich
+_CUSTOM_THEME_STYLES: Dict[str, str] = {
     "info": "white",
     "warning": "bright_yellow",
     "error": "bold red",
     "critical": "bold bright_red",
     "repr.number": "bold bright_cyan"
-})
+}
+
+
+def __getattr__(name: str):
+    if name == "cli_custom_theme":
+        from rich.theme import Theme
+
+        global cli_custom_theme
+        cli_custom_theme = Theme(_CUSTOM_THEME_STYLES)
+        return cli_custom_theme
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def cli_set_avoid_print_banner_overwrite(value: bool):
@@ -64,24 +108,8 @@ def cli_set_avoid_print_banner_overwrite(value: bool):
 
 def get_terminal_size() -> Optional[int]:
     """ Gets the terminal size """
-    width: Optional[int] = None
-    if "PYCHARM_HOSTED" in os.environ:
-        width = 150
-    elif sys.platform in ['cygwin', 'win32']:  # pragma: no cover
-        width, _ = shutil.get_terminal_size()
-    else:
-        try:
-            width, _ = os.get_terminal_size(sys.stdin.fileno())
-        except (AttributeError, ValueError, OSError):
-            try:
-                width, _ = os.get_terminal_size(sys.stdout.fileno())
-            except (AttributeError, ValueError, OSError):
-                pass
-
-    if width is None or width < 120:
-        return 120
-    else:
-        return width
+    from .console import cli_get_terminal_capabilities
+    return cli_get_terminal_capabilities().width
 
 
 def _get_color_system() -> Union[Literal["windows", "auto"], str]:
@@ -89,17 +117,31 @@ def _get_color_system() -> Union[Literal["windows", "auto"], str]:
 
 
 def cli_init_rich_console() -> None:
-    """ Initialises the rich console used for special console formatting """
+    """
+    Initialises the rich console used for special console formatting. In CI
+    environments and if the output is not a terminal, a plain console is
+    used instead, which does not require rich.
+    """
+    from .console import (cli_get_terminal_capabilities, cli_use_rich_console,
+                          ParaCLIPlainConsole)
 
     global cli_output_console
+    caps = cli_get_terminal_capabilities()
+    if not cli_use_rich_console():
+        cli_output_console = ParaCLIPlainConsole(width=caps.width)
+        return
+
+    from rich.console import Console
+    from . import logging as cli_logging
+
     cli_output_console = Console(
-        width=get_terminal_size(),
-        color_system=_get_color_system(),
-        theme=cli_custom_theme
+        width=caps.width,
+        color_system=_get_color_system() if caps.color else None,
+        theme=cli_logging.cli_custom_theme
     )
 
 
-def cli_get_rich_console() -> Union[Console, None]:
+def cli_get_rich_console() -> Union[Console, ParaCLIPlainConsole, None]:
     """
     Returns the output console which can be undefined if not initialised.
     This function is used instead of direct variable accessing to avoid the
@@ -125,6 +167,13 @@ class ParaCLIStreamHandler(StreamHandler):
         """ Fetches the Console if it is initialised """
         return cli_get_rich_console()
 
+    def count(self, record: logging.LogRecord) -> None:
+        """ Counts the record if it is a warning or an error """
+        if record.levelno in (logging.CRITICAL, logging.ERROR):
+            self.errors += 1
+        elif record.levelno == logging.WARNING:
+            self.warnings += 1
+
     def emit(self, record: logging.LogRecord):
         """
         Emit a record using rich and the set c-implementation
@@ -137,11 +186,7 @@ class ParaCLIStreamHandler(StreamHandler):
         output to the stream.
         """
         try:
-            if record.levelno in (logging.CRITICAL, logging.ERROR):
-                self.errors += 1
-            elif record.levelno == logging.WARNING:
-                self.warnings += 1
-
+            self.count(record)
             msg = self.format(record)
             # Writing with the rich print method which implements
             # its own stream-handler (console out handler)
@@ -151,13 +196,39 @@ class ParaCLIStreamHandler(StreamHandler):
         except Exception:
             self.handleError(record)
 
+    def emit_batch(self, records: List[logging.LogRecord]):
+        """
+        Renders multiple records using a single print call. The records are
+        not counted, since the queued logging mode counts them when they are
+        enqueued.
+        """
+        msgs = []
+        for record in records:
+            try:
+                msgs.append(self.format(record))
+            except RecursionError:
+                raise
+            except Exception:
+                self.handleError(record)
+        if msgs:
+            self.console.print(
+                "\n".join(msgs), highlight=False, justify="left"
+            )
+
 
 logger = logging.getLogger(__name__)
 
 
-class ParaCLIFileHandler(logging.FileHandler):
+class ParaCLIFileHandler(BaseRotatingHandler):
     """
-    Default FileHandler for the logging file handling in the Para compiler
+    Default FileHandler for the logging file handling in the Para compiler.
+
+    Records are written without modifying them, so other handlers receive
+    the original message. The file can optionally be rotated once it reached
+    a size or after an interval. If not passed, the rotation settings are
+    read from the environment variables 'PARA_LOG_MAX_SIZE',
+    'PARA_LOG_ROTATE_INTERVAL', 'PARA_LOG_BACKUP_COUNT' and
+    'PARA_LOG_COMPRESS'.
     """
 
     def __init__(
@@ -165,12 +236,41 @@ class ParaCLIFileHandler(logging.FileHandler):
             filename: Union[str, os.PathLike, Path] = None,
             encoding: str = 'utf-8',
             mode: str = 'w',
+            max_size: Optional[int] = None,
+            rotate_interval: Optional[float] = None,
+            backup_count: Optional[int] = None,
+            compress: Optional[bool] = None,
             *args,
             **kwargs
     ):
+        """
+        :param filename: The path of the log file. Defaults to the default
+         log path of the compiler
+        :param encoding: The encoding of the log file
+        :param mode: The mode the log file is opened with
+        :param max_size: Size in bytes after which the file is rotated. If 0
+         the file is never rotated based on its size
+        :param rotate_interval: Interval in seconds after which the file is
+         rotated. If 0 the file is never rotated based on time
+        :param backup_count: The amount of rotated files that are kept
+        :param compress: If set to True rotated files are compressed using
+         gzip
+        """
         if filename is None:
+            from paralang_base import const
             filename = str(const.DEFAULT_LOG_PATH)
 
+        env = os.environ
+        self.max_size = int(env.get("PARA_LOG_MAX_SIZE", 0)) \
+            if max_size is None else max_size
+        self.rotate_interval = float(env.get("PARA_LOG_ROTATE_INTERVAL", 0)) \
+            if rotate_interval is None else rotate_interval
+        self.backup_count = int(env.get("PARA_LOG_BACKUP_COUNT", 5)) \
+            if backup_count is None else backup_count
+        self.compress = env.get("PARA_LOG_COMPRESS", "0").lower() in (
+            "1", "true", "yes"
+        ) if compress is None else compress
+
         super().__init__(
             filename=filename,
             encoding=encoding,
@@ -178,16 +278,85 @@ class ParaCLIFileHandler(logging.FileHandler):
             *args,
             **kwargs
         )
-
-    def emit(self, record: logging.LogRecord):
-        """ Emits the record """
-        record.msg = re.sub(
-            CLICK_FORMAT_IGNORE_REGEX,
-            '',
-            record.msg,
-            flags=re.DOTALL
-        )
-        super().emit(record)
+        self._rollover_at = self._get_rollover_at()
+
+    def _get_rollover_at(self) -> float:
+        if self.rotate_interval > 0:
+            return time.time() + self.rotate_interval
+        return float("inf")
+
+    def rotation_filename(self, default_name: str) -> str:
+        """ Returns the name of a rotated file """
+        if self.compress:
+            return f"{default_name}.gz"
+        return default_name
+
+    def rotate(self, source: str, dest: str) -> None:
+        """ Moves the source to the rotated file, compressing it if set """
+        if not os.path.exists(source):
+            return
+        elif self.compress:
+            with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(source)
+        else:
+            os.replace(source, dest)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """
+        Returns whether the file should be rotated before writing the record.
+        The size is checked before writing, so a file may exceed the maximum
+        size by a single record
+        """
+        if record.created >= self._rollover_at:
+            return True
+        elif self.max_size > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_size
+        return False
+
+    def doRollover(self) -> None:
+        """ Rotates the file and opens a new one """
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = self.rotation_filename(f"{self.baseFilename}.{i}")
+                if os.path.exists(src):
+                    os.replace(src, self.rotation_filename(
+                        f"{self.baseFilename}.{i + 1}"
+                    ))
+            self.rotate(
+                self.baseFilename,
+                self.rotation_filename(f"{self.baseFilename}.1")
+            )
+        elif os.path.exists(self.baseFilename):
+            os.remove(self.baseFilename)
+
+        self.stream = self._open()
+        self._rollover_at = self._get_rollover_at()
+
+    def emit_batch(self, records: List[logging.LogRecord]):
+        """
+        Writes multiple records and flushes the file only once afterwards
+        """
+        with self.lock:
+            for record in records:
+                try:
+                    if self.shouldRollover(record):
+                        self.doRollover()
+                    elif self.stream is None:
+                        self.stream = self._open()
+                    self.stream.write(self.format(record) + self.terminator)
+                except RecursionError:
+                    raise
+                except Exception:
+                    self.handleError(record)
+            if self.stream is not None:
+                self.flush()
 
 
 class ParaCLIFormatter(logging.Formatter):
@@ -239,21 +408,339 @@ class ParaCLIFormatter(logging.Formatter):
         self.file_mng = file_mng
         super().__init__(fmt=fmt, *args, **kwargs)
 
+        # The styles are created once per level and never modified, so the
+        # formatter can be shared across threads and handlers. If the output
+        # goes into a file it will not use any formatting
+        self._default_style = (self._style, self._style.usesTime())
+        self._level_styles: Dict[int, Tuple[logging.PercentStyle, bool]] = {}
+        if not file_mng:
+            for level, level_fmt in self.level_formatting.items():
+                style = logging.PercentStyle(level_fmt)
+                self._level_styles[level] = (style, style.usesTime())
+        # (second, datefmt, formatted time) of the last formatted record.
+        # Replaced as a whole, so concurrent readers always see a consistent
+        # entry
+        self._asctime_cache: Tuple[int, Optional[str], str] = (-1, None, "")
+
+    def formatTime(
+            self,
+            record: logging.LogRecord,
+            datefmt: Optional[str] = None
+    ) -> str:
+        """
+        Formats the time of the record. The formatted time is cached per
+        second, since most records are logged in the same second as the
+        previous one
+        """
+        second = int(record.created)
+        cached_second, cached_datefmt, asctime = self._asctime_cache
+        if cached_second != second or cached_datefmt != datefmt:
+            asctime = time.strftime(
+                datefmt or self.default_time_format, self.converter(second)
+            )
+            self._asctime_cache = (second, datefmt, asctime)
+
+        if datefmt:
+            return asctime
+        return self.default_msec_format % (asctime, record.msecs)
+
     def format(self, record: logging.LogRecord):
         """
         Class specific formatter function to add colouring
         and Para specific formatting
         """
-        format_orig = getattr(self._style, '_fmt')
+        style, uses_time = self._level_styles.get(
+            record.levelno, self._default_style
+        )
 
-        # If the output goes into a file it will not use any formatting
-        if not self.file_mng:
-            self._style._fmt = self.level_formatting[record.levelno]
+        record.message = record.getMessage()
+        if uses_time:
+            record.asctime = self.formatTime(record, self.datefmt)
+        result = style.format(record)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            if result[-1:] != "\n":
+                result += "\n"
+            result += record.exc_text
+        if record.stack_info:
+            if result[-1:] != "\n":
+                result += "\n"
+            result += self.formatStack(record.stack_info)
+        return result
 
-        result = logging.Formatter.format(self, record)
-        self._style._fmt = format_orig
 
-        return result
+class ParaCLICollectHandler(logging.Handler):
+    """
+    Logging Handler collecting the level and message of every record, so they
+    can be replayed later or sent to another process
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.diagnostics: List[Tuple[int, str]] = []
+        super().__init__(*args, **kwargs)
+
+    def emit(self, record: logging.LogRecord):
+        """ Stores the level and message of the record """
+        self.diagnostics.append((record.levelno, record.getMessage()))
+
+
+@contextlib.contextmanager
+def cli_capture_compiler_logs(
+        handler: logging.Handler,
+        level: int = logging.INFO
+) -> Iterator[logging.Logger]:
+    """
+    Attaches the handler to the logger of the compiler module for the
+    duration of the context and yields the logger. The previous level of the
+    logger is restored afterwards.
+
+    :param handler: The handler that should receive the compiler logs
+    :param level: The level the logger should use inside the context
+    """
+    base_logger = logging.getLogger(BASE_LOGGER_NAME)
+    prev_level = base_logger.level
+    base_logger.setLevel(level)
+    base_logger.addHandler(handler)
+    try:
+        yield base_logger
+    finally:
+        base_logger.removeHandler(handler)
+        base_logger.setLevel(prev_level)
+
+
+class ParaCLIQueueHandler(QueueHandler):
+    """
+    Logging Handler passing the records to a queue, which is processed by a
+    ParaCLIQueueListener on a background thread. Warnings and errors are
+    counted right away on the passed stream handlers, so the counters are
+    always accurate, even if the records were not rendered yet.
+    """
+
+    def __init__(
+            self,
+            record_queue: queue.Queue,
+            stream_handlers: List[ParaCLIStreamHandler]
+    ):
+        self._stream_handlers = stream_handlers
+        super().__init__(record_queue)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Returns a copy of the record. Unlike QueueHandler.prepare() the
+        message is not merged, since the queue is never pickled, so the
+        message is only formatted on the thread of the listener
+        """
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord):
+        """ Counts and enqueues the record """
+        for handler in self._stream_handlers:
+            if record.levelno >= handler.level:
+                handler.count(record)
+        super().enqueue(record)
+
+
+class ParaCLIQueueListener:
+    """
+    Listener rendering the records of a queue on a background thread. All
+    records available at once are processed as a batch, so the console is
+    only printed to and the log file is only flushed once per batch.
+    """
+    _STOP = object()
+
+    def __init__(
+            self,
+            record_queue: queue.Queue,
+            handlers: List[logging.Handler],
+            batch_size: int = 256
+    ):
+        """
+        :param record_queue: The queue the records are read from
+        :param handlers: The handlers the records are passed to
+        :param batch_size: The maximum amount of records in a batch
+        """
+        self.queue = record_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """ Starts the background thread """
+        self._thread = threading.Thread(
+            target=self._monitor, name="ParaCLIQueueListener", daemon=True
+        )
+        self._thread.start()
+
+    def _handle_batch(self, records: List[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            batch = [r for r in records if r.levelno >= handler.level]
+            if not batch:
+                continue
+            elif hasattr(handler, "emit_batch"):
+                handler.emit_batch(batch)
+            else:
+                for record in batch:
+                    handler.handle(record)
+
+    def _monitor(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [r for r in batch if r is not self._STOP]
+            stop = len(records) != len(batch)
+            try:
+                self._handle_batch(records)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def flush(self) -> None:
+        """ Blocks until all enqueued records were processed """
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.join()
+
+    def stop(self) -> None:
+        """ Processes the remaining records and stops the thread """
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+        self._thread = None
+
+
+def cli_set_queued_logging(value: bool) -> None:
+    """
+    Sets whether 'cli_init_logging()' should enable the queued logging mode
+    """
+    global QUEUED_LOGGING
+    QUEUED_LOGGING = value
+
+
+def cli_enable_queued_logging(
+        log: Optional[logging.Logger] = None
+) -> ParaCLIQueueListener:
+    """
+    Enables the queued logging mode for the passed logger (by default the
+    CLI logger). The handlers of the logger are moved to a listener running
+    on a background thread, while the logger itself only enqueues the
+    records. If the mode is already enabled, the active listener is
+    returned.
+
+    The remaining records are processed on exit, or when calling
+    'cli_flush_logging()' or 'cli_stop_queued_logging()'.
+    """
+    global _queue_listener
+
+    log = log or cli_get_logger()
+    handlers = [h for h in log.handlers if not isinstance(h, QueueHandler)]
+    if _queue_listener is not None:
+        if not handlers:
+            return _queue_listener
+        # Handlers were added after the mode was enabled, so the listener
+        # has to be restarted including them
+        cli_stop_queued_logging(log)
+        handlers = list(log.handlers)
+
+    record_queue = queue.Queue()
+    for handler in handlers:
+        log.removeHandler(handler)
+    log.addHandler(ParaCLIQueueHandler(record_queue, [
+        h for h in handlers if isinstance(h, ParaCLIStreamHandler)
+    ]))
+
+    _queue_listener = ParaCLIQueueListener(record_queue, handlers)
+    _queue_listener.start()
+    return _queue_listener
+
+
+def cli_flush_logging() -> None:
+    """
+    Blocks until all records of the queued logging mode were written. Does
+    nothing if the mode is not enabled.
+    """
+    if _queue_listener is not None:
+        _queue_listener.flush()
+
+
+def cli_stop_queued_logging(log: Optional[logging.Logger] = None) -> None:
+    """
+    Stops the queued logging mode and moves the handlers back to the logger
+    """
+    global _queue_listener
+    if _queue_listener is None:
+        return
+
+    listener, _queue_listener = _queue_listener, None
+    listener.stop()
+
+    log = log or cli_get_logger()
+    for handler in list(log.handlers):
+        if isinstance(handler, ParaCLIQueueHandler):
+            log.removeHandler(handler)
+    for handler in listener.handlers:
+        log.addHandler(handler)
+
+
+atexit.register(cli_flush_logging)
+
+
+def cli_get_logger() -> logging.Logger:
+    """ Returns the logger used for the CLI output """
+    return logging.getLogger(PARAC_LOGGER_NAME)
+
+
+def cli_init_logging(
+        log_path: Union[str, os.PathLike, Path] = None,
+        level: int = logging.INFO,
+        print_banner: bool = True,
+        banner_name: str = "Compiler",
+        additional_newline: bool = True
+) -> logging.Logger:
+    """
+    Initialises the CLI logger and returns it. This is the equivalent of
+    'ParaCompiler.init_cli_logging()' for processes, which do not need the
+    compiler itself, e.g. clients of 'para server'.
+
+    :param log_path: Path where the log file should be placed. If None
+     logging to files will be ignored
+    :param level: Level the logger should be initialised with.
+     Defaults to INFO
+    :param print_banner: If set to True the logging banner will be printed
+    :param banner_name: The name used for the logging banner
+    :param additional_newline: If set to True an additional newline will be
+     added before the logging banner
+    :returns: The CLI logger. If QUEUED_LOGGING is set the queued logging
+     mode is enabled for it
+    """
+    if print_banner:
+        cli_print_log_banner(banner_name, additional_newline)
+
+    cli_stop_queued_logging()
+    cli_logger = cli_get_logger()
+    cli_logger.setLevel(level)
+    for handler in list(cli_logger.handlers):
+        if isinstance(handler, (ParaCLIStreamHandler, ParaCLIFileHandler)):
+            cli_logger.removeHandler(handler)
+
+    stream_handler = ParaCLIStreamHandler()
+    stream_handler.setFormatter(ParaCLIFormatter(datefmt="%H:%M:%S"))
+    cli_logger.addHandler(stream_handler)
+
+    if isinstance(log_path, (str, Path)) and str(log_path).lower() != 'none':
+        file_handler = ParaCLIFileHandler(filename=log_path)
+        file_handler.setFormatter(ParaCLIFormatter(file_mng=True))
+        cli_logger.addHandler(file_handler)
+
+    if QUEUED_LOGGING:
+        cli_enable_queued_logging(cli_logger)
+    return cli_logger
 
 
 def cli_log_traceback(
@@ -346,6 +833,7 @@ class TerminalANSIColor:
 cli_ansi_col = TerminalANSIColor()
 
 
+@cli_traced
 def cli_print_para_banner() -> None:
     """
     Prints the banner for the Para Compiler
@@ -374,6 +862,7 @@ def cli_print_para_banner() -> None:
     cli_get_rich_console().rule(style="bright_white rule.line")
 
 
+@cli_traced
 def cli_print_paraproj_banner() -> None:
     """
     Prints the banner for the Para Project Configuration
@@ -403,6 +892,7 @@ def cli_print_paraproj_banner() -> None:
     cli_get_rich_console().rule(style="bright_white rule.line")
 
 
+@cli_traced
 def cli_print_abort_banner(process: str) -> None:
     """
     Prints a simple colored Exception banner showing it crashed / was aborted
@@ -424,6 +914,7 @@ def cli_print_abort_banner(process: str) -> None:
     )
 
 
+@cli_traced
 def cli_print_result_banner(
         name: str = "Compilation", success: bool = True
 ) -> None:
@@ -453,6 +944,7 @@ def cli_print_result_banner(
     cli_get_rich_console().print("\n", end="")
 
 
+@cli_traced
 def cli_print_log_banner(name: str = "Compiler", newline: bool = True) -> None:
     """
     Prints a simple colored banner screen showing the logs are active and
@@ -0,0 +1,159 @@
+# coding=utf-8
+"""
+Machine-readable output of the CLI. If a structured format is selected using
+'para --format', commands emit their diagnostics, timings and summaries as
+JSON records onto stdout, instead of rendering them using rich.
+
+Every record is an object with the key 'type'. Using 'ndjson' every record is
+written as a single line once it is emitted, while 'json' writes a single
+array containing all records once the command finished.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import time
+from typing import Optional, List, Dict, Any, TextIO, Tuple, Literal
+
+__all__ = [
+    "OUTPUT_FORMATS",
+    "StructuredOutput",
+    "cli_set_output_format",
+    "cli_get_structured_output",
+]
+
+# Formats that can be selected using 'para --format'
+OUTPUT_FORMATS: Tuple[str, ...] = ("text", "json", "ndjson")
+
+_structured_output: Optional[StructuredOutput] = None
+
+
+class _RecordLogHandler(logging.Handler):
+    """ Logging Handler emitting every record as a 'log' record """
+
+    def __init__(self, output: StructuredOutput):
+        self._output = output
+        super().__init__()
+
+    def emit(self, record: logging.LogRecord):
+        """ Emits the record without any formatting """
+        self._output.emit(
+            "log",
+            level=record.levelname,
+            levelno=record.levelno,
+            msg=record.getMessage()
+        )
+
+
+class StructuredOutput:
+    """ Writer emitting JSON records onto a stream """
+
+    def __init__(
+            self,
+            output_format: Literal["json", "ndjson"],
+            stream: Optional[TextIO] = None
+    ):
+        """
+        :param output_format: The format of the output
+        :param stream: The stream the records are written to. If None stdout
+         is used
+        """
+        self._format = output_format
+        self._stream = stream
+        self._records: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+
+    @property
+    def format(self) -> str:
+        """ The format of the output """
+        return self._format
+
+    @property
+    def stream(self) -> TextIO:
+        """ The stream the records are written to """
+        return self._stream or sys.stdout
+
+    def emit(self, record_type: str, **data: Any) -> None:
+        """ Emits a record of the passed type containing the data """
+        record = {"type": record_type, **data}
+        if self._format == "ndjson":
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+        else:
+            self._records.append(record)
+
+    def emit_diagnostics(
+            self,
+            file: str,
+            diagnostics: List[Tuple[int, str]]
+    ) -> None:
+        """ Emits a 'diagnostic' record for every passed diagnostic """
+        for level, msg in diagnostics:
+            self.emit(
+                "diagnostic",
+                file=file,
+                level=logging.getLevelName(level),
+                levelno=level,
+                msg=msg
+            )
+
+    def emit_summary(self, command: str, success: bool, **data: Any) -> None:
+        """
+        Emits the 'summary' record of the command, which includes the time
+        since the output was created
+        """
+        self.emit(
+            "summary",
+            command=command,
+            success=success,
+            **data,
+            duration=time.perf_counter() - self._start
+        )
+
+    def init_logging(self, level: int = logging.INFO) -> logging.Logger:
+        """
+        Initialises the CLI logger, so that its records are emitted as 'log'
+        records instead of being written onto the console, and returns it
+        """
+        from .logging import cli_get_logger
+
+        cli_logger = cli_get_logger()
+        cli_logger.setLevel(level)
+        for handler in list(cli_logger.handlers):
+            cli_logger.removeHandler(handler)
+        cli_logger.addHandler(_RecordLogHandler(self))
+        return cli_logger
+
+    def close(self) -> None:
+        """ Writes all collected records, if the format is 'json' """
+        if self._format == "json":
+            json.dump(self._records, self.stream, indent=2)
+            self.stream.write("\n")
+            self.stream.flush()
+            self._records = []
+
+
+def cli_set_output_format(
+        output_format: str,
+        stream: Optional[TextIO] = None
+) -> None:
+    """
+    Sets the output format of the CLI. Using 'text' the default rich output
+    is used.
+    """
+    global _structured_output
+    if output_format == "text":
+        _structured_output = None
+    elif output_format in OUTPUT_FORMATS:
+        _structured_output = StructuredOutput(output_format, stream)
+    else:
+        raise ValueError(f"Unknown output format '{output_format}'")
+
+
+def cli_get_structured_output() -> Optional[StructuredOutput]:
+    """
+    Returns the structured output or None if the default rich output should
+    be used
+    """
+    return _structured_output
@@ -0,0 +1,260 @@
+# coding=utf-8
+"""
+Profiling hooks of the CLI. 'para --profile' runs the command under cProfile
+and writes the statistics as a '.pstats' file, while 'para --trace-timings'
+records named spans around the stages of the command and writes them as
+Chrome trace-event JSON, which can be opened using 'chrome://tracing' or
+Perfetto.
+
+Spans are recorded using 'cli_trace_span()', which does nothing if tracing
+is not enabled.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+from os import PathLike
+from pathlib import Path
+from typing import (Optional, List, Dict, Any, Iterator, Iterable, Union,
+                    TypeVar, TYPE_CHECKING)
+
+if TYPE_CHECKING:
+    import cProfile
+
+__all__ = [
+    "ParaCLITracer",
+    "cli_start_tracing",
+    "cli_get_tracer",
+    "cli_trace_span",
+    "cli_traced",
+    "cli_trace_results",
+    "cli_start_profiling",
+    "cli_finish_profiling",
+    "cli_is_profiling",
+    "cli_get_peak_rss",
+]
+
+T = TypeVar("T")
+
+_tracer: Optional[ParaCLITracer] = None
+_trace_path: Optional[str] = None
+_profile: Optional[cProfile.Profile] = None
+_profile_path: Optional[str] = None
+
+
+class ParaCLITracer:
+    """ Recorder of spans, which are written as Chrome trace-events """
+
+    def __init__(self):
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # Timestamps are relative to the start of the tracer
+        self._start = time.perf_counter()
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """ The recorded trace-events """
+        return list(self._events)
+
+    def _timestamp(self, perf_counter: float) -> float:
+        """ Converts a perf_counter value into microseconds of the trace """
+        return round((perf_counter - self._start) * 1_000_000, 3)
+
+    def add_span(
+            self,
+            name: str,
+            start: float,
+            duration: float,
+            track: Optional[str] = None,
+            **args: Any
+    ) -> None:
+        """
+        Records a finished span
+
+        :param name: The name of the span
+        :param start: The start as a time.perf_counter() value
+        :param duration: The duration in seconds
+        :param track: The name of the track the span is shown on. Defaults to
+         the current thread
+        :param args: Additional information shown for the span
+        """
+        event = {
+            "name": name,
+            "cat": "para",
+            "ph": "X",
+            "ts": self._timestamp(start),
+            "dur": round(duration * 1_000_000, 3),
+            "pid": self._pid,
+            "tid": track or threading.current_thread().name,
+        }
+        if args:
+            event["args"] = {k: str(v) for k, v in args.items()}
+        with self._lock:
+            self._events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        """ Records the time spent inside the context as a span """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start, **args)
+
+    def write(self, path: Union[str, PathLike, Path]) -> None:
+        """ Writes the recorded spans as Chrome trace-event JSON """
+        import json
+
+        with self._lock:
+            events = list(self._events)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"traceEvents": events, "displayTimeUnit": "ms"}, file
+            )
+
+
+def cli_start_tracing(path: Union[str, PathLike, Path]) -> ParaCLITracer:
+    """
+    Enables the recording of spans, which are written to the passed path by
+    'cli_finish_profiling()'
+    """
+    global _tracer, _trace_path
+    _tracer = ParaCLITracer()
+    _trace_path = str(path)
+    return _tracer
+
+
+def cli_get_tracer() -> Optional[ParaCLITracer]:
+    """ Returns the active tracer or None if tracing is not enabled """
+    return _tracer
+
+
+def cli_trace_span(
+        name: str,
+        **args: Any
+) -> contextlib.AbstractContextManager:
+    """
+    Returns a context manager recording a span with the passed name, if
+    tracing is enabled
+    """
+    if _tracer is None:
+        return contextlib.nullcontext()
+    return _tracer.span(name, **args)
+
+
+def cli_traced(_func=None, *, name: Optional[str] = None):
+    """
+    Records every call of the function as a span, if tracing is enabled
+
+    :param name: The name of the span. Defaults to the name of the function
+    """
+
+    def _decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _tracer.span(span_name):
+                return func(*args, **kwargs)
+
+        return _wrapper
+
+    if _func is None:
+        return _decorator
+    else:
+        return _decorator(_func)
+
+
+def cli_trace_results(
+        results: Iterable[T],
+        name: str,
+        track: str
+) -> Iterator[T]:
+    """
+    Passes through the results of units processed by workers, like
+    BuildUnitResult or CUnitResult, and records a span ending now for every
+    result that was not skipped, if tracing is enabled.
+
+    :param results: The results, which need a 'duration' in seconds and
+     either a 'file' or a 'source'
+    :param name: The name of the spans
+    :param track: The name of the track the spans are shown on
+    """
+    for result in results:
+        if _tracer is not None and not getattr(result, "skipped", False):
+            _tracer.add_span(
+                name,
+                time.perf_counter() - result.duration,
+                result.duration,
+                track=track,
+                file=getattr(result, "file", None) or result.source
+            )
+        yield result
+
+
+def cli_start_profiling(path: Union[str, PathLike, Path]) -> None:
+    """
+    Starts profiling the current thread using cProfile. The statistics are
+    written to the passed path by 'cli_finish_profiling()'
+    """
+    import cProfile
+
+    global _profile, _profile_path
+    _profile = cProfile.Profile()
+    _profile_path = str(path)
+    _profile.enable()
+
+
+def cli_finish_profiling() -> None:
+    """
+    Stops profiling and tracing and writes their results. Does nothing if
+    neither was started
+    """
+    global _tracer, _trace_path, _profile, _profile_path
+    if _profile is not None:
+        _profile.disable()
+        _profile.dump_stats(_profile_path)
+        _profile = _profile_path = None
+
+    if _tracer is not None:
+        _tracer.write(_trace_path)
+        _tracer = _trace_path = None
+
+
+def cli_is_profiling() -> bool:
+    """
+    Returns True if the current process is profiled. cProfile only covers
+    the current process, so work that would be run by worker processes
+    should be run in-process instead while profiling
+    """
+    return _profile is not None
+
+
+def cli_get_peak_rss(children: bool = True) -> Optional[int]:
+    """
+    Returns the peak resident set size of the current process in bytes.
+
+    :param children: If set to True the peak of the terminated child
+     processes (e.g. the workers of a process pool) is used if it is higher
+    :returns: The peak in bytes or None if it can not be determined on this
+     platform
+    """
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if children:
+        usage = max(
+            usage, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        )
+    # macOS reports the size in bytes, while Linux reports it in KiB
+    return usage if sys.platform == "darwin" else usage * 1024
@@ -0,0 +1,332 @@
+# coding=utf-8
+"""
+Progress output of long running commands. Depending on the selected mode the
+progress is rendered as a live dashboard using rich ('rich'), as periodic
+status lines ('plain') or not at all ('none').
+
+The dashboard is only redrawn when the progress changed and never more often
+than the refresh interval, which is derived from the terminal. If the output
+is not a terminal, no live output is rendered at all.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+from os import PathLike
+from pathlib import Path
+from typing import (Optional, Dict, Deque, Tuple, Union, Literal, Any,
+                    TYPE_CHECKING)
+
+from .logging import cli_get_rich_console as get_console
+
+if TYPE_CHECKING:
+    from rich.console import Console, RenderableType
+    from rich.live import Live
+    from rich.progress import Progress, TaskID
+
+__all__ = [
+    "PROGRESS_MODES",
+    "ParaCLIDashboard",
+    "cli_get_progress_mode",
+    "cli_get_refresh_interval",
+    "cli_count_lines",
+]
+
+# Modes that can be selected using '--progress'
+PROGRESS_MODES: Tuple[str, ...] = ("none", "plain", "rich")
+# Maximum refresh rate of the dashboard on a local terminal
+DEFAULT_REFRESH_PER_SECOND: float = 10
+# Maximum refresh rate of the dashboard in a remote session (SSH), where
+# every redraw has to be sent over the network
+REMOTE_REFRESH_PER_SECOND: float = 2
+# Interval in seconds between status lines of the 'plain' mode
+PLAIN_INTERVAL: float = 2.0
+# Maximum share of the time spent redrawing the dashboard. If rendering is
+# slower, the refresh interval is increased accordingly
+MAX_RENDER_SHARE: float = 0.05
+
+
+def cli_get_progress_mode(
+        mode: Optional[str] = None,
+        console: Optional[Console] = None
+) -> Literal["none", "plain", "rich"]:
+    """
+    Returns the progress mode to use. If no mode was passed, 'rich' is used
+    on terminals and 'plain' otherwise
+    """
+    if mode is not None:
+        return mode
+    return "rich" if cli_get_refresh_interval(console) > 0 else "plain"
+
+
+def cli_get_refresh_interval(console: Optional[Console] = None) -> float:
+    """
+    Returns the minimum interval in seconds between two redraws of a live
+    display, or 0 if the output is not a terminal (e.g. piped or redirected)
+    and nothing should be drawn live
+    """
+    console = console or get_console()
+    if console is None or not console.is_terminal or \
+            console.is_dumb_terminal:
+        return 0
+    elif any(k in os.environ for k in ("SSH_CONNECTION", "SSH_TTY")):
+        return 1 / REMOTE_REFRESH_PER_SECOND
+    return 1 / DEFAULT_REFRESH_PER_SECOND
+
+
+def cli_count_lines(file: Union[str, PathLike, Path]) -> int:
+    """ Counts the lines of the file or returns 0 if it can not be read """
+    lines = 0
+    try:
+        with open(file, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                lines += chunk.count(b"\n")
+    except OSError:
+        return 0
+    return lines
+
+
+class _Stage:
+    """ Progress of a single stage """
+
+    def __init__(self, name: str, total: Optional[int]):
+        self.name = name
+        self.total = total
+        self.completed = 0
+        self.failed = 0
+        self.lines = 0
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.task_id: Optional[TaskID] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    @property
+    def files_per_second(self) -> float:
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """ Estimated remaining seconds or None if it is unknown """
+        if self.total is None or self.completed == 0:
+            return None
+        return (self.total - self.completed) / self.files_per_second
+
+    @property
+    def count(self) -> str:
+        """ The completed and total files as text """
+        return f"{self.completed}/{'?' if self.total is None else self.total}"
+
+    def describe(self, eta: bool = True) -> str:
+        """ Returns the throughput and optionally the ETA as text """
+        remaining = self.eta if eta and self.end is None else None
+        return ", ".join(filter(None, [
+            f"{self.files_per_second:.1f} files/s",
+            f"{self.lines_per_second:,.0f} lines/s" if self.lines else None,
+            f"ETA {remaining:.1f}s" if remaining is not None else None
+        ]))
+
+
+class ParaCLIDashboard:
+    """
+    Progress dashboard of a command showing a task per stage (e.g. compiling
+    the Para units, compiling the C sources and linking), its throughput in
+    files and lines per second and ETA, as well as the most recently
+    processed files.
+
+    Used as a context manager, which starts and stops the live display.
+    """
+
+    def __init__(
+            self,
+            mode: Optional[str] = None,
+            console: Optional[Console] = None,
+            recent_files: int = 5
+    ):
+        """
+        :param mode: The progress mode. See cli_get_progress_mode()
+        :param console: The console the dashboard is rendered to. Defaults to
+         the CLI console
+        :param recent_files: The amount of processed files that are shown
+        """
+        self.console = console or get_console()
+        self.mode = cli_get_progress_mode(mode, self.console)
+        self._stages: Dict[str, _Stage] = {}
+        self._recent: Deque[Tuple[str, str, bool, float]] = deque(
+            maxlen=recent_files
+        )
+        self._base_interval = cli_get_refresh_interval(self.console)
+        self._interval = self._base_interval
+        self._last_refresh = 0.0
+        self._progress: Optional[Progress] = None
+        self._live: Optional[Live] = None
+        # Without a terminal the dashboard can not be redrawn, so it is
+        # never rendered live
+        if self.mode == "rich" and self._base_interval == 0:
+            self.mode = "plain"
+
+    def __enter__(self) -> ParaCLIDashboard:
+        if self.mode == "rich":
+            from rich.live import Live
+            from rich.progress import (Progress, BarColumn, TextColumn,
+                                       TimeRemainingColumn)
+
+            # The progress is only used to render the tasks, while redrawing
+            # is done by the live display once something changed
+            self._progress = Progress(
+                TextColumn("[bold bright_cyan]{task.description}"),
+                BarColumn(),
+                TextColumn("{task.fields[count]}"),
+                TextColumn("[white]{task.fields[rate]}"),
+                TimeRemainingColumn(),
+                console=self.console,
+                auto_refresh=False,
+                disable=True
+            )
+            self._live = Live(
+                self,
+                console=self.console,
+                auto_refresh=False,
+                transient=True
+            )
+            self._live.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+
+    def __rich__(self) -> RenderableType:
+        from rich.console import Group
+        from rich.table import Table
+
+        renderables = [self._progress.make_tasks_table(self._progress.tasks)]
+        if self._recent:
+            table = Table.grid(padding=(0, 1))
+            for stage, file, success, duration in self._recent:
+                state = "[green]OK" if success else "[red]Failed"
+                table.add_row(
+                    f"[white]{stage}", file, state,
+                    f"[white]{duration:.3f}s"
+                )
+            renderables.append(table)
+        return Group(*renderables)
+
+    def add_stage(self, name: str, total: Optional[int] = None) -> str:
+        """
+        Adds a stage with the passed amount of files. If the total is None
+        the progress of the stage is indeterminate.
+
+        :returns: The name of the stage
+        """
+        stage = _Stage(name, total)
+        self._stages[name] = stage
+        if self._progress is not None:
+            stage.task_id = self._progress.add_task(
+                name, total=total, count=stage.count, rate=""
+            )
+            self.refresh(force=True)
+        return name
+
+    def advance(
+            self,
+            stage: str,
+            file: Optional[str] = None,
+            lines: int = 0,
+            success: bool = True,
+            duration: float = 0.0
+    ) -> None:
+        """
+        Marks a file of the stage as processed
+
+        :param stage: The name of the stage
+        :param file: The processed file. If None it is not shown as a recent
+         file
+        :param lines: The amount of lines of the file
+        :param success: If set to False the file failed
+        :param duration: The time in seconds processing the file took
+        """
+        info = self._stages[stage]
+        info.completed += 1
+        info.failed += 0 if success else 1
+        info.lines += lines
+        if file is not None:
+            self._recent.append((stage, file, success, duration))
+        if info.completed == info.total:
+            info.end = time.perf_counter()
+        self.refresh(force=info.end is not None, stage=stage)
+
+    def finish_stage(self, stage: str) -> None:
+        """ Marks the stage as finished, even if files are remaining """
+        info = self._stages[stage]
+        if info.end is None:
+            info.end = time.perf_counter()
+            self.refresh(force=True, stage=stage)
+
+    def refresh(self, force: bool = False, stage: Optional[str] = None):
+        """
+        Redraws the dashboard, if the last redraw is at least the refresh
+        interval ago or force is set. In the 'plain' mode only a status line
+        for the passed stage is printed
+        """
+        if self.mode == "none":
+            return
+
+        now = time.perf_counter()
+        interval = self._interval if self.mode == "rich" else PLAIN_INTERVAL
+        if not force and now - self._last_refresh < interval:
+            return
+
+        self._last_refresh = now
+        if self.mode == "plain":
+            if stage is not None:
+                self._print_plain(self._stages[stage])
+            return
+        elif self._live is None:
+            return
+
+        for info in self._stages.values():
+            self._progress.update(
+                info.task_id,
+                completed=info.completed,
+                count=info.count,
+                rate=info.describe(eta=False)
+            )
+        self._live.refresh()
+
+        # Slow terminals (e.g. remote sessions) get fewer redraws, so that
+        # rendering does not compete with the actual work
+        render_time = time.perf_counter() - now
+        self._interval = max(
+            self._base_interval, render_time / MAX_RENDER_SHARE
+        )
+
+    def _print_plain(self, info: _Stage) -> None:
+        self.console.print(
+            f"{info.name}: {info.count} ({info.describe()})",
+            highlight=False,
+            markup=False
+        )
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """ The current progress of every stage """
+        return {
+            name: {
+                "total": info.total,
+                "completed": info.completed,
+                "failed": info.failed,
+                "lines": info.lines,
+                "files_per_second": info.files_per_second,
+                "lines_per_second": info.lines_per_second,
+                "eta": info.eta
+            } for name, info in self._stages.items()
+        }
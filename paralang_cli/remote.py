@@ -0,0 +1,622 @@
+# coding=utf-8
+"""
+Remote cache of the CLI, which shares syntax-check results and compiled
+units between machines, e.g. the agents of a CI fleet.
+
+Backends implement a simple content-addressed protocol, where every entry is
+identified by a namespace and a key, which is a sha256 hex-digest:
+
+- 'syntax-check': The diagnostics of a file, keyed by the syntax-check key
+- 'units': The outputs and diagnostics of a unit, keyed by its input hash
+- 'blobs': An output file, keyed by the digest of its content
+
+Using HTTP an entry is read using 'GET /<namespace>/<key>', which returns 404
+if it does not exist, and written using 'PUT /<namespace>/<key>'. The
+reference server 'RemoteCacheServer' stores the entries in a folder using
+'FileSystemBackend', which can also be used directly for caches on a shared
+filesystem.
+
+Lookups are batched, so a build waits for at most one round trip, while
+uploads are sent on a background thread and never block the compilation.
+Failures of the remote cache are logged and treated as misses.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from os import PathLike
+from pathlib import Path
+from typing import (Optional, Dict, List, Union, Iterable, Callable, Tuple,
+                    Deque, Set, TYPE_CHECKING)
+
+from .logging import cli_get_logger
+
+if TYPE_CHECKING:
+    from .store import ArtifactStore
+
+__all__ = [
+    "REMOTE_NAMESPACES",
+    "DEFAULT_REMOTE_TIMEOUT",
+    "RemoteCacheError",
+    "RemoteCacheBackend",
+    "FileSystemBackend",
+    "HTTPBackend",
+    "RemoteCache",
+    "RemoteCacheServer",
+    "cli_create_remote_backend",
+    "cli_get_remote_cache",
+    "cli_flush_remote_caches",
+    "cli_remote_fetch_units",
+    "cli_remote_upload_unit",
+]
+
+# Namespaces of the entries of the remote cache
+REMOTE_NAMESPACES: Tuple[str, ...] = ("syntax-check", "units", "blobs")
+
+# Timeout in seconds of a single request to a remote cache
+DEFAULT_REMOTE_TIMEOUT: float = 5.0
+
+# Maximum time in seconds pending uploads are waited for on exit. Can be
+# overwritten using the environment variable 'PARA_REMOTE_CACHE_FLUSH_TIMEOUT'
+DEFAULT_FLUSH_TIMEOUT: float = 30.0
+
+# Maximum amount of concurrent requests of a batched lookup
+_LOOKUP_CONNECTIONS: int = 8
+
+# Maximum size in bytes of an entry accepted by the reference server
+_MAX_ENTRY_SIZE: int = 512 * 1024 * 1024
+
+_KEY_REGEX = re.compile(r"^[0-9a-f]{64}$")
+
+_remote_caches: Dict[str, RemoteCache] = {}
+
+
+class RemoteCacheError(RuntimeError):
+    """ Exception raised if a request to the remote cache failed """
+
+
+def _validate(namespace: str, key: str) -> None:
+    if namespace not in REMOTE_NAMESPACES:
+        raise ValueError(f"Unknown namespace '{namespace}'")
+    elif not _KEY_REGEX.match(key):
+        raise ValueError(f"Invalid key '{key}'")
+
+
+class RemoteCacheBackend:
+    """ Base class of the storage backends of the remote cache """
+
+    @property
+    def url(self) -> str:
+        """ The location of the backend """
+        raise NotImplementedError()
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """
+        Returns the entry or None if it does not exist
+
+        :raises RemoteCacheError: If the backend can not be reached
+        """
+        raise NotImplementedError()
+
+    def get_many(
+            self,
+            namespace: str,
+            keys: List[str]
+    ) -> Dict[str, bytes]:
+        """
+        Returns the existing entries of the passed keys
+
+        :raises RemoteCacheError: If the backend can not be reached
+        """
+        entries = {}
+        for key in keys:
+            data = self.get(namespace, key)
+            if data is not None:
+                entries[key] = data
+        return entries
+
+    def put(self, namespace: str, key: str, data: bytes) -> None:
+        """
+        Stores the entry, unless it already exists
+
+        :raises RemoteCacheError: If the backend can not be reached
+        """
+        raise NotImplementedError()
+
+
+class FileSystemBackend(RemoteCacheBackend):
+    """
+    Backend storing the entries as files inside a folder, which may be on a
+    shared filesystem. Entries are written atomically, so concurrent writers
+    never expose partial entries.
+    """
+
+    def __init__(self, path: Union[str, PathLike, Path]):
+        """
+        :param path: The folder the entries are stored in
+        """
+        self._path = Path(path)
+
+    @property
+    def url(self) -> str:
+        return self._path.absolute().as_uri()
+
+    def _entry_path(self, namespace: str, key: str) -> Path:
+        _validate(namespace, key)
+        return self._path / namespace / key[:2] / key
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        try:
+            return self._entry_path(namespace, key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise RemoteCacheError(f"Failed to read entry '{key}': {e}")
+
+    def put(self, namespace: str, key: str, data: bytes) -> None:
+        path = self._entry_path(namespace, key)
+        if path.exists():
+            return
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    file.write(data)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+        except OSError as e:
+            raise RemoteCacheError(f"Failed to write entry '{key}': {e}")
+
+
+class HTTPBackend(RemoteCacheBackend):
+    """
+    Backend using the HTTP protocol of the remote cache. Batched lookups are
+    sent concurrently, so a batch takes about a single round trip.
+    """
+
+    def __init__(self, url: str, timeout: float = DEFAULT_REMOTE_TIMEOUT):
+        """
+        :param url: The base URL of the cache, e.g. 'http://cache:8080/para'
+        :param timeout: The timeout in seconds of a single request
+        """
+        self._url = url.rstrip("/")
+        self._timeout = timeout
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    def _request(
+            self,
+            method: str,
+            namespace: str,
+            key: str,
+            data: Optional[bytes] = None
+    ) -> Optional[bytes]:
+        import urllib.error
+        import urllib.request
+
+        _validate(namespace, key)
+        request = urllib.request.Request(
+            f"{self._url}/{namespace}/{key}",
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/octet-stream"}
+        )
+        try:
+            with urllib.request.urlopen(
+                    request, timeout=self._timeout
+            ) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404 and method == "GET":
+                return None
+            raise RemoteCacheError(
+                f"{method} {request.full_url} failed: {e.code} {e.reason}"
+            ) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise RemoteCacheError(
+                f"{method} {request.full_url} failed: {e}"
+            ) from e
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self._request("GET", namespace, key)
+
+    def get_many(
+            self,
+            namespace: str,
+            keys: List[str]
+    ) -> Dict[str, bytes]:
+        if len(keys) <= 1:
+            return super().get_many(namespace, keys)
+
+        workers = min(_LOOKUP_CONNECTIONS, len(keys))
+        with ThreadPoolExecutor(workers) as executor:
+            results = executor.map(
+                lambda k: self.get(namespace, k), keys
+            )
+            return {
+                key: data for key, data in zip(keys, results)
+                if data is not None
+            }
+
+    def put(self, namespace: str, key: str, data: bytes) -> None:
+        self._request("PUT", namespace, key, data)
+
+
+class RemoteCache:
+    """
+    Client of a remote cache backend, which batches lookups and sends
+    uploads on a background thread.
+
+    After the first failed request the remote cache is disabled for the rest
+    of the process, so an unreachable cache costs at most one timeout.
+    """
+
+    def __init__(self, backend: RemoteCacheBackend, upload: bool = True):
+        """
+        :param backend: The backend storing the entries
+        :param upload: If set to False the cache is only read from
+        """
+        self._backend = backend
+        self._upload = upload
+        self._available = True
+        self._uploaded: Set[Tuple[str, str]] = set()
+        self._queue: Deque[Tuple[str, str, Callable[[], Optional[bytes]]]] \
+            = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = 0
+        self._hits = self._misses = self._uploads = 0
+
+    @property
+    def backend(self) -> RemoteCacheBackend:
+        """ The backend storing the entries """
+        return self._backend
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """ The hits and misses of the lookups and the amount of uploads """
+        return {
+            "hits": self._hits, "misses": self._misses,
+            "uploads": self._uploads
+        }
+
+    @property
+    def available(self) -> bool:
+        """ Returns False if the cache was disabled after a failure """
+        return self._available
+
+    def _disable(self, error: Exception) -> None:
+        if self._available:
+            cli_get_logger().warning(
+                f"Disabled the remote cache '{self._backend.url}': {error}"
+            )
+        self._available = False
+
+    def lookup(self, namespace: str, keys: Iterable[str]) -> Dict[str, bytes]:
+        """
+        Looks up the passed keys using a single batch and returns the
+        entries that exist. Failures are treated as misses.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys or not self._available:
+            return {}
+
+        try:
+            entries = self._backend.get_many(namespace, keys)
+        except RemoteCacheError as e:
+            self._disable(e)
+            return {}
+        self._hits += len(entries)
+        self._misses += len(keys) - len(entries)
+        return entries
+
+    def upload(
+            self,
+            namespace: str,
+            key: str,
+            data: Union[bytes, Callable[[], Optional[bytes]]]
+    ) -> None:
+        """
+        Queues the entry for upload and returns immediately. Entries are
+        uploaded in the order they were queued, so an entry referring to
+        others should be queued last.
+
+        :param data: The content or a function returning it, which is called
+         on the upload thread. If it returns None the entry is skipped
+        """
+        if not self._upload or not self._available \
+                or (namespace, key) in self._uploaded:
+            return
+        self._uploaded.add((namespace, key))
+
+        with self._condition:
+            self._queue.append(
+                (namespace, key, data if callable(data) else lambda: data)
+            )
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run_uploads, name="para-remote-upload",
+                    daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+    def _run_uploads(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                namespace, key, data = self._queue.popleft()
+
+            try:
+                content = data() if self._available else None
+                if content is not None:
+                    self._backend.put(namespace, key, content)
+                    self._uploads += 1
+            except RemoteCacheError as e:
+                self._disable(e)
+            except Exception as e:
+                cli_get_logger().debug(f"Failed to upload '{key}': {e}")
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until all queued uploads were sent
+
+        :returns: False if the timeout expired before
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._pending == 0, timeout
+            )
+
+
+def cli_create_remote_backend(url: str) -> RemoteCacheBackend:
+    """
+    Creates the backend for the passed URL. 'http://' and 'https://' URLs
+    use the HTTP protocol, while 'file://' URLs and plain paths use a folder.
+    """
+    if url.startswith(("http://", "https://")):
+        return HTTPBackend(url)
+    elif url.startswith("file://"):
+        from urllib.parse import urlparse
+        from urllib.request import url2pathname
+        return FileSystemBackend(url2pathname(urlparse(url).path))
+    return FileSystemBackend(url)
+
+
+def cli_get_remote_cache(url: Optional[str] = None) -> Optional[RemoteCache]:
+    """
+    Returns the remote cache for the passed URL, or for the URL of the
+    environment variable 'PARA_REMOTE_CACHE' if None is passed. Caches are
+    created once per URL and process.
+
+    If 'PARA_REMOTE_CACHE_READ_ONLY' is set to '1' nothing is uploaded.
+
+    :returns: The remote cache or None if no URL is configured
+    """
+    url = url or os.environ.get("PARA_REMOTE_CACHE")
+    if not url or url.lower() == "none":
+        return None
+
+    if url not in _remote_caches:
+        upload = os.environ.get("PARA_REMOTE_CACHE_READ_ONLY") != "1"
+        _remote_caches[url] = RemoteCache(
+            cli_create_remote_backend(url), upload=upload
+        )
+    return _remote_caches[url]
+
+
+@atexit.register
+def cli_flush_remote_caches(timeout: Optional[float] = None) -> None:
+    """
+    Waits for the pending uploads of all remote caches. This is registered
+    to run on exit, so uploads queued at the end of a build are not lost.
+    """
+    if timeout is None:
+        timeout = float(os.environ.get(
+            "PARA_REMOTE_CACHE_FLUSH_TIMEOUT", DEFAULT_FLUSH_TIMEOUT
+        ))
+    for remote in _remote_caches.values():
+        if not remote.flush(timeout):
+            cli_get_logger().warning(
+                "Timed out waiting for the uploads to the remote cache "
+                f"'{remote.backend.url}'"
+            )
+
+
+def cli_remote_fetch_units(
+        remote: RemoteCache,
+        store: ArtifactStore,
+        keys: List[str]
+) -> int:
+    """
+    Fetches the units of the passed input hashes, which are missing in the
+    artifact store, and their outputs from the remote cache and adds them to
+    the store. The content of every blob is verified against its digest.
+
+    :returns: The amount of units that were added to the store
+    """
+    missing = [k for k in dict.fromkeys(keys) if store.load_unit(k) is None]
+    units = {}
+    for key, data in remote.lookup("units", missing).items():
+        try:
+            record = json.loads(data)
+            outputs = {
+                str(folder): {str(k): str(v) for k, v in files.items()}
+                for folder, files in record["outputs"].items()
+            }
+            diagnostics = [
+                (int(level), str(msg)) for level, msg in record["diagnostics"]
+            ]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue  # Corrupted entries are treated as a miss
+        units[key] = (outputs, diagnostics)
+
+    digests = {
+        digest for outputs, _ in units.values()
+        for files in outputs.values() for digest in files.values()
+        if store.blob_path(digest) is None
+    }
+    available = set()
+    for digest, data in remote.lookup("blobs", digests).items():
+        if hashlib.sha256(data).hexdigest() == digest:
+            store.add_bytes(data)
+            available.add(digest)
+
+    added = 0
+    for key, (outputs, diagnostics) in units.items():
+        if all(
+                d in available or store.blob_path(d) is not None
+                for files in outputs.values() for d in files.values()
+        ):
+            store.store_unit(key, outputs, diagnostics)
+            added += 1
+    return added
+
+
+def cli_remote_upload_unit(
+        remote: RemoteCache,
+        store: ArtifactStore,
+        key: str,
+        outputs: Dict[str, Dict[str, str]],
+        diagnostics: List[Tuple[int, str]]
+) -> None:
+    """
+    Queues the outputs of the unit and then the unit itself for upload. The
+    blobs are read on the upload thread.
+    """
+    for files in outputs.values():
+        for digest in files.values():
+            remote.upload(
+                "blobs", digest,
+                lambda d=digest: store.read_blob(d)
+            )
+    remote.upload("units", key, json.dumps({
+        "outputs": outputs, "diagnostics": diagnostics
+    }).encode("utf-8"))
+
+
+class _RemoteCacheRequestHandler(BaseHTTPRequestHandler):
+    """ Request handler of the reference server """
+    protocol_version = "HTTP/1.1"
+    server: RemoteCacheServer
+
+    def _parse_path(self) -> Optional[Tuple[str, str]]:
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] in REMOTE_NAMESPACES \
+                and _KEY_REGEX.match(parts[1]):
+            return parts[0], parts[1]
+        self._respond(400, b"Invalid entry path\n")
+        return None
+
+    def _respond(self, code: int, body: bytes = b"") -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        entry = self._parse_path()
+        if entry is not None:
+            data = self.server.backend.get(*entry)
+            if data is None:
+                self._respond(404, b"Not found\n")
+            else:
+                self._respond(200, data)
+
+    do_HEAD = do_GET
+
+    def do_PUT(self) -> None:
+        entry = self._parse_path()
+        if entry is None:
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            return self._respond(411, b"Content-Length required\n")
+        if not 0 <= length <= _MAX_ENTRY_SIZE:
+            return self._respond(413, b"Entry too large\n")
+
+        data = self.rfile.read(length)
+        namespace, key = entry
+        if namespace == "blobs" and hashlib.sha256(data).hexdigest() != key:
+            return self._respond(400, b"Digest mismatch\n")
+        try:
+            self.server.backend.put(namespace, key, data)
+        except RemoteCacheError as e:
+            return self._respond(500, f"{e}\n".encode("utf-8"))
+        self._respond(201)
+
+    def log_message(self, format: str, *args) -> None:
+        cli_get_logger().debug(
+            f"Remote cache: {self.address_string()} - {format % args}"
+        )
+
+
+class RemoteCacheServer(ThreadingHTTPServer):
+    """
+    Reference implementation of the HTTP protocol of the remote cache, which
+    stores the entries inside a folder. It is meant for tests and small
+    teams and has no authentication.
+    """
+    daemon_threads = True
+
+    def __init__(
+            self,
+            path: Union[str, PathLike, Path],
+            host: str = "127.0.0.1",
+            port: int = 0
+    ):
+        """
+        :param path: The folder the entries are stored in
+        :param host: The address the server listens on
+        :param port: The port the server listens on. If 0 a free port is used
+        """
+        self.backend = FileSystemBackend(path)
+        self._thread: Optional[threading.Thread] = None
+        super().__init__((host, port), _RemoteCacheRequestHandler)
+
+    @property
+    def url(self) -> str:
+        """ The base URL of the server """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> RemoteCacheServer:
+        """ Starts serving requests on a background thread """
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="para-remote-cache-server",
+            daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """ Stops the server started using 'start()' """
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
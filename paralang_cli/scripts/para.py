@@ -1,23 +1,33 @@
 """ The CLI 'para' command - CLI for the Para Compiler """
-from typing import NoReturn
+from __future__ import annotations
+
+from pathlib import Path
+from typing import NoReturn, Optional, Tuple, List, TYPE_CHECKING
+import os
 import time
-import asyncio
 import click
-import colorama
 import logging
 
-import paralang_base
-from paralang_base import __version__, __title__
-from paralang_base.exceptions import FailedToProcessError
-from paralang_base.compiler import CompileResult
-
-from ..__main__ import RUNTIME_COMPILER
-from ..logging import (cli_get_rich_console as get_console,
+from ..logging import (cli_get_rich_console as get_console, cli_init_logging,
                        cli_print_result_banner, cli_init_rich_console,
                        cli_print_para_banner, cli_create_prompt,
-                       cli_format_default)
+                       cli_format_default, cli_get_logger,
+                       cli_set_queued_logging)
+from ..console import (cli_init_colorama,
+                       cli_install_output_multiplexer)
+from ..profiling import (cli_start_tracing, cli_start_profiling,
+                         cli_finish_profiling, cli_trace_span,
+                         cli_trace_results, cli_get_peak_rss)
+from ..progress import PROGRESS_MODES
+from ..output import (OUTPUT_FORMATS, cli_set_output_format,
+                      cli_get_structured_output)
 from ..utils import (cli_run_output_dir_validation, cli_keep_open_callback,
-                     cli_abortable, cli_escape_ansi_args)
+                     cli_abortable, cli_escape_ansi_args,
+                     cli_get_base_version, cli_init_compiler_logging)
+
+if TYPE_CHECKING:
+    from ..build import BuildUnitResult
+    from ..remote import RemoteCache
 
 __all__ = [
     "cli_run_output_dir_validation",
@@ -25,8 +35,6 @@ __all__ = [
     "cli_run"
 ]
 
-colorama.init(autoreset=True)
-
 
 class ParaCLI:
     """ CLI for the Para Compiler """
@@ -35,31 +43,51 @@ class ParaCLI:
     @cli_abortable(reraise=True)
     @cli_keep_open_callback
     @cli_escape_ansi_args
-    def cli(ctx: click.Context, version, *args, **kwargs):
+    def cli(
+            ctx: click.Context,
+            version: bool,
+            output_format: str,
+            queued_logging: bool,
+            profile: Optional[str],
+            trace_timings: Optional[str],
+            *args,
+            **kwargs
+    ):
         """
         Main entry point of the compiler CLI. Either returns version or prints
         the init_banner of the Compiler
         """
+        # Profiling and tracing cover the rest of the invocation including
+        # the subcommand and end once the context is closed
+        if trace_timings is not None:
+            cli_start_tracing(trace_timings)
+        if profile is not None:
+            cli_start_profiling(profile)
+        if trace_timings is not None or profile is not None:
+            ctx.call_on_close(cli_finish_profiling)
+
         # If the console was not initialised yet, initialise it
         if get_console() is None:
             cli_init_rich_console()
 
+        cli_set_output_format(output_format)
+        cli_set_queued_logging(queued_logging)
         out = get_console()
         if version:
             out.print(
                 ' '.join([
-                    "Para Compiler", paralang_base.__version__
+                    "Para Compiler", cli_get_base_version()
                 ])
             )
             return
+        elif ctx.invoked_subcommand == "run" or output_format != "text":
+            # The output of the program or the structured output should not
+            # be preceded by the banner
+            return
         else:
             cli_print_para_banner()
             out.print('')
 
-            # Sleeping to prevent that subcommands sending to stderr
-            # causing the banner to be displayed at the end of the output
-            time.sleep(.100)
-
         if not ctx.invoked_subcommand:
             out.print(ctx.get_help())
 
@@ -68,72 +96,439 @@ class ParaCLI:
     @cli_keep_open_callback
     @cli_escape_ansi_args
     def para_compile(
-            directory: str,
+            paths: Tuple[str, ...],
+            file: Tuple[str, ...],
             encoding: str,
             log: str,
             overwrite_build: bool,
             overwrite_dist: bool,
             source: bool,
             executable: bool,
-            debug: bool
-    ) -> CompileResult:
+            jobs: Optional[int],
+            object_cache: bool,
+            debug: bool,
+            progress: Optional[str] = None,
+            artifact_store: bool = True,
+            remote_cache: Optional[str] = None,
+            server: bool = False
+    ) -> List[BuildUnitResult]:
         """
         CLI interface for the parac_compile command.
-        Will create a compilation-process and run it
+        Will compile every passed file as its own translation unit, where
+        independent units are compiled in parallel and units that did not
+        change since the last build are skipped or restored from the artifact
+        store. If server is set and a compile server is running, the units
+        will be compiled by the server.
+        """
+        from ..progress import ParaCLIDashboard, cli_count_lines
+        from ..build import (cli_run_build, cli_run_build_dir_validation,
+                             cli_log_build_unit_result)
+        from ..remote import cli_get_remote_cache
+        from ..store import ArtifactStore
+        from ..syntax_check import cli_collect_files
+
+        level = logging.DEBUG if debug else logging.INFO
+        client = None
+        if server:
+            from ..server import cli_connect_server
+            client = cli_connect_server()
+        structured = cli_get_structured_output()
+        if structured is not None:
+            cli_logger = structured.init_logging(level)
+        elif client is not None:
+            cli_logger = cli_init_logging(
+                log, level=level, banner_name="Compilation"
+            )
+        else:
+            cli_logger = cli_init_compiler_logging(
+                log, level=level, banner_name="Compilation"
+            ).logger
+
+        if not source:
+            cli_logger.warning(
+                "The option '--no-source' is deprecated and has no effect, "
+                "since the generated C sources are always kept for "
+                "incremental builds"
+            )
+
+        with cli_trace_span("cli_collect_files"):
+            files = cli_collect_files((*paths, *file) or ("main.para",))
+        if len(files) == 0:
+            cli_logger.warning("No files were found to compile")
+
+        build_path, dist_path = cli_run_build_dir_validation(
+            overwrite_build, overwrite_dist
+        )
+        cli_logger.debug(f"Using build folder '{build_path}'")
+
+        results = []
+        start = time.perf_counter()
+        if client is not None:
+            cli_logger.debug(
+                f"Using the compile server '{client.socket_path}'"
+            )
+            units = client.compile(
+                files, encoding, build_path, dist_path, jobs=jobs,
+                debug=debug, artifact_store=artifact_store,
+                remote_cache=remote_cache
+            )
+            remote = None
+        else:
+            remote = cli_get_remote_cache(remote_cache) if artifact_store \
+                else None
+            units = cli_run_build(
+                files, encoding, build_path, dist_path, jobs=jobs, debug=debug,
+                store=ArtifactStore() if artifact_store else None,
+                remote=remote
+            )
+        build = cli_trace_results(
+            units, "cli_compile_unit", track="Para units"
+        )
+        if structured is not None:
+            for result in build:
+                structured.emit_diagnostics(result.file, result.diagnostics)
+                structured.emit(
+                    "unit",
+                    file=result.file,
+                    success=result.success,
+                    skipped=result.skipped,
+                    restored=result.restored,
+                    warnings=result.warnings,
+                    errors=result.errors,
+                    duration=result.duration
+                )
+                results.append(result)
+        else:
+            with ParaCLIDashboard(progress) as dashboard:
+                stage = dashboard.add_stage("Para units", total=len(files))
+                for result in build:
+                    cli_log_build_unit_result(result)
+                    results.append(result)
+                    dashboard.advance(
+                        stage,
+                        result.file,
+                        lines=0 if result.skipped else cli_count_lines(
+                            result.file
+                        ),
+                        success=result.success,
+                        duration=result.duration
+                    )
+
+        compiled = sum(1 for r in results if not r.skipped)
+        failed = sum(1 for r in results if not r.success)
+        if executable and failed == 0 and len(results) > 0:
+            failed += ParaCLI._build_executable(
+                build_path, dist_path, files, encoding, jobs, object_cache,
+                debug, progress
+            )
+        if client is None:
+            ParaCLI._log_remote_stats(remote)
+            ParaCLI._log_peak_rss()
+
+        if structured is not None:
+            structured.emit_summary(
+                "compile",
+                success=failed == 0,
+                units=len(results),
+                compiled=compiled,
+                up_to_date=len(results) - compiled,
+                failed=failed,
+                warnings=sum(r.warnings for r in results),
+                errors=sum(r.errors for r in results)
+            )
+            structured.close()
+            if failed > 0:
+                exit(1)
+            return results
+
+        cli_print_result_banner("Compilation", success=failed == 0)
+        get_console().print(
+            f"[bold bright_cyan]Compiled {compiled} of {len(results)} "
+            f"{'unit' if len(results) == 1 else 'units'} "
+            f"({len(results) - compiled} up-to-date, {failed} failed) "
+            f"[/bold bright_cyan][white]"
+            f"({time.perf_counter() - start:.3f}s)[/white]",
+            highlight=False
+        )
+        if failed > 0:
+            exit(1)
+        return results
+
+    @staticmethod
+    def _log_remote_stats(remote: Optional[RemoteCache]) -> None:
+        """ Logs the statistics of the remote cache as a debug message """
+        if remote is not None:
+            stats = remote.stats
+            cli_get_logger().debug(
+                f"Remote cache '{remote.backend.url}': {stats['hits']} hits, "
+                f"{stats['misses']} misses, {stats['uploads']} uploads"
+            )
+
+    @staticmethod
+    def _log_peak_rss() -> None:
+        """ Logs the peak memory usage as a debug message if available """
+        peak = cli_get_peak_rss()
+        if peak is not None:
+            cli_get_logger().debug(
+                f"Peak memory usage (RSS): {peak / 1024 ** 2:.1f} MiB"
+            )
+
+    @staticmethod
+    def _build_executable(
+            build_path: str,
+            dist_path: str,
+            files: List[str],
+            encoding: str,
+            jobs: Optional[int],
+            object_cache: bool,
+            debug: bool,
+            progress: Optional[str] = None
+    ) -> int:
         """
-        raise NotImplementedError("This command has not been implemented yet.")
+        Compiles the generated C sources and links the executable, which is
+        then recorded in the build manifest.
+
+        :returns: The amount of failed C units
+        """
+        from ..build import BuildManifest
+        from ..progress import ParaCLIDashboard, cli_count_lines
+        from ..toolchain import (cli_build_executable, cli_log_c_unit_result,
+                                 cli_collect_c_sources, CToolchainError,
+                                 ObjectCache)
+
+        structured = cli_get_structured_output()
+        cli_logger = cli_get_logger()
+        cli_logger.info("Compiling the generated C sources")
+        cache = ObjectCache() if object_cache else None
+        failed = hits = units = 0
+        start = time.perf_counter()
+        dashboard = ParaCLIDashboard(
+            "none" if structured is not None else progress
+        )
+        try:
+            with dashboard:
+                c_stage = dashboard.add_stage(
+                    "C sources", total=len(cli_collect_c_sources(build_path))
+                )
+                link_stage = dashboard.add_stage("Linking", total=1)
+                for result in cli_trace_results(
+                        cli_build_executable(
+                            build_path, dist_path, Path(files[0]).stem, jobs,
+                            debug, cache=cache
+                        ),
+                        "cli_compile_c_unit",
+                        track="C units"
+                ):
+                    linking = result.source == "Linking"
+                    if structured is not None:
+                        structured.emit(
+                            "c-unit",
+                            file=result.source,
+                            output=result.output,
+                            success=result.success,
+                            cached=result.cached,
+                            messages=result.messages,
+                            duration=result.duration
+                        )
+                    else:
+                        cli_log_c_unit_result(result)
+                    dashboard.advance(
+                        link_stage if linking else c_stage,
+                        result.output if linking else result.source,
+                        lines=0 if linking or result.cached
+                        else cli_count_lines(result.source),
+                        success=result.success,
+                        duration=result.duration
+                    )
+                    failed += 0 if result.success else 1
+                    hits += 1 if result.cached else 0
+                    units += 0 if linking else 1
+                    if linking and result.success:
+                        manifest = BuildManifest.load(build_path, encoding)
+                        manifest.set_executable(
+                            result.output,
+                            [os.path.abspath(f) for f in files]
+                        )
+                        manifest.save()
+        except CToolchainError as e:
+            cli_logger.error(str(e))
+            return 1
+
+        if cache is not None:
+            cli_logger.info(
+                f"Object cache: {hits} hits, {units - hits} misses"
+            )
+        if failed == 0:
+            cli_logger.info(
+                f"Created the executable in '{dist_path}' "
+                f"({time.perf_counter() - start:.3f}s)"
+            )
+        return failed
 
     @staticmethod
     @cli_abortable(reraise=True)
     @cli_keep_open_callback
     @cli_escape_ansi_args
     def para_run(
-            directory: str,
+            file: Tuple[str, ...],
+            args: Tuple[str, ...],
             encoding: str,
             log: str,
             overwrite_build: bool,
             overwrite_dist: bool,
-            debug: bool
-    ) -> None:
-        """ CLI interface for compiling and running a program. """
-        raise NotImplementedError("This command has not been implemented yet.")
+            jobs: Optional[int],
+            debug: bool,
+            progress: Optional[str] = None
+    ) -> NoReturn:
+        """
+        CLI interface for compiling and running a program.
+
+        If the executable in the dist folder is up-to-date with the sources,
+        it is run directly without importing the compiler. Otherwise the
+        program is compiled first.
+        """
+        from ..build import cli_get_current_executable
+        from ..utils import cli_exec_program
+
+        files = list(file or ("main.para",))
+        executable = cli_get_current_executable(files, encoding, debug=debug)
+        if executable is None:
+            try:
+                ParaCLI.para_compile(
+                    (), tuple(files), encoding, log, overwrite_build,
+                    overwrite_dist, source=True, executable=True, jobs=jobs,
+                    object_cache=True, debug=debug, progress=progress,
+                    keep_open=False
+                )
+                success = True
+            except SystemExit as e:
+                # The compilation exits with a non-zero code if it failed
+                success = not e.code
+            executable = cli_get_current_executable(
+                files, encoding, debug=debug
+            )
+            if executable is None or not success:
+                cli_get_logger().error(
+                    "Failed to build the program. See the logs above"
+                )
+                exit(1)
+            get_console().print("")
+
+        cli_exec_program(executable, list(args))
 
     @staticmethod
     @cli_abortable(reraise=True)
     @cli_keep_open_callback
     @cli_escape_ansi_args
     def para_syntax_check(
-            file: str,
+            paths: Tuple[str, ...],
+            file: Tuple[str, ...],
             encoding: str,
             log: str,
-            debug: bool
+            jobs: Optional[int],
+            cache: bool,
+            server: bool,
+            debug: bool,
+            streaming: bool = False,
+            remote_cache: Optional[str] = None
     ):
-        """ Runs a syntax check on the specified file (imports excluded) """
-        if not RUNTIME_COMPILER.is_cli_logger_ready:
-            RUNTIME_COMPILER.init_cli_logging(
-                log,
-                level=logging.DEBUG if debug else logging.INFO,
-                banner_name="Syntax Check"
+        """
+        Runs a syntax check on the specified files, directories and glob
+        patterns (imports excluded). If a compile server is running, the check
+        will be run by the server.
+        """
+        from ..remote import cli_get_remote_cache
+        from ..syntax_check import (cli_collect_files, cli_run_syntax_check,
+                                    cli_log_syntax_check_result,
+                                    SyntaxCheckCache)
+
+        level = logging.DEBUG if debug else logging.INFO
+        client = None
+        if server:
+            from ..server import cli_connect_server
+            client = cli_connect_server()
+        structured = cli_get_structured_output()
+        if structured is not None:
+            cli_logger = structured.init_logging(level)
+        elif client is not None:
+            cli_logger = cli_init_logging(
+                log, level=level, banner_name="Syntax Check"
             )
+        else:
+            cli_logger = cli_init_compiler_logging(
+                log, level=level, banner_name="Syntax Check"
+            ).logger
 
-        # Exception won't be reraised and directly logged to the console
-        try:
-            asyncio.run(
-                RUNTIME_COMPILER.validate_syntax(
-                    file, encoding, prefer_logging=True
+        files = cli_collect_files((*paths, *file) or ("main.para",))
+        if len(files) == 0:
+            cli_logger.warning("No files were found to check")
+
+        checked = failed = errors = warnings = 0
+        start = time.perf_counter()
+        if client is not None:
+            cli_logger.debug(
+                f"Using the compile server '{client.socket_path}'"
+            )
+            results = client.syntax_check(
+                files, encoding, jobs, debug, cache, streaming, remote_cache
+            )
+            remote = None
+        else:
+            remote = cli_get_remote_cache(remote_cache) if cache else None
+            results = cli_run_syntax_check(
+                files,
+                encoding,
+                jobs,
+                debug,
+                cache=SyntaxCheckCache() if cache else None,
+                streaming=streaming,
+                remote=remote
+            )
+        results = cli_trace_results(
+            results, "cli_syntax_check_file", track="Para files"
+        )
+        for result in results:
+            if structured is not None:
+                structured.emit_diagnostics(result.file, result.diagnostics)
+                structured.emit(
+                    "file",
+                    file=result.file,
+                    success=result.success,
+                    cached=result.cached,
+                    warnings=result.warnings,
+                    errors=result.errors,
+                    duration=result.duration
                 )
+            else:
+                cli_log_syntax_check_result(result)
+            checked += 1
+            failed += 0 if result.success else 1
+            errors += result.errors
+            warnings += result.warnings
+        if client is None:
+            ParaCLI._log_remote_stats(remote)
+            ParaCLI._log_peak_rss()
+
+        if structured is not None:
+            structured.emit_summary(
+                "syntax-check",
+                success=failed == 0,
+                files=checked,
+                failed=failed,
+                warnings=warnings,
+                errors=errors
             )
-        # FailedToProcess -> SyntaxError
-        except FailedToProcessError:
-            ...  # ignoring as the following items will handle the errors
+            structured.close()
+            if failed > 0:
+                exit(1)
+            return
 
-        errors = RUNTIME_COMPILER.stream_handler.errors
-        warnings = RUNTIME_COMPILER.stream_handler.warnings
-        if errors == 0:
+        if failed == 0:
             cli_print_result_banner("Syntax Check")
             get_console().print(
                 "[bold bright_cyan]"
-                "Syntax check finished successfully"
+                f"Syntax check finished successfully for {checked} "
+                f"{'file' if checked == 1 else 'files'}"
                 "[/bold bright_cyan]"
             )
         else:
@@ -141,14 +536,304 @@ class ParaCLI:
             get_console().print(
                 "[bold yellow]"
                 "Syntax check detected "
-                f"{'an error' if errors == 1 else 'multiple errors'}"
+                f"{'an error' if errors == 1 else 'multiple errors'} in "
+                f"{failed} of {checked} {'file' if checked == 1 else 'files'}"
                 "[/bold yellow]"
             )
 
         get_console().print(
             f"[bold yellow]{warnings} Warnings [/bold yellow]"
-            f"[bold red]{errors} Errors[/bold red]"
+            f"[bold red]{errors} Errors[/bold red] "
+            f"[white]({time.perf_counter() - start:.3f}s)[/white]"
         )
+        if failed > 0:
+            exit(1)
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_keep_open_callback
+    @cli_escape_ansi_args
+    def para_bench(
+            paths: Tuple[str, ...],
+            file: Tuple[str, ...],
+            encoding: str,
+            rounds: int,
+            warmup: int,
+            stage: str,
+            save: Optional[str],
+            compare: Optional[str],
+            threshold: float,
+            debug: bool
+    ):
+        """
+        Measures the throughput of the syntax check and the compilation of
+        the specified files, directories and glob patterns
+        """
+        from ..bench import BENCH_STAGES, BenchReport, cli_run_bench
+        from ..syntax_check import cli_collect_files
+
+        level = logging.DEBUG if debug else logging.INFO
+        structured = cli_get_structured_output()
+        if structured is not None:
+            cli_logger = structured.init_logging(level)
+        else:
+            cli_logger = cli_init_logging(level=level, banner_name="Bench")
+
+        baseline = None
+        if compare is not None:
+            try:
+                baseline = BenchReport.load(compare)
+            except (OSError, ValueError) as e:
+                cli_logger.error(f"Failed to load '{compare}': {e}")
+                if structured is not None:
+                    structured.emit_summary("bench", success=False)
+                    structured.close()
+                exit(1)
+
+        files = cli_collect_files((*paths, *file) or ("main.para",))
+        if len(files) == 0:
+            cli_logger.warning("No files were found to measure")
+        stages = BENCH_STAGES if stage == "all" else (stage,)
+
+        out = get_console()
+        results = {}
+        for result in cli_run_bench(
+                files, encoding, os.getcwd(), stages, rounds, warmup
+        ):
+            results[result.stage] = result.to_json()
+            if result.failures:
+                cli_logger.warning(
+                    f"{result.failures} of {len(files)} files failed in the "
+                    f"stage '{result.stage}'"
+                )
+            if structured is not None:
+                structured.emit(
+                    "stage", stage=result.stage, **results[result.stage]
+                )
+                continue
+
+            percentiles = ", ".join(
+                f"{name} {value * 1000:.2f}ms"
+                for name, value in result.percentiles().items()
+            )
+            peak = result.peak_rss
+            out.print(
+                f"[bold bright_cyan]{result.stage}[/bold bright_cyan] - "
+                f"{result.lines_per_second:,.0f} lines/s, "
+                f"{result.files_per_second:,.1f} files/s "
+                f"(median round {result.median:.3f}s)\n"
+                f"  per file: {percentiles}"
+                + (
+                    f"\n  peak memory usage (RSS): "
+                    f"{peak / 1024 ** 2:.1f} MiB" if peak is not None else ""
+                ),
+                highlight=False
+            )
+
+        report = BenchReport(results)
+        report.info.update(encoding=encoding, rounds=rounds, warmup=warmup)
+        if save is not None:
+            report.save(save)
+            cli_logger.info(f"Saved the results to '{save}'")
+
+        regressions = []
+        if baseline is not None:
+            version = baseline.info.get("paralang_base", "unknown")
+            for name in report.incomparable(baseline):
+                cli_logger.warning(
+                    f"The stage '{name}' was not compared, since files "
+                    "failed in this run or in the baseline"
+                )
+            for name, change in report.compare(baseline).items():
+                if change < -threshold:
+                    regressions.append(name)
+                if structured is not None:
+                    structured.emit(
+                        "comparison",
+                        stage=name,
+                        baseline=version,
+                        change=change,
+                        regression=change < -threshold
+                    )
+                else:
+                    colour = "red" if change < -threshold else "green"
+                    out.print(
+                        f"[bold bright_cyan]{name}[/bold bright_cyan] - "
+                        f"[{colour}]{change * 100:+.1f}%[/{colour}] lines/s "
+                        f"compared to paralang_base {version}",
+                        highlight=False
+                    )
+
+        if structured is not None:
+            structured.emit_summary(
+                "bench",
+                success=not regressions,
+                files=len(files),
+                stages=list(results),
+                regressions=regressions
+            )
+            structured.close()
+        elif regressions:
+            cli_logger.error(
+                "Throughput regressed by more than "
+                f"{threshold * 100:.0f}% in: {', '.join(regressions)}"
+            )
+        if regressions:
+            exit(1)
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_escape_ansi_args
+    def para_watch(
+            paths: Tuple[str, ...],
+            encoding: str,
+            log: str,
+            mode: str,
+            debounce: float,
+            polling: bool,
+            debug: bool
+    ):
+        """
+        Watches the specified files and directories and re-runs the syntax
+        check or compilation for changed files
+        """
+        from ..watch import cli_watch
+
+        cli_init_compiler_logging(
+            log,
+            level=logging.DEBUG if debug else logging.INFO,
+            banner_name="Watch"
+        )
+        cli_watch(
+            list(paths) or [os.getcwd()],
+            encoding,
+            mode=mode,
+            debounce=debounce,
+            force_polling=polling,
+            debug=debug
+        )
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    def para_server_start(socket_path: Optional[str]):
+        """ Starts the compile server and handles requests until stopped """
+        from ..server import ParaServer
+
+        server = ParaServer(socket_path)
+        get_console().print(
+            "[bold bright_cyan]"
+            f"Compile server listening on '{server.socket_path}' "
+            "(Press CTRL+C to stop)"
+            "[/bold bright_cyan]",
+            highlight=False
+        )
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            server.server_close()
+        get_console().print("\n[bold bright_cyan]Stopped compile server")
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    def para_server_stop(socket_path: Optional[str]):
+        """ Stops the running compile server """
+        from ..server import cli_connect_server
+
+        client = cli_connect_server(socket_path)
+        if client is None:
+            get_console().print("[bold yellow]No compile server is running")
+            return
+
+        client.shutdown()
+        get_console().print("[bold bright_cyan]Stopped compile server")
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    def para_server_status(socket_path: Optional[str]):
+        """ Prints whether the compile server is running """
+        from ..server import cli_connect_server
+
+        client = cli_connect_server(socket_path)
+        if client is None:
+            get_console().print("[bold yellow]No compile server is running")
+        else:
+            get_console().print(
+                "[bold bright_cyan]"
+                f"Compile server is running on '{client.socket_path}'"
+                "[/bold bright_cyan]",
+                highlight=False
+            )
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_keep_open_callback
+    def para_cache_clear():
+        """ Removes all entries from the local cache """
+        import shutil
+        from ..cache import cli_get_cache_dir
+
+        path = cli_get_cache_dir()
+        if path.exists():
+            shutil.rmtree(path)
+        get_console().print(
+            "[bold bright_cyan]"
+            f"Cleared the cache in '{path}'"
+            "[/bold bright_cyan]",
+            highlight=False
+        )
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_keep_open_callback
+    def para_cache_serve(path: Optional[str], host: str, port: int):
+        """
+        Runs the reference server of the remote cache until it is
+        interrupted
+        """
+        from ..cache import cli_get_cache_dir
+        from ..remote import RemoteCacheServer
+
+        path = path or str(cli_get_cache_dir() / "remote")
+        server = RemoteCacheServer(path, host, port)
+        get_console().print(
+            "[bold bright_cyan]"
+            f"Serving the remote cache '{path}' on {server.url}"
+            "[/bold bright_cyan]",
+            highlight=False
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            ...
+        finally:
+            server.server_close()
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_keep_open_callback
+    def para_cache_stats():
+        """ Prints the statistics of the local caches """
+        from ..store import ArtifactStore
+        from ..syntax_check import SyntaxCheckCache
+        from ..toolchain import ObjectCache
+
+        out = get_console()
+        for name, cache in (
+                ("Syntax Check", SyntaxCheckCache()),
+                ("Objects", ObjectCache()),
+                ("Artifacts", ArtifactStore())
+        ):
+            stats = cache.load_stats()
+            total = stats["hits"] + stats["misses"]
+            rate = stats["hits"] / total * 100 if total else 0.0
+            out.print(
+                f"[bold bright_cyan]{name}[/bold bright_cyan] - "
+                f"{stats['hits']} hits, {stats['misses']} misses "
+                f"({rate:.1f}% hit rate), {cache.entries()} entries, "
+                f"{cache.size() / 1024 / 1024:.1f} of "
+                f"{cache.max_size / 1024 / 1024:.0f} MiB",
+                highlight=False
+            )
 
 
 @click.group(invoke_without_command=True)
@@ -158,6 +843,34 @@ class ParaCLI:
     is_flag=True,
     help="Prints the version of the compiler"
 )
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="text",
+    help="The format of the output. Using 'json' or 'ndjson' diagnostics, "
+         "timings and summaries are written as JSON records onto stdout"
+)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Runs the command using cProfile and writes the statistics as a "
+         ".pstats file to the passed path"
+)
+@click.option(
+    "--trace-timings",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Records the time spent in every stage of the command and writes "
+         "it as Chrome trace-event JSON to the passed path"
+)
+@click.option(
+    "--queued-logging/--no-queued-logging",
+    default=False,
+    help="Writes the log output on a background thread, so logging does "
+         "not block the compilation"
+)
 @click.option(
     "--help",
     is_flag=True,
@@ -180,14 +893,15 @@ def cli_para(*args, **kwargs):
 
 @cli_para.command(name="compile")
 @click.option("--keep-open", is_flag=True)
+@click.argument("paths", nargs=-1, type=str)
 @click.option(
     "-f",
-    "--files",
-    prompt=cli_create_prompt("Specify the files for your Para program"),
+    "--file",
     type=str,
-    help="The files for your program that should be compiled and linked. You"
-         "may specify multiple files with '-f'",
-    multiple=True
+    multiple=True,
+    help="A file, directory or glob pattern that should be compiled and "
+         "linked. You may specify multiple with '-f' or pass them as "
+         "arguments. Defaults to 'main.para'"
 )
 @click.option(
     "--encoding",
@@ -228,24 +942,70 @@ def cli_para(*args, **kwargs):
     is_flag=True,
     type=bool,
     default=True,
-    help="If flag is set the compiler will compile the code down to native C"
-         " (C11). If set with --executable, the executable will be also "
-         "generated next the source C code."
+    help="Deprecated and without effect. The compiler always compiles the "
+         "code down to native C (C11), which is kept next to the executable "
+         "if --executable is set."
 )
 @click.option(
     "--executable/--no-executable",
     type=bool,
     default=False,
     help="If flag is set the compiler will compile the native C code and "
-         "directly generate an executable. If set with --source, the source C"
-         "code will be also generated next the executable."
+         "directly generate an executable."
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="The amount of files that should be compiled in parallel. Defaults "
+         "to the amount of CPUs"
+)
+@click.option(
+    "--object-cache/--no-object-cache",
+    type=bool,
+    default=True,
+    help="If set the object files of unchanged C units will be loaded from "
+         "the object cache when creating an executable"
+)
+@click.option(
+    "--artifact-store/--no-artifact-store",
+    type=bool,
+    default=True,
+    help="If set the generated files are stored in the local artifact store "
+         "and linked into the build and dist folder, and units compiled "
+         "before with the same inputs are restored from it"
+)
+@click.option(
+    "--remote-cache",
+    type=str,
+    default=None,
+    help="URL of a remote cache shared between machines ('http://...', "
+         "'file://...' or a path). Defaults to the environment variable "
+         "'PARA_REMOTE_CACHE'"
+)
+@click.option(
+    "--server/--no-server",
+    type=bool,
+    default=True,
+    help="If set the units will be compiled by the compile server if it is "
+         "running"
 )
 @click.option(
     "--debug/--no-debug",
     is_flag=True,
     type=bool,
     default=False,
-    help="If set the compiler will add additional debug information"
+    help="If set the compiler will add additional debug information. This "
+         "includes the peak memory usage of the compilation"
+)
+@click.option(
+    "--progress",
+    type=click.Choice(PROGRESS_MODES),
+    default=None,
+    help="How the progress is shown. 'rich' renders a live dashboard, "
+         "'plain' prints status lines and 'none' disables it. Defaults to "
+         "'rich' on terminals and 'plain' otherwise"
 )
 @cli_abortable(reraise=False)
 def cli_para_compile(*args, **kwargs):
@@ -256,13 +1016,14 @@ def cli_para_compile(*args, **kwargs):
 @cli_para.command(name="run")
 @click.option("--keep-open", is_flag=True)
 @click.option(
-    "-p",
-    "--path",
-    prompt=cli_create_prompt("Specify the path to your built"),
-    default=cli_format_default("./dist/"),
+    "-f",
+    "--file",
     type=str,
-    help="The path where your finished built is located"
+    multiple=True,
+    help="A file of the program that should be run. You may specify "
+         "multiple with '-f'. Defaults to 'main.para'"
 )
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
 @click.option(
     "--encoding",
     default="utf-8",
@@ -274,8 +1035,6 @@ def cli_para_compile(*args, **kwargs):
     "--log",
     type=str,
     default=cli_format_default("./parac.log"),
-    prompt=cli_create_prompt(
-        "Specify where the console .log file should be created"),
     help="Path of the output .log file where program messages should be logged"
          ". If set to None it will not use a log file and only use the console"
          " as the output method"
@@ -296,6 +1055,14 @@ def cli_para_compile(*args, **kwargs):
     help="If flag is set the dist folder will always be overwritten without "
          "consideration of pre-existing data"
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="The amount of files that should be compiled in parallel, if the "
+         "program has to be compiled. Defaults to the amount of CPUs"
+)
 @click.option(
     "--debug/--no-debug",
     is_flag=True,
@@ -303,24 +1070,32 @@ def cli_para_compile(*args, **kwargs):
     default=False,
     help="If set the compiler will add additional debug information"
 )
+@click.option(
+    "--progress",
+    type=click.Choice(PROGRESS_MODES),
+    default=None,
+    help="How the progress of the compilation is shown. See 'para compile'"
+)
 @cli_abortable(reraise=False)
 def para_run(*args, **kwargs):
     """
-    Runs a built Para program in './dist/'
+    Runs a Para program and compiles it beforehand if it changed. Arguments
+    after '--' are passed to the program
     """
     ParaCLI.para_run(*args, **kwargs)
 
 
 @cli_para.command(name="syntax-check")
 @click.option("--keep-open", is_flag=True)
+@click.argument("paths", nargs=-1, type=str)
 @click.option(
     "-f",
     "--file",
     type=str,
-    default=cli_format_default("main.para"),
-    prompt=cli_create_prompt("Specify the entry-point of your program"),
-    help="The entry-point of the program where the compiler "
-         "should start the compilation process."
+    multiple=True,
+    help="A file, directory or glob pattern that should be checked. You may "
+         "specify multiple with '-f' or pass them as arguments. Defaults to "
+         "'main.para'"
 )
 @click.option(
     "--encoding",
@@ -339,12 +1114,50 @@ def para_run(*args, **kwargs):
          ". If set to None it will not use a log file and only use the console"
          " as the output method"
 )
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="The amount of files that should be checked in parallel. Defaults "
+         "to the amount of CPUs"
+)
+@click.option(
+    "--cache/--no-cache",
+    type=bool,
+    default=True,
+    help="If set the results of unchanged files will be loaded from the "
+         "syntax-check cache"
+)
+@click.option(
+    "--server/--no-server",
+    type=bool,
+    default=True,
+    help="If set the check will be run by the compile server if it is running"
+)
 @click.option(
     "--debug/--no-debug",
     is_flag=True,
     type=bool,
     default=False,
-    help="If set the compiler will add additional debug information"
+    help="If set the compiler will add additional debug information. This "
+         "includes the peak memory usage of the check"
+)
+@click.option(
+    "--streaming/--no-streaming",
+    type=bool,
+    default=False,
+    help="If set the files will be read and decoded in chunks and have their "
+         "comments removed while reading, which keeps less copies of a file "
+         "in memory"
+)
+@click.option(
+    "--remote-cache",
+    type=str,
+    default=None,
+    help="URL of a remote cache shared between machines ('http://...', "
+         "'file://...' or a path). Defaults to the environment variable "
+         "'PARA_REMOTE_CACHE'"
 )
 @cli_abortable(reraise=False)
 def para_syntax_check(*args, **kwargs):
@@ -352,11 +1165,241 @@ def para_syntax_check(*args, **kwargs):
     ParaCLI.para_syntax_check(*args, **kwargs)
 
 
+@cli_para.command(name="bench")
+@click.option("--keep-open", is_flag=True)
+@click.argument("paths", nargs=-1, type=str)
+@click.option(
+    "-f",
+    "--file",
+    type=str,
+    multiple=True,
+    help="A file, directory or glob pattern that should be part of the "
+         "corpus. You may specify multiple with '-f' or pass them as "
+         "arguments. Defaults to 'main.para'"
+)
+@click.option(
+    "--encoding",
+    default="utf-8",
+    type=str,
+    help="The encoding the files should be opened with"
+)
+@click.option(
+    "-n",
+    "--rounds",
+    type=click.IntRange(min=1),
+    default=5,
+    help="The amount of measured rounds over the corpus per stage"
+)
+@click.option(
+    "-w",
+    "--warmup",
+    type=click.IntRange(min=0),
+    default=1,
+    help="The amount of rounds run before measuring, which are not part of "
+         "the results"
+)
+@click.option(
+    "--stage",
+    type=click.Choice(["syntax-check", "compile", "all"]),
+    default="all",
+    help="The stage that should be measured"
+)
+@click.option(
+    "--save",
+    type=str,
+    default=None,
+    help="Path of a JSON file the results should be saved to"
+)
+@click.option(
+    "--compare",
+    type=str,
+    default=None,
+    help="Path of saved results, e.g. of another paralang_base version, the "
+         "results should be compared with"
+)
+@click.option(
+    "--threshold",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    help="The relative loss of lines per second compared to '--compare', "
+         "from which on the command fails"
+)
+@click.option(
+    "--debug/--no-debug",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="If set additional debug information will be logged"
+)
+@cli_abortable(reraise=False)
+def para_bench(*args, **kwargs):
+    """ Measures the throughput of the compiler """
+    ParaCLI.para_bench(*args, **kwargs)
+
+
+@cli_para.command(name="watch")
+@click.argument("paths", nargs=-1, type=str)
+@click.option(
+    "--encoding",
+    default="utf-8",
+    type=str,
+    help="The encoding the files should be opened with"
+)
+@click.option(
+    "-l",
+    "--log",
+    type=str,
+    default=cli_format_default("./parac.log"),
+    help="Path of the output .log file where program messages should be logged"
+         ". If set to None it will not use a log file and only use the console"
+         " as the output method"
+)
+@click.option(
+    "--syntax-check",
+    "mode",
+    flag_value="syntax-check",
+    default=True,
+    help="Runs a syntax check for changed files (default)"
+)
+@click.option(
+    "--compile",
+    "mode",
+    flag_value="compile",
+    help="Compiles the changed files"
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=0.2,
+    help="Seconds without further changes, before changed files are processed"
+)
+@click.option(
+    "--polling",
+    is_flag=True,
+    default=False,
+    help="If set polling will be used instead of native file notifications"
+)
+@click.option(
+    "--debug/--no-debug",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="If set the compiler will add additional debug information"
+)
+@cli_abortable(reraise=False)
+def para_watch(*args, **kwargs):
+    """
+    Watches files and directories and re-validates them on change
+    """
+    ParaCLI.para_watch(*args, **kwargs)
+
+
+@cli_para.group(name="server", invoke_without_command=True)
+@click.pass_context
+def para_server(ctx: click.Context):
+    """
+    Manages the compile server, which keeps the compiler loaded
+    """
+    if not ctx.invoked_subcommand:
+        get_console().print(ctx.get_help())
+
+
+_socket_option = click.option(
+    "--socket",
+    "socket_path",
+    type=str,
+    default=None,
+    help="Path of the server socket. Defaults to the environment variable "
+         "PARA_SERVER_SOCKET or a socket in the user runtime directory"
+)
+
+
+@para_server.command(name="start")
+@_socket_option
+@cli_abortable(reraise=False)
+def para_server_start(*args, **kwargs):
+    """ Starts the compile server in the foreground """
+    ParaCLI.para_server_start(*args, **kwargs)
+
+
+@para_server.command(name="stop")
+@_socket_option
+@cli_abortable(reraise=False)
+def para_server_stop(*args, **kwargs):
+    """ Stops the running compile server """
+    ParaCLI.para_server_stop(*args, **kwargs)
+
+
+@para_server.command(name="status")
+@_socket_option
+@cli_abortable(reraise=False)
+def para_server_status(*args, **kwargs):
+    """ Prints whether the compile server is running """
+    ParaCLI.para_server_status(*args, **kwargs)
+
+
+@cli_para.group(name="cache", invoke_without_command=True)
+@click.pass_context
+def para_cache(ctx: click.Context):
+    """ Manages the local cache of the CLI """
+    if not ctx.invoked_subcommand:
+        get_console().print(ctx.get_help())
+
+
+@para_cache.command(name="clear")
+@click.option("--keep-open", is_flag=True)
+@cli_abortable(reraise=False)
+def para_cache_clear(*args, **kwargs):
+    """ Removes all entries from the local cache """
+    ParaCLI.para_cache_clear(*args, **kwargs)
+
+
+@para_cache.command(name="serve")
+@click.option("--keep-open", is_flag=True)
+@click.option(
+    "--path",
+    type=str,
+    default=None,
+    help="The folder the entries are stored in. Defaults to the folder "
+         "'remote' inside the local cache"
+)
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    help="The address the server listens on"
+)
+@click.option(
+    "--port",
+    type=click.IntRange(min=0, max=65535),
+    default=8080,
+    help="The port the server listens on"
+)
+@cli_abortable(reraise=False)
+def para_cache_serve(*args, **kwargs):
+    """ Runs a local HTTP server for the remote cache """
+    ParaCLI.para_cache_serve(*args, **kwargs)
+
+
+@para_cache.command(name="stats")
+@click.option("--keep-open", is_flag=True)
+@cli_abortable(reraise=False)
+def para_cache_stats(*args, **kwargs):
+    """ Prints the hit and miss statistics of the local caches """
+    ParaCLI.para_cache_stats(*args, **kwargs)
+
+
 def cli_run() -> NoReturn:
     """
     Runs the cli and parses the input args.
 
     This function will **not** return and close the application itself.
     """
+    # Enabling colouring support for the console as a backup option
+    cli_init_colorama()
+    # Keeping the order of the output across stdout and stderr, so
+    # subcommands writing onto stderr never appear before the banner
+    cli_install_output_multiplexer()
+
     cli_init_rich_console()
     cli_para()
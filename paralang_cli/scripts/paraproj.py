@@ -1,13 +1,21 @@
 """ The CLI 'paraproj' command - Para Project Configuration Helper """
+import logging
+import os
 import time
-from typing import NoReturn
+from typing import NoReturn, Optional, Tuple
 import click
-import paralang_base
-from rich import get_console
 
 from .. import (cli_init_rich_console, cli_print_para_banner, __title__,
                 __version__, cli_print_paraproj_banner)
-from ..utils import cli_abortable, cli_keep_open_callback, cli_escape_ansi_args
+from ..console import (cli_init_colorama,
+                       cli_install_output_multiplexer)
+from ..logging import (cli_get_rich_console as get_console, cli_init_logging,
+                       cli_print_result_banner, cli_create_prompt,
+                       cli_format_default)
+from ..output import (OUTPUT_FORMATS, cli_set_output_format,
+                      cli_get_structured_output)
+from ..utils import (cli_abortable, cli_keep_open_callback,
+                     cli_escape_ansi_args, cli_get_base_version)
 
 
 class ParaProjCLI:
@@ -17,7 +25,13 @@ class ParaProjCLI:
     @cli_abortable(reraise=True)
     @cli_keep_open_callback
     @cli_escape_ansi_args
-    def cli(ctx: click.Context, version, *args, **kwargs):
+    def cli(
+            ctx: click.Context,
+            version: bool,
+            output_format: str = "text",
+            *args,
+            **kwargs
+    ):
         """
         Main entry point of the compiler CLI. Either returns version or prints
         the init_banner of the Compiler
@@ -26,26 +40,283 @@ class ParaProjCLI:
         if get_console() is None:
             cli_init_rich_console()
 
+        cli_set_output_format(output_format)
         out = get_console()
         if version:
             out.print(
                 ' '.join([
                     "Para Project Configuration Tool", __version__,
-                    "\nPara Compiler", paralang_base.__version__
+                    "\nPara Compiler", cli_get_base_version()
                 ])
             )
             return
+        elif output_format != "text":
+            # The structured output should not be preceded by the banner
+            return
         else:
             cli_print_paraproj_banner()
             out.print('')
 
-            # Sleeping to prevent that subcommands sending to stderr
-            # causing the banner to be displayed at the end of the output
-            time.sleep(.100)
-
         if not ctx.invoked_subcommand:
             out.print(ctx.get_help())
 
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_keep_open_callback
+    @cli_escape_ansi_args
+    def paraproj_build(
+            packages: Tuple[str, ...],
+            workspace: Optional[str],
+            encoding: str,
+            log: str,
+            jobs: Optional[int],
+            artifact_store: bool,
+            debug: bool
+    ):
+        """
+        Builds the packages of a workspace and the packages they depend on in
+        topological order, where independent packages are built in parallel.
+        """
+        from ..build import cli_log_build_unit_result
+        from ..store import ArtifactStore
+        from ..workspace import (Workspace, WorkspaceError,
+                                 cli_run_workspace_build,
+                                 cli_log_package_build_result)
+
+        level = logging.DEBUG if debug else logging.INFO
+        structured = cli_get_structured_output()
+        if structured is not None:
+            cli_logger = structured.init_logging(level)
+        else:
+            cli_logger = cli_init_logging(
+                log, level=level, banner_name="Workspace Build"
+            )
+
+        built = current = failed = total = 0
+        start = time.perf_counter()
+        try:
+            ws = Workspace.load(workspace)
+            cli_logger.debug(f"Using the workspace manifest '{ws.path}'")
+            total = len(ws.order(packages or None))
+            results = cli_run_workspace_build(
+                ws, encoding, packages or None, jobs, debug,
+                store=ArtifactStore() if artifact_store else None
+            )
+
+            for result in results:
+                if structured is not None:
+                    for unit in result.units:
+                        structured.emit_diagnostics(
+                            unit.file, unit.diagnostics
+                        )
+                    structured.emit(
+                        "package",
+                        name=result.name,
+                        state=result.state,
+                        success=result.success,
+                        units=len(result.units),
+                        compiled=result.compiled,
+                        warnings=result.warnings,
+                        errors=result.errors,
+                        duration=result.duration
+                    )
+                else:
+                    for unit in result.units:
+                        cli_log_build_unit_result(unit)
+                    cli_log_package_build_result(result)
+                if not result.success:
+                    failed += 1
+                elif result.state == "built":
+                    built += 1
+                else:
+                    current += 1
+        except WorkspaceError as e:
+            cli_logger.error(str(e))
+            failed = max(failed, 1)
+
+        if structured is not None:
+            structured.emit_summary(
+                "build",
+                success=failed == 0,
+                packages=total,
+                built=built,
+                up_to_date=current,
+                failed=failed
+            )
+            structured.close()
+        else:
+            ParaProjCLI._print_build_summary(
+                built, current, failed, total, start
+            )
+        if failed:
+            exit(1)
+
+    @staticmethod
+    def _print_build_summary(
+            built: int,
+            current: int,
+            failed: int,
+            total: int,
+            start: float
+    ) -> None:
+        """ Prints the result banner and summary of a workspace build """
+        cli_print_result_banner("Workspace Build", success=failed == 0)
+        get_console().print(
+            f"[bold bright_cyan]Built {built} of {total} "
+            f"{'package' if total == 1 else 'packages'} "
+            f"({current} up-to-date or restored, "
+            f"{failed} failed) [/bold bright_cyan][white]"
+            f"({time.perf_counter() - start:.3f}s)[/white]",
+            highlight=False
+        )
+
+    @staticmethod
+    def _init_query_logging(debug: bool) -> logging.Logger:
+        """ Initialises the logging of the graph queries without a banner """
+        level = logging.DEBUG if debug else logging.INFO
+        structured = cli_get_structured_output()
+        if structured is not None:
+            return structured.init_logging(level)
+        return cli_init_logging(None, level=level, print_banner=False)
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_keep_open_callback
+    @cli_escape_ansi_args
+    def paraproj_graph(project_root: Optional[str], debug: bool):
+        """
+        Updates the import-graph index of the project and prints the includes
+        of every file
+        """
+        from ..graph import ImportGraphIndex
+
+        cli_logger = ParaProjCLI._init_query_logging(debug)
+        structured = cli_get_structured_output()
+        start = time.perf_counter()
+        index = ImportGraphIndex(project_root or os.getcwd())
+        rescanned = index.update()
+        cli_logger.debug(f"Using the import-graph index '{index.path}'")
+
+        root = index.project_root
+        for file in index.files:
+            includes = index.includes(file)
+            if structured is not None:
+                structured.emit(
+                    "file",
+                    file=os.path.relpath(file, root),
+                    includes=[os.path.relpath(i, root) for i in includes]
+                )
+            else:
+                get_console().print(
+                    f"[bold bright_cyan]{os.path.relpath(file, root)}"
+                    "[/bold bright_cyan]",
+                    highlight=False
+                )
+                for include in includes:
+                    get_console().print(
+                        f"  -> {os.path.relpath(include, root)}",
+                        highlight=False
+                    )
+
+        if structured is not None:
+            structured.emit_summary(
+                "graph",
+                success=True,
+                files=len(index.files),
+                rescanned=rescanned
+            )
+            structured.close()
+        else:
+            get_console().print(
+                f"[bold bright_cyan]Indexed {len(index.files)} files "
+                f"({rescanned} rescanned)[/bold bright_cyan] "
+                f"[white]({time.perf_counter() - start:.3f}s)[/white]",
+                highlight=False
+            )
+
+    @staticmethod
+    @cli_abortable(reraise=True)
+    @cli_keep_open_callback
+    @cli_escape_ansi_args
+    def paraproj_affected(
+            files: Tuple[str, ...],
+            since: Optional[str],
+            project_root: Optional[str],
+            workspace: Optional[str],
+            debug: bool
+    ):
+        """
+        Prints the files and workspace packages affected by the passed
+        changed files and the changes since the passed git revision
+        """
+        from ..graph import ImportGraphIndex, GraphError, cli_git_changed_files
+        from ..workspace import (Workspace, WorkspaceError,
+                                 WORKSPACE_MANIFEST_NAME)
+
+        cli_logger = ParaProjCLI._init_query_logging(debug)
+        structured = cli_get_structured_output()
+        project_root = project_root or os.getcwd()
+        try:
+            changed = list(files)
+            if since is not None:
+                changed.extend(cli_git_changed_files(since, project_root))
+
+            index = ImportGraphIndex(project_root)
+            rescanned = index.update()
+            cli_logger.debug(
+                f"Updated the import-graph index '{index.path}' "
+                f"({rescanned} rescanned)"
+            )
+            affected = index.affected(changed)
+
+            packages = []
+            manifest = workspace or os.path.join(
+                project_root, WORKSPACE_MANIFEST_NAME
+            )
+            if workspace is not None or os.path.exists(manifest):
+                ws = Workspace.load(manifest)
+                affected_set = set(affected)
+                packages = [
+                    name for name in ws.order()
+                    if affected_set.intersection(
+                        os.path.realpath(f)
+                        for f in ws.packages[name].collect_files()
+                    )
+                ]
+        except (GraphError, WorkspaceError) as e:
+            cli_logger.error(str(e))
+            if structured is not None:
+                structured.emit_summary("affected", success=False)
+                structured.close()
+            exit(1)
+
+        root = index.project_root
+        if structured is not None:
+            for file in affected:
+                structured.emit("file", file=os.path.relpath(file, root))
+            for name in packages:
+                structured.emit("package", name=name)
+            structured.emit_summary(
+                "affected",
+                success=True,
+                changed=len(changed),
+                files=len(affected),
+                packages=len(packages)
+            )
+            structured.close()
+            return
+
+        for file in affected:
+            get_console().print(os.path.relpath(file, root), highlight=False)
+        for name in packages:
+            get_console().print(f"package: {name}", highlight=False)
+        get_console().print(
+            f"[bold bright_cyan]{len(affected)} of {len(index.files)} files "
+            f"and {len(packages)} packages are affected by {len(changed)} "
+            "changed files[/bold bright_cyan]",
+            highlight=False
+        )
+
 
 @click.group(invoke_without_command=True)
 @click.option("--keep-open", is_flag=True)
@@ -54,6 +325,14 @@ class ParaProjCLI:
     is_flag=True,
     help="Prints the version of the compiler"
 )
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(OUTPUT_FORMATS),
+    default="text",
+    help="The format of the output. Using 'json' or 'ndjson' the results "
+         "are written as JSON records onto stdout"
+)
 @click.option(
     "--help",
     is_flag=True,
@@ -74,11 +353,135 @@ def cli_paraproj(*args, **kwargs):
     ParaProjCLI.cli(*args, **kwargs)
 
 
+@cli_paraproj.command(name="build")
+@click.option("--keep-open", is_flag=True)
+@click.argument("packages", nargs=-1, type=str)
+@click.option(
+    "-w",
+    "--workspace",
+    type=str,
+    default=None,
+    help="The workspace manifest or the folder containing it. Defaults to "
+         "'./para-workspace.json'"
+)
+@click.option(
+    "--encoding",
+    default="utf-8",
+    type=str,
+    help="The encoding the files should be opened with"
+)
+@click.option(
+    "-l",
+    "--log",
+    type=str,
+    default=cli_format_default("./paraproj.log"),
+    prompt=cli_create_prompt(
+        "Specify where the console .log file should be created"),
+    help="Path of the output .log file where program messages should be logged"
+         ". If set to None it will not use a log file and only use the console"
+         " as the output method"
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=None,
+    help="The amount of packages that should be built in parallel. Defaults "
+         "to the amount of CPUs"
+)
+@click.option(
+    "--artifact-store/--no-artifact-store",
+    type=bool,
+    default=True,
+    help="If set the outputs are stored in the local artifact store, so "
+         "packages built before with the same inputs are restored from it"
+)
+@click.option(
+    "--debug/--no-debug",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="If set the compiler will add additional debug information"
+)
+@cli_abortable(reraise=False)
+def paraproj_build(*args, **kwargs):
+    """ Builds the packages of a Para workspace """
+    ParaProjCLI.paraproj_build(*args, **kwargs)
+
+
+@cli_paraproj.command(name="graph")
+@click.option("--keep-open", is_flag=True)
+@click.option(
+    "-p",
+    "--project-root",
+    type=str,
+    default=None,
+    help="The root folder of the project. Defaults to the current working "
+         "directory"
+)
+@click.option(
+    "--debug/--no-debug",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="If set additional debug information will be logged"
+)
+@cli_abortable(reraise=False)
+def paraproj_graph(*args, **kwargs):
+    """ Updates the import-graph index and prints the includes """
+    ParaProjCLI.paraproj_graph(*args, **kwargs)
+
+
+@cli_paraproj.command(name="affected")
+@click.option("--keep-open", is_flag=True)
+@click.argument("files", nargs=-1, type=str)
+@click.option(
+    "--since",
+    type=str,
+    default=None,
+    help="A git revision. Files changed since the revision, including "
+         "uncommitted and untracked files, are added to the changed files"
+)
+@click.option(
+    "-p",
+    "--project-root",
+    type=str,
+    default=None,
+    help="The root folder of the project. Defaults to the current working "
+         "directory"
+)
+@click.option(
+    "-w",
+    "--workspace",
+    type=str,
+    default=None,
+    help="The workspace manifest used for mapping the files to packages. "
+         "Defaults to 'para-workspace.json' in the project root if it exists"
+)
+@click.option(
+    "--debug/--no-debug",
+    is_flag=True,
+    type=bool,
+    default=False,
+    help="If set additional debug information will be logged"
+)
+@cli_abortable(reraise=False)
+def paraproj_affected(*args, **kwargs):
+    """ Prints the files and packages affected by changes """
+    ParaProjCLI.paraproj_affected(*args, **kwargs)
+
+
 def cli_run() -> NoReturn:
     """
     Runs the cli and parses the input args.
 
     This function will **not** return and close the application itself.
     """
+    # Enabling colouring support for the console as a backup option
+    cli_init_colorama()
+    # Keeping the order of the output across stdout and stderr, so
+    # subcommands writing onto stderr never appear before the banner
+    cli_install_output_multiplexer()
+
     cli_init_rich_console()
     cli_paraproj()
@@ -0,0 +1,397 @@
+# coding=utf-8
+"""
+Compile server, which keeps the compiler warm and handles compile and
+syntax-check requests of CLI clients over a local Unix domain socket.
+
+Messages are exchanged as newline-delimited JSON objects. A client sends a
+single request and receives a stream of messages, which is always ended by a
+message of the type 'end' or 'error'.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union, Iterator, List, Dict, Any
+
+from . import __version__
+from .build import BuildUnitResult
+from .logging import cli_get_rich_console as get_console
+from .syntax_check import SyntaxCheckResult
+
+__all__ = [
+    "ParaServerError",
+    "ParaServer",
+    "ParaServerClient",
+    "cli_get_server_socket_path",
+    "cli_connect_server",
+]
+
+
+class ParaServerError(RuntimeError):
+    """ Exception raised if the server failed to handle a request """
+
+
+def cli_get_server_socket_path() -> Path:
+    """
+    Returns the path of the server socket. This can be overwritten using the
+    environment variable 'PARA_SERVER_SOCKET', else a user specific socket in
+    the runtime or temporary directory is used.
+    """
+    if os.environ.get("PARA_SERVER_SOCKET"):
+        return Path(os.environ["PARA_SERVER_SOCKET"])
+    elif os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(os.environ["XDG_RUNTIME_DIR"]) / "para-server.sock"
+    else:
+        uid = os.getuid() if hasattr(os, "getuid") else "user"
+        return Path(tempfile.gettempdir()) / f"para-server-{uid}.sock"
+
+
+def _get_versions() -> Dict[str, str]:
+    from .utils import cli_get_base_version
+
+    return {"version": __version__, "base_version": cli_get_base_version()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """ Handles a single request of a client """
+    server: ParaServer
+
+    def send(self, **message: Any) -> None:
+        """ Sends the message to the client """
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def handle(self):
+        """ Reads and dispatches the request """
+        start = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.readline())
+            command = request.get("command")
+        except ValueError:
+            return self.send(type="error", msg="Received an invalid request")
+
+        versions = _get_versions()
+        if any(request.get(k) != v for k, v in versions.items()):
+            return self.send(
+                type="error",
+                msg="The version of the client does not match the server",
+                **versions
+            )
+
+        try:
+            if command == "ping":
+                self.send(type="end", success=True, pid=os.getpid())
+            elif command == "shutdown":
+                self.send(type="end", success=True)
+                self.server.request_shutdown()
+            elif command == "syntax-check":
+                self.handle_syntax_check(request)
+            elif command == "compile":
+                self.handle_compile(request)
+            else:
+                self.send(type="error", msg=f"Unknown command '{command}'")
+        except (BrokenPipeError, ConnectionResetError):
+            return  # The client disconnected
+        except Exception as e:
+            self.send(type="error", msg=f"{type(e).__name__}: {e}")
+
+        get_console().print(
+            f"[bright_cyan]Handled '{command}' request in "
+            f"{time.perf_counter() - start:.3f}s[/bright_cyan]",
+            highlight=False
+        )
+
+    def handle_syntax_check(self, request: Dict[str, Any]) -> None:
+        """ Runs the syntax check and sends the result of every file """
+        from .remote import cli_get_remote_cache
+        from .syntax_check import cli_run_syntax_check, SyntaxCheckCache
+
+        results = cli_run_syntax_check(
+            request["files"],
+            request["encoding"],
+            request.get("jobs"),
+            request.get("debug", False),
+            cache=SyntaxCheckCache() if request.get("cache") else None,
+            streaming=request.get("streaming", False),
+            remote=cli_get_remote_cache(request.get("remote_cache"))
+            if request.get("cache") else None
+        )
+        success = True
+        for result in results:
+            self.send(
+                type="result",
+                file=result.file,
+                diagnostics=result.diagnostics,
+                duration=result.duration,
+                cached=result.cached
+            )
+            success = success and result.success
+        self.send(type="end", success=success)
+
+    def handle_compile(self, request: Dict[str, Any]) -> None:
+        """ Runs the compilation and sends the result of every unit """
+        from .build import cli_run_build
+        from .remote import cli_get_remote_cache
+        from .store import ArtifactStore
+
+        artifact_store = request.get("artifact_store", True)
+        results = cli_run_build(
+            request["files"],
+            request["encoding"],
+            request["build_path"],
+            request["dist_path"],
+            project_root=request["project_root"],
+            jobs=request.get("jobs"),
+            debug=request.get("debug", False),
+            store=ArtifactStore() if artifact_store else None,
+            remote=cli_get_remote_cache(request.get("remote_cache"))
+            if artifact_store else None
+        )
+        success = True
+        for result in results:
+            self.send(
+                type="result",
+                file=result.file,
+                diagnostics=result.diagnostics,
+                duration=result.duration,
+                success=result.success,
+                skipped=result.skipped,
+                restored=result.restored
+            )
+            success = success and result.success
+        self.send(type="end", success=success)
+
+
+def _is_socket_in_use(socket_path: Path) -> bool:
+    """
+    Returns True if a process is listening on the socket. A busy server or
+    one of another version does not answer a ping in time, so only a refused
+    connection or a missing socket mark the socket as unused.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1.0)
+        try:
+            sock.connect(str(socket_path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+        except OSError:
+            # E.g. the connection timed out, since the backlog is full
+            return True
+        return True
+
+
+# Unix domain sockets are not available on every platform (e.g. Windows),
+# where this module must still be importable, but the server can not start
+if hasattr(socket, "AF_UNIX"):
+    _BaseServer = socketserver.UnixStreamServer
+else:  # pragma: no cover
+    _BaseServer = socketserver.BaseServer
+
+
+class ParaServer(_BaseServer):
+    """
+    Server keeping the runtime compiler warm and handling the requests of
+    clients one after another
+    """
+
+    def __init__(self, socket_path: Union[str, PathLike, Path] = None):
+        """
+        :param socket_path: The path of the socket. If None the default from
+         'cli_get_server_socket_path()' is used
+        :raises ParaServerError: If another server is already running or Unix
+         domain sockets are not available
+        """
+        from . import cli_get_runtime_compiler
+
+        if not hasattr(socket, "AF_UNIX"):  # pragma: no cover
+            raise ParaServerError(
+                "The compile server requires Unix domain sockets, which are "
+                "not available on this platform"
+            )
+        self.socket_path = Path(socket_path or cli_get_server_socket_path())
+        if _is_socket_in_use(self.socket_path):
+            raise ParaServerError(
+                f"A server is already running on '{self.socket_path}'"
+            )
+        elif self.socket_path.exists():
+            self.socket_path.unlink()  # Stale socket of a crashed server
+
+        # Creating the compiler and warming up the parser
+        cli_get_runtime_compiler()
+        self._shutdown_requested = False
+        super().__init__(str(self.socket_path), _RequestHandler)
+        os.chmod(self.socket_path, 0o600)
+
+    def request_shutdown(self) -> None:
+        """ Stops the server after the current request """
+        self._shutdown_requested = True
+
+    def serve(self) -> None:
+        """ Handles requests until a shutdown was requested """
+        try:
+            while not self._shutdown_requested:
+                self.handle_request()
+        finally:
+            self.server_close()
+
+    def server_close(self) -> None:
+        """ Closes the server and removes the socket """
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            ...
+
+
+class ParaServerClient:
+    """ Client sending requests to a running compile server """
+
+    def __init__(
+            self,
+            socket_path: Union[str, PathLike, Path] = None,
+            timeout: Optional[float] = None
+    ):
+        """
+        :param socket_path: The path of the socket. If None the default from
+         'cli_get_server_socket_path()' is used
+        :param timeout: Timeout in seconds for connecting and receiving
+        """
+        self.socket_path = Path(socket_path or cli_get_server_socket_path())
+        self.timeout = timeout
+
+    def request(self, command: str, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Sends the request and yields all received messages until the request
+        ended
+
+        :raises ConnectionError: If the server can not be reached
+        :raises ParaServerError: If the server failed to handle the request
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(str(self.socket_path))
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(
+                    {"command": command, **_get_versions(), **kwargs}
+                ).encode("utf-8") + b"\n")
+                stream.flush()
+
+                for line in stream:
+                    message = json.loads(line)
+                    if message["type"] == "error":
+                        raise ParaServerError(message["msg"])
+                    yield message
+                    if message["type"] == "end":
+                        return
+        raise ConnectionError("The server closed the connection unexpectedly")
+
+    def ping(self) -> bool:
+        """ Returns True if the server is running and compatible """
+        try:
+            for _ in self.request("ping"):
+                ...
+        except (OSError, ParaServerError, ValueError):
+            return False
+        return True
+
+    def shutdown(self) -> None:
+        """ Stops the server """
+        for _ in self.request("shutdown"):
+            ...
+
+    def syntax_check(
+            self,
+            files: List[str],
+            encoding: str,
+            jobs: Optional[int] = None,
+            debug: bool = False,
+            cache: bool = True,
+            streaming: bool = False,
+            remote_cache: Optional[str] = None
+    ) -> Iterator[SyntaxCheckResult]:
+        """
+        Runs the syntax check on the server and yields the results in the
+        order of the passed files
+        """
+        messages = self.request(
+            "syntax-check",
+            files=[os.path.abspath(f) for f in files],
+            encoding=encoding,
+            jobs=jobs,
+            debug=debug,
+            cache=cache,
+            streaming=streaming,
+            remote_cache=remote_cache
+        )
+        results = (m for m in messages if m["type"] == "result")
+        for file, message in zip(files, results):
+            yield SyntaxCheckResult(
+                file,
+                [(int(level), msg) for level, msg in message["diagnostics"]],
+                message["duration"],
+                cached=message["cached"]
+            )
+
+    def compile(
+            self,
+            files: List[str],
+            encoding: str,
+            build_path: Union[str, PathLike, Path],
+            dist_path: Union[str, PathLike, Path],
+            project_root: Union[str, PathLike, Path] = None,
+            jobs: Optional[int] = None,
+            debug: bool = False,
+            artifact_store: bool = True,
+            remote_cache: Optional[str] = None
+    ) -> Iterator[BuildUnitResult]:
+        """
+        Runs the compilation on the server and yields the result of every
+        unit once it finished (see 'cli_run_build()')
+        """
+        messages = self.request(
+            "compile",
+            files=[os.path.abspath(f) for f in files],
+            encoding=encoding,
+            build_path=os.path.abspath(build_path),
+            dist_path=os.path.abspath(dist_path),
+            project_root=os.path.abspath(project_root or os.getcwd()),
+            jobs=jobs,
+            debug=debug,
+            artifact_store=artifact_store,
+            remote_cache=remote_cache
+        )
+        for message in messages:
+            if message["type"] == "result":
+                yield BuildUnitResult(
+                    message["file"],
+                    [(int(lvl), msg) for lvl, msg in message["diagnostics"]],
+                    message["duration"],
+                    success=message["success"],
+                    skipped=message["skipped"],
+                    restored=message["restored"]
+                )
+
+
+def cli_connect_server(
+        socket_path: Union[str, PathLike, Path] = None
+) -> Optional[ParaServerClient]:
+    """
+    Returns a client for the compile server or None if no compatible server
+    is running. Without a socket file this only costs a single stat.
+    """
+    if not hasattr(socket, "AF_UNIX"):  # pragma: no cover
+        return None
+
+    client = ParaServerClient(socket_path, timeout=1.0)
+    if not client.socket_path.exists() or not client.ping():
+        return None
+
+    # Requests itself may take arbitrarily long
+    client.timeout = None
+    return client
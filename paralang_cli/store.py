@@ -0,0 +1,477 @@
+# coding=utf-8
+"""
+Content-addressed artifact store of the generated outputs. Every file a
+translation unit writes into the build and dist folder is stored once as a
+blob named after its sha256 digest, while the files inside the build and dist
+folder are only views of the blobs, created using reflinks (copy-on-write
+clones), hard-links or, if neither is supported, copies.
+
+The outputs of every compiled unit are recorded under its input hash, so
+units that were already compiled once (e.g. before switching to another
+branch and back) are restored by linking their outputs instead of compiling
+them again.
+
+Blobs are reference-counted by the recorded units and the build folders
+using them. Unreferenced blobs are removed by 'ArtifactStore.prune()', which
+evicts the least recently used units once the store exceeds its maximum
+size. Builds only prune the store if the blobs they added exceed the
+estimated size (see 'ParaCLICache.prune_if_needed()').
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from collections import Counter
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union, List, Tuple, Dict, Any, Iterable
+
+from .cache import ParaCLICache, cli_hash_file
+
+__all__ = [
+    "LINK_MODES",
+    "DEFAULT_ARTIFACT_STORE_MAX_SIZE",
+    "ArtifactStore",
+    "cli_link_file",
+]
+
+# Modes used for creating the files of a view, in the order they are tried
+LINK_MODES: Tuple[str, ...] = ("reflink", "hardlink", "copy")
+# Default maximum size in bytes of the artifact store (1 GiB)
+DEFAULT_ARTIFACT_STORE_MAX_SIZE: int = 1024 * 1024 * 1024
+# Time in seconds, in which added blobs are never removed by prune(), since
+# the units of a concurrent build referencing them might not be recorded yet
+_PRUNE_GRACE_PERIOD: int = 60 * 60
+
+# ioctl request of Linux for cloning a file (FICLONE)
+_FICLONE: int = 0x40049409
+
+# Link modes, which are known to fail between two devices
+_unsupported_modes: Dict[Tuple[int, int], set] = {}
+
+# Outputs of a unit, keyed by the output folder ('build' or 'dist') and the
+# relative path of the file
+UnitOutputs = Dict[str, Dict[str, str]]
+
+
+def _reflink(src: Path, dest: Path) -> None:
+    """ Clones the file using copy-on-write, if the filesystem supports it """
+    if sys.platform != "linux":
+        raise OSError("Reflinks are only supported on Linux")
+
+    import fcntl
+
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.unlink(dest)
+            raise
+    shutil.copymode(src, dest)
+
+
+def cli_link_file(
+        src: Union[str, PathLike, Path],
+        dest: Union[str, PathLike, Path],
+        mode: Optional[str] = None
+) -> str:
+    """
+    Atomically replaces the destination with a link of the source file. The
+    link is created next to the destination first and then moved, so readers
+    never see a missing or partially written file.
+
+    :param src: The file that should be linked
+    :param dest: The path of the link
+    :param mode: The link mode. If None, the modes of LINK_MODES are tried
+     in order
+    :returns: The link mode that was used
+    """
+    src, dest = Path(src), Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    devices = (os.stat(src).st_dev, os.stat(dest.parent).st_dev)
+    unsupported = _unsupported_modes.setdefault(devices, set())
+
+    modes = [mode] if mode else [m for m in LINK_MODES if m not in unsupported]
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".tmp-")
+    os.close(fd)
+    os.unlink(tmp)
+    try:
+        for current in modes:
+            try:
+                if current == "reflink":
+                    _reflink(src, Path(tmp))
+                elif current == "hardlink":
+                    os.link(src, tmp)
+                else:
+                    shutil.copy2(src, tmp)
+            except OSError:
+                if current == modes[-1]:
+                    raise
+                unsupported.add(current)
+                continue
+            os.replace(tmp, dest)
+            return current
+    finally:
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+    raise OSError(f"Failed to link '{src}' to '{dest}'")
+
+
+class ArtifactStore(ParaCLICache):
+    """
+    Content-addressed store of the outputs of translation units, which are
+    linked into the build and dist folder.
+
+    Blobs are read-only and never modified after they were added, so files
+    in a view must be replaced instead of being written in-place.
+    """
+
+    def __init__(self, *args, link_mode: Optional[str] = None, **kwargs):
+        """
+        :param link_mode: The mode used for creating the files of views. If
+         None, the first mode of LINK_MODES supported by the filesystem is
+         used
+        """
+        if "max_size" not in kwargs:
+            kwargs["max_size"] = int(os.environ.get(
+                "PARA_ARTIFACT_STORE_MAX_SIZE",
+                DEFAULT_ARTIFACT_STORE_MAX_SIZE
+            ))
+        super().__init__("artifacts", *args, **kwargs)
+        self._link_mode = link_mode
+
+    @property
+    def _blobs_path(self) -> Path:
+        return self.path / "blobs"
+
+    @property
+    def _units_path(self) -> Path:
+        return self.path / "units"
+
+    @property
+    def _views_path(self) -> Path:
+        return self.path / "views"
+
+    def _entry_path(self, key: str) -> Path:
+        return self._blobs_path / key[:2] / key
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """ Returns the last access time, size and path of all blobs """
+        entries = []
+        if not self._blobs_path.exists():
+            return entries
+
+        for root, _, files in os.walk(self._blobs_path):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                path = Path(root) / name
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def create_staging_dir(self) -> Path:
+        """
+        Creates a temporary folder inside the store, which outputs can be
+        written to before they are added. Files are then moved into the store
+        without copying them
+        """
+        tmp = self.path / "tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(dir=tmp))
+
+    def add(self, file: Union[str, PathLike, Path], move: bool = False) -> str:
+        """
+        Adds the file to the store, unless a blob with the same content
+        already exists.
+
+        :param file: The file that should be added
+        :param move: If set to True the file is moved into the store, which
+         requires it to be on the same filesystem, else it is copied
+        :returns: The digest of the blob
+        """
+        digest = cli_hash_file(file)
+        blob = self._entry_path(digest)
+        try:
+            age = time.time() - blob.stat().st_mtime
+        except FileNotFoundError:
+            age = None
+        if age is not None:
+            # Existing blobs might be unreferenced, so they are marked as
+            # added to protect them from a concurrent prune()
+            if age > _PRUNE_GRACE_PERIOD / 2:
+                os.utime(blob)
+            return digest
+
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=blob.parent, prefix=".tmp-")
+        os.close(fd)
+        try:
+            if move:
+                os.replace(file, tmp)
+            else:
+                shutil.copy(file, tmp)
+            # Blobs are shared by all views, so they must not be modified
+            st = os.stat(tmp)
+            os.chmod(tmp, stat.S_IMODE(st.st_mode) & ~(
+                stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+            ))
+            os.utime(tmp)
+            os.replace(tmp, blob)
+            self._added += st.st_size
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return digest
+
+    def add_bytes(self, data: bytes) -> str:
+        """
+        Adds the content to the store, unless a blob with the same content
+        already exists.
+
+        :returns: The digest of the blob
+        """
+        tmp = self.path / "tmp"
+        tmp.mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=tmp)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            return self.add(path, move=True)
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def blob_path(self, digest: str) -> Optional[Path]:
+        """ Returns the path of the blob or None if it does not exist """
+        path = self._entry_path(digest)
+        return path if path.exists() else None
+
+    def read_blob(self, digest: str) -> Optional[bytes]:
+        """ Returns the content of the blob or None if it does not exist """
+        try:
+            return self._entry_path(digest).read_bytes()
+        except OSError:
+            return None
+
+    def add_folder(
+            self,
+            folder: Union[str, PathLike, Path],
+            move: bool = False
+    ) -> Dict[str, str]:
+        """
+        Adds all files of the folder to the store.
+
+        :returns: The digests of the files keyed by their relative path,
+         using forward slashes
+        """
+        folder = Path(folder)
+        files = {}
+        if not folder.is_dir():
+            return files
+
+        for root, _, names in os.walk(folder):
+            for name in names:
+                path = Path(root) / name
+                rel = path.relative_to(folder).as_posix()
+                files[rel] = self.add(path, move)
+        return files
+
+    def checkout(
+            self,
+            files: Dict[str, str],
+            folder: Union[str, PathLike, Path],
+            previous: Optional[Dict[str, str]] = None
+    ) -> int:
+        """
+        Creates the view of the passed files inside the folder. Files whose
+        digest did not change compared to the previous view are kept, while
+        files of the previous view that are no longer part of it are removed.
+
+        :param files: The digests of the files keyed by their relative path
+        :param folder: The folder of the view
+        :param previous: The files of the previous view inside the folder
+        :returns: The amount of linked files
+        """
+        folder = Path(folder)
+        previous = previous or {}
+        for rel in set(previous) - set(files):
+            try:
+                os.unlink(folder / rel)
+            except OSError:
+                ...
+
+        linked = 0
+        for rel, digest in files.items():
+            dest = folder / rel
+            if previous.get(rel) == digest and dest.exists():
+                continue
+            cli_link_file(self._entry_path(digest), dest, self._link_mode)
+            linked += 1
+        return linked
+
+    def _unit_path(self, key: str) -> Path:
+        return self._units_path / key[:2] / f"{key}.json"
+
+    def store_unit(
+            self,
+            key: str,
+            outputs: UnitOutputs,
+            diagnostics: List[Tuple[int, str]]
+    ) -> None:
+        """
+        Records the outputs and diagnostics of a unit under its input hash
+        """
+        self._write_json(self._unit_path(key), {
+            "outputs": outputs, "diagnostics": diagnostics
+        })
+
+    def load_unit(
+            self,
+            key: str
+    ) -> Optional[Tuple[UnitOutputs, List[Tuple[int, str]]]]:
+        """
+        Returns the outputs and diagnostics of the unit recorded under the
+        input hash, or None if there is no entry or a blob is missing. A hit
+        will mark the entry as recently used.
+        """
+        path = self._unit_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            outputs = {
+                str(folder): {str(k): str(v) for k, v in files.items()}
+                for folder, files in data["outputs"].items()
+            }
+            diagnostics = [
+                (int(level), str(msg)) for level, msg in data["diagnostics"]
+            ]
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+        if not all(
+                self._entry_path(digest).exists()
+                for files in outputs.values() for digest in files.values()
+        ):
+            return None
+        return outputs, diagnostics
+
+    def update_view(
+            self,
+            manifest: Union[str, PathLike, Path],
+            digests: Iterable[str]
+    ) -> None:
+        """
+        Records the blobs used by a build folder. The view is dropped once
+        the manifest of the build folder no longer exists.
+
+        :param manifest: The manifest of the build folder
+        :param digests: The digests of all files linked into the build and
+         dist folder of the build
+        """
+        manifest = os.path.abspath(manifest)
+        name = hashlib.sha256(manifest.encode("utf-8", "surrogateescape"))
+        self._write_json(self._views_path / f"{name.hexdigest()}.json", {
+            "manifest": manifest, "digests": sorted(set(digests))
+        })
+
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(tmp, path)
+        except OSError:
+            # Failing to write the store should never break a build
+            ...
+
+    @staticmethod
+    def _read_digests(path: Path, key: str) -> Optional[List[str]]:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if key == "outputs":
+                return [
+                    d for files in data["outputs"].values()
+                    for d in files.values()
+                ]
+            if not os.path.exists(data["manifest"]):
+                return None
+            return list(data["digests"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    def prune(self) -> int:
+        """
+        Removes the least recently used units until the blobs only they
+        reference fit into the maximum size, drops the views of removed build
+        folders and removes all blobs that are no longer referenced.
+
+        Blobs added within the grace period are kept, since the units of a
+        concurrent build referencing them might not be recorded yet.
+
+        :returns: The amount of removed blobs
+        """
+        refs: Counter = Counter()
+        units: List[Tuple[float, Path, List[str]]] = []
+        for folder, key in ((self._views_path, "digests"),
+                            (self._units_path, "outputs")):
+            if not folder.exists():
+                continue
+            for root, _, names in os.walk(folder):
+                for name in names:
+                    path = Path(root) / name
+                    digests = self._read_digests(path, key)
+                    if digests is None:
+                        path.unlink(missing_ok=True)
+                        continue
+                    refs.update(set(digests))
+                    if key == "outputs":
+                        units.append((path.stat().st_mtime, path, digests))
+
+        blobs = {
+            path.name: (mtime, size, path)
+            for mtime, size, path in self._entries()
+        }
+        total = sum(size for _, size, _ in blobs.values())
+        for _, path, digests in sorted(units, key=lambda i: i[0]):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            for digest in set(digests):
+                refs[digest] -= 1
+                if refs[digest] <= 0 and digest in blobs:
+                    total -= blobs[digest][1]
+
+        removed = 0
+        size = 0
+        now = time.time()
+        for digest, (mtime, blob_size, path) in blobs.items():
+            if refs[digest] <= 0 and now - mtime >= _PRUNE_GRACE_PERIOD:
+                try:
+                    path.unlink()
+                except OSError:
+                    size += blob_size
+                    continue
+                removed += 1
+            else:
+                size += blob_size
+
+        stats = self._read_stats()
+        stats["size"] = size
+        self._write_stats(stats)
+        self._added = 0
+        return removed
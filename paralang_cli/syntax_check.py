@@ -0,0 +1,409 @@
+# coding=utf-8
+""" Syntax-Check implementation for multiple files using a worker pool """
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from os import PathLike
+from pathlib import Path
+from typing import (List, Tuple, Union, Iterable, Iterator, Optional,
+                    TYPE_CHECKING)
+
+from .__main__ import cli_get_runtime_compiler
+from .cache import (ParaCLICache, cli_hash_file, cli_get_key_path,
+                    cli_mask_path, cli_unmask_path)
+from .logging import (cli_get_rich_console as get_console, cli_get_logger,
+                      cli_capture_compiler_logs, ParaCLICollectHandler)
+from .profiling import cli_is_profiling
+
+if TYPE_CHECKING:
+    from .remote import RemoteCache
+
+__all__ = [
+    "PARA_FILE_ENDINGS",
+    "SyntaxCheckResult",
+    "SyntaxCheckCache",
+    "cli_collect_files",
+    "cli_syntax_check_file",
+    "cli_run_syntax_check",
+    "cli_log_syntax_check_result",
+]
+
+# File endings of Para source files, which will be collected when a directory
+# is passed. Explicitly passed files will always be checked.
+PARA_FILE_ENDINGS: Tuple[str, ...] = (".para", ".parah", ".ph")
+
+
+class SyntaxCheckResult:
+    """
+    Result of a syntax check for a single file, which stores the diagnostics
+    that were logged while validating the file
+    """
+
+    def __init__(
+            self,
+            file: str,
+            diagnostics: List[Tuple[int, str]],
+            duration: float,
+            cached: bool = False
+    ):
+        """
+        :param file: The file that was checked
+        :param diagnostics: The logged records as a tuple of level and message
+        :param duration: The time in seconds the check took
+        :param cached: If set to True the result was loaded from the cache
+        """
+        self._file = file
+        self._diagnostics = diagnostics
+        self._duration = duration
+        self._cached = cached
+
+    @property
+    def file(self) -> str:
+        """ The file that was checked """
+        return self._file
+
+    @property
+    def diagnostics(self) -> List[Tuple[int, str]]:
+        """ The logged records as a tuple of level and message """
+        return self._diagnostics
+
+    @property
+    def duration(self) -> float:
+        """ The time in seconds the check took """
+        return self._duration
+
+    @property
+    def cached(self) -> bool:
+        """ Returns True if the result was loaded from the cache """
+        return self._cached
+
+    @property
+    def errors(self) -> int:
+        """ Amount of errors (including critical errors) for this file """
+        return sum(
+            1 for level, _ in self.diagnostics if level >= logging.ERROR
+        )
+
+    @property
+    def warnings(self) -> int:
+        """ Amount of warnings for this file """
+        return sum(
+            1 for level, _ in self.diagnostics if level == logging.WARNING
+        )
+
+    @property
+    def success(self) -> bool:
+        """ Returns True if no errors were found """
+        return self.errors == 0
+
+
+class SyntaxCheckCache(ParaCLICache):
+    """
+    Cache storing the diagnostics of syntax checks. Entries are keyed by the
+    content of the file, its path relative to the working directory, the
+    encoding, the version of 'paralang_base' and whether debug messages were
+    collected, so that every change that could alter the result creates a
+    new entry.
+
+    The absolute path of the file is replaced by a placeholder in the stored
+    diagnostics, so entries can be shared between checkouts in different
+    folders (see 'cli_mask_path()').
+    """
+
+    def __init__(self, *args, **kwargs):
+        from .utils import cli_get_base_version
+
+        self._version = cli_get_base_version()
+        super().__init__("syntax-check", *args, **kwargs)
+
+    def create_key(
+            self,
+            file: str,
+            encoding: str,
+            debug: bool = False
+    ) -> Optional[str]:
+        """
+        Creates the key for the passed file.
+
+        :returns: The key or None if the file can not be read
+        """
+        try:
+            return cli_hash_file(
+                file,
+                # The path is included, since diagnostics contain the path
+                cli_get_key_path(file, os.getcwd()),
+                encoding,
+                self._version,
+                str(debug)
+            )
+        except OSError:
+            return None
+
+    def load(self, key: str, file: str) -> Optional[SyntaxCheckResult]:
+        """ Loads the result for the passed key or returns None """
+        start = time.perf_counter()
+        data = self.get(key)
+        if data is None:
+            return None
+
+        try:
+            diagnostics = [(int(i[0]), str(i[1])) for i in json.loads(data)]
+        except (ValueError, TypeError, IndexError):
+            return None  # Corrupted entries are treated as a miss
+        return SyntaxCheckResult(
+            file,
+            cli_unmask_path(diagnostics, os.path.abspath(file)),
+            time.perf_counter() - start,
+            cached=True
+        )
+
+    @staticmethod
+    def dump(result: SyntaxCheckResult) -> bytes:
+        """ Returns the serialised diagnostics of the passed result """
+        return json.dumps(
+            cli_mask_path(result.diagnostics, os.path.abspath(result.file))
+        ).encode("utf-8")
+
+    def store(self, key: str, result: SyntaxCheckResult) -> None:
+        """ Stores the diagnostics of the passed result """
+        self.put(key, self.dump(result))
+
+
+def cli_collect_files(
+        paths: Iterable[Union[str, PathLike, Path]]
+) -> List[str]:
+    """
+    Collects the files that should be checked from the passed paths, which
+    may be files, directories or glob patterns. Directories are searched
+    recursively for files with an ending in PARA_FILE_ENDINGS.
+
+    Duplicates are removed, while the order of the passed paths is kept.
+
+    :returns: The list of files as strings
+    """
+    def _expand(path: str) -> Iterator[str]:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(PARA_FILE_ENDINGS):
+                        yield os.path.join(root, name)
+        elif not os.path.exists(path) and glob.has_magic(path):
+            for match in sorted(glob.glob(path, recursive=True)):
+                yield from _expand(match)
+        else:
+            # Non-existing files are passed through, so the check itself
+            # reports them as an error
+            yield path
+
+    collected = {}
+    for p in paths:
+        for file in _expand(str(p)):
+            collected.setdefault(os.path.normpath(file), None)
+    return list(collected)
+
+
+def cli_syntax_check_file(
+        file: str,
+        encoding: str,
+        debug: bool = False,
+        streaming: bool = False
+) -> SyntaxCheckResult:
+    """
+    Runs the syntax check on a single file and collects the logged
+    diagnostics, instead of writing them onto the console.
+
+    This function is also used as the worker of the process pool, where every
+    worker process uses and keeps its own runtime compiler.
+
+    :param file: The file that should be checked
+    :param encoding: The encoding the file should be opened with
+    :param debug: If set to True debug messages will be collected as well
+    :param streaming: If set to True the file will be read in chunks using
+     the streaming ingestion (see 'paralang_cli.ingest')
+    """
+    import asyncio
+    from paralang_base import FailedToProcessError
+
+    collector = ParaCLICollectHandler()
+    level = logging.DEBUG if debug else logging.INFO
+    start = time.perf_counter()
+    with cli_capture_compiler_logs(collector, level) as base_logger:
+        try:
+            if streaming:
+                asyncio.run(_validate_syntax_streaming(file, encoding))
+            else:
+                asyncio.run(
+                    cli_get_runtime_compiler().validate_syntax(
+                        file, encoding, prefer_logging=True
+                    )
+                )
+        # FailedToProcess -> SyntaxError, which was already logged
+        except FailedToProcessError:
+            ...
+        # Invalid files or encodings should not stop the checks of other files
+        except Exception as e:
+            base_logger.error(f"Failed to check file '{file}': {e}")
+
+    return SyntaxCheckResult(
+        file, collector.diagnostics, time.perf_counter() - start
+    )
+
+
+async def _validate_syntax_streaming(file: str, encoding: str) -> None:
+    """
+    Streaming version of 'ParaCompiler.validate_syntax()', which logs the
+    same messages and raises the same exceptions, but reads the file using
+    'ParaCLISourceStream'
+    """
+    from paralang_base import FailedToProcessError
+    from paralang_base.compiler.compiler import logger
+    from paralang_base.exceptions import (LexerError, LinkerError,
+                                          ParaCompilerError,
+                                          ParaSyntaxErrorCollection)
+    from .ingest import ParaCLISourceStream
+
+    stream = ParaCLISourceStream.from_file(file, encoding)
+    try:
+        logger.info(f"Parsing file ({stream.fileName})")
+        await cli_get_runtime_compiler().parse(stream, prefer_logging=True)
+    except (LexerError, ParaSyntaxErrorCollection, LinkerError,
+            ParaCompilerError) as e:
+        raise FailedToProcessError(exc=e) from e
+
+    logger.info(
+        f"Successfully finished syntax-check for file {stream.fileName}"
+    )
+
+
+def cli_run_syntax_check(
+        files: List[str],
+        encoding: str,
+        jobs: Optional[int] = None,
+        debug: bool = False,
+        cache: Optional[SyntaxCheckCache] = None,
+        streaming: bool = False,
+        remote: Optional[RemoteCache] = None
+) -> Iterator[SyntaxCheckResult]:
+    """
+    Runs the syntax check for the passed files and yields the results in the
+    order of the passed files.
+
+    If more than one job is allowed and more than one file was passed, the
+    files are checked in a process pool, else they are checked inside the
+    current process using the runtime compiler.
+
+    :param files: The files that should be checked
+    :param encoding: The encoding the files should be opened with
+    :param jobs: The amount of worker processes. If None the amount of CPUs
+     will be used
+    :param debug: If set to True debug messages will be collected as well
+    :param cache: The cache that should be used to look up and store results.
+     If None every file will be checked
+    :param streaming: If set to True the files will be read in chunks using
+     the streaming ingestion, which keeps less copies of a file in memory
+    :param remote: The remote cache, which is looked up using a single batch
+     for the files missing in the cache. Results of checked files are
+     uploaded in the background. Requires a cache to be passed
+    """
+    if cache is None:
+        yield from _run_syntax_check(
+            files, encoding, jobs, debug, streaming
+        )
+        return
+
+    keys = {}
+    hits = {}
+    for file in files:
+        keys[file] = key = cache.create_key(file, encoding, debug)
+        if key is not None and (result := cache.load(key, file)):
+            hits[file] = result
+
+    missed = [f for f in files if f not in hits]
+    if remote is not None:
+        entries = remote.lookup(
+            "syntax-check", [keys[f] for f in missed if keys[f] is not None]
+        )
+        for file in missed:
+            if keys[file] in entries:
+                cache.put(keys[file], entries[keys[file]])
+                if result := cache.load(keys[file], file):
+                    hits[file] = result
+        missed = [f for f in missed if f not in hits]
+
+    misses = _run_syntax_check(
+        missed, encoding, jobs, debug, streaming
+    )
+    for file in files:
+        if file in hits:
+            yield hits[file]
+        else:
+            result = next(misses)
+            if keys[file] is not None:
+                cache.store(keys[file], result)
+                if remote is not None:
+                    remote.upload(
+                        "syntax-check", keys[file], cache.dump(result)
+                    )
+            yield result
+    cache.record_stats(len(hits), len(missed))
+    cache.prune_if_needed()
+
+
+def _run_syntax_check(
+        files: List[str],
+        encoding: str,
+        jobs: Optional[int],
+        debug: bool,
+        streaming: bool = False
+) -> Iterator[SyntaxCheckResult]:
+    """ Runs the syntax check for the passed files without using a cache """
+    if len(files) == 0:
+        return
+
+    workers = 1 if cli_is_profiling() else min(
+        jobs or os.cpu_count() or 1, len(files)
+    )
+    if workers <= 1:
+        for file in files:
+            yield cli_syntax_check_file(file, encoding, debug, streaming)
+        return
+
+    # Bigger chunks reduce the IPC overhead for large amounts of files
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(
+            cli_syntax_check_file,
+            files,
+            repeat(encoding),
+            repeat(debug),
+            repeat(streaming),
+            chunksize=chunksize
+        )
+
+
+def cli_log_syntax_check_result(result: SyntaxCheckResult) -> None:
+    """
+    Replays the diagnostics of the result through the CLI logger and prints
+    the warnings and errors of the file.
+
+    Requires the CLI logging to be initialised!
+    """
+    cli_logger = cli_get_logger()
+    for level, msg in result.diagnostics:
+        cli_logger.log(level, msg)
+
+    get_console().print(
+        f"[bold bright_cyan]{result.file}[/bold bright_cyan] - "
+        f"[bold yellow]{result.warnings} Warnings [/bold yellow]"
+        f"[bold red]{result.errors} Errors[/bold red] "
+        f"[white]({result.duration:.3f}s"
+        f"{', cached' if result.cached else ''})[/white]",
+        highlight=False
+    )
@@ -0,0 +1,640 @@
+# coding=utf-8
+"""
+Native C toolchain stage of the CLI, which compiles the generated C11 sources
+of the build folder in parallel using the system C compiler and links them
+into an executable inside the dist folder.
+
+The amount of parallel compiler processes is limited by '-j', or by the
+limits of a GNU make jobserver if the CLI is run inside a make recipe.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import PathLike
+from pathlib import Path
+from typing import List, Optional, Union, Iterator, Tuple, Set
+
+from .cache import ParaCLICache
+from .logging import cli_get_rich_console as get_console, cli_get_logger
+
+__all__ = [
+    "C_COMPILER_CANDIDATES",
+    "CToolchainError",
+    "CToolchain",
+    "DEFAULT_OBJECT_CACHE_MAX_SIZE",
+    "CUnitResult",
+    "ObjectCache",
+    "MakeJobServer",
+    "cli_get_job_limit",
+    "cli_collect_c_sources",
+    "cli_compile_c_units",
+    "cli_link_executable",
+    "cli_build_executable",
+    "cli_log_c_unit_result",
+]
+
+# C compilers that are searched for in the PATH if 'CC' is not set
+C_COMPILER_CANDIDATES: Tuple[str, ...] = ("cc", "gcc", "clang")
+
+# Name of the folder inside the build folder, which stores the object files
+_OBJECT_FOLDER: str = "obj"
+
+# Default maximum size in bytes of the object cache (512 MiB). Can be
+# overwritten using the environment variable 'PARA_OBJECT_CACHE_MAX_SIZE'
+DEFAULT_OBJECT_CACHE_MAX_SIZE: int = 512 * 1024 * 1024
+
+_MAKEFLAGS_JOBS_REGEX = re.compile(r"(?:^|\s)-j\s*(\d*)")
+_MAKEFLAGS_JOBSERVER_REGEX = re.compile(r"--jobserver-(?:auth|fds)=(\S+)")
+
+
+class CToolchainError(RuntimeError):
+    """ Exception raised if the C toolchain can not be used """
+
+
+class CToolchain:
+    """ The system C compiler and the flags used for compiling and linking """
+
+    def __init__(
+            self,
+            cc: str,
+            cflags: List[str],
+            ldflags: Optional[List[str]] = None
+    ):
+        """
+        :param cc: The path of the C compiler executable
+        :param cflags: The flags used for compiling a translation unit
+        :param ldflags: The flags used for linking the executable
+        """
+        self._cc = cc
+        self._cflags = cflags
+        self._ldflags = ldflags or []
+        self._identity: Optional[str] = None
+
+    @property
+    def cc(self) -> str:
+        """ The path of the C compiler executable """
+        return self._cc
+
+    @property
+    def cflags(self) -> List[str]:
+        """ The flags used for compiling a translation unit """
+        return self._cflags
+
+    @property
+    def ldflags(self) -> List[str]:
+        """ The flags used for linking the executable """
+        return self._ldflags
+
+    @property
+    def identity(self) -> str:
+        """
+        String identifying the compiler, which consists of the resolved path,
+        the size and modification time of the executable and its version
+        output. Computed once on first access.
+        """
+        if self._identity is None:
+            path = os.path.realpath(self._cc)
+            try:
+                stat = os.stat(path)
+                version = subprocess.run(
+                    [self._cc, "--version"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    errors="replace"
+                ).stdout
+            except OSError:
+                raise CToolchainError(f"Failed to run the C compiler '{path}'")
+            self._identity = \
+                f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\0{version}"
+        return self._identity
+
+    @classmethod
+    def detect(cls, debug: bool = False) -> CToolchain:
+        """
+        Detects the system C compiler. The compiler and flags can be
+        overwritten using the environment variables 'CC', 'CFLAGS' and
+        'LDFLAGS'.
+
+        :param debug: If set to True the units are compiled with debug
+         information and without optimisations
+        :raises CToolchainError: If no C compiler could be found
+        """
+        candidates = [os.environ["CC"]] if os.environ.get("CC") else \
+            C_COMPILER_CANDIDATES
+        for candidate in candidates:
+            cc = shutil.which(candidate)
+            if cc is not None:
+                break
+        else:
+            raise CToolchainError(
+                "Failed to find a C compiler. Install one of "
+                f"{', '.join(C_COMPILER_CANDIDATES)} or set 'CC'"
+            )
+
+        cflags = ["-std=c11", "-O0", "-g"] if debug else ["-std=c11", "-O2"]
+        return cls(
+            cc,
+            cflags + shlex.split(os.environ.get("CFLAGS", "")),
+            shlex.split(os.environ.get("LDFLAGS", ""))
+        )
+
+    def compile_command(
+            self,
+            source: Union[str, PathLike, Path],
+            obj: Union[str, PathLike, Path],
+            include_dir: Union[str, PathLike, Path]
+    ) -> List[str]:
+        """ Returns the command compiling the source into the object file """
+        return [
+            self.cc, *self.cflags, "-I", str(include_dir),
+            "-c", str(source), "-o", str(obj)
+        ]
+
+    def link_command(
+            self,
+            objects: List[Union[str, PathLike, Path]],
+            output: Union[str, PathLike, Path]
+    ) -> List[str]:
+        """ Returns the command linking the object files into an executable """
+        return [
+            self.cc, *map(str, objects), "-o", str(output), *self.ldflags
+        ]
+
+
+class CUnitResult:
+    """ Result of compiling a single C translation unit or of linking """
+
+    def __init__(
+            self,
+            source: str,
+            output: str,
+            duration: float,
+            success: bool,
+            messages: str = "",
+            cached: bool = False
+    ):
+        """
+        :param source: The compiled source file or the name of the stage
+        :param output: The created object file or executable
+        :param duration: The time in seconds the compiler took
+        :param success: If set to True the compiler finished successfully
+        :param messages: The warnings and errors printed by the compiler
+        :param cached: If set to True the object was restored from the cache
+        """
+        self._source = source
+        self._output = output
+        self._duration = duration
+        self._success = success
+        self._messages = messages
+        self._cached = cached
+
+    @property
+    def source(self) -> str:
+        """ The compiled source file or the name of the stage """
+        return self._source
+
+    @property
+    def output(self) -> str:
+        """ The created object file or executable """
+        return self._output
+
+    @property
+    def duration(self) -> float:
+        """ The time in seconds the compiler took """
+        return self._duration
+
+    @property
+    def success(self) -> bool:
+        """ Returns True if the compiler finished successfully """
+        return self._success
+
+    @property
+    def messages(self) -> str:
+        """ The warnings and errors printed by the compiler """
+        return self._messages
+
+    @property
+    def cached(self) -> bool:
+        """ Returns True if the object was restored from the cache """
+        return self._cached
+
+
+class ObjectCache(ParaCLICache):
+    """
+    Cache storing the object files of compiled C translation units, similar
+    to ccache. Entries are keyed by the content of the unit and all headers
+    it includes, the identity of the compiler and the compile flags, so that
+    byte-identical units are never compiled twice.
+
+    Paths are not part of the key, which allows hits across different
+    checkouts of the same program.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if "max_size" not in kwargs:
+            kwargs["max_size"] = int(os.environ.get(
+                "PARA_OBJECT_CACHE_MAX_SIZE", DEFAULT_OBJECT_CACHE_MAX_SIZE
+            ))
+        super().__init__("objects", *args, **kwargs)
+
+    @staticmethod
+    def create_key(
+            source: Path,
+            include_dir: Path,
+            toolchain: CToolchain
+    ) -> Optional[str]:
+        """
+        Creates the key for the passed unit.
+
+        :returns: The key or None if the unit or a header can not be read
+        """
+        from .build import cli_scan_includes
+
+        sha = hashlib.sha256()
+        sha.update(toolchain.identity.encode("utf-8") + b"\0")
+        for flag in toolchain.cflags:
+            sha.update(flag.encode("utf-8") + b"\0")
+
+        seen: Set[str] = set()
+        stack = [str(source)]
+        try:
+            while stack:
+                file = stack.pop()
+                with open(file, "rb") as f:
+                    content = f.read()
+                sha.update(
+                    os.path.relpath(file, include_dir).encode(
+                        "utf-8", "surrogateescape"
+                    ) + b"\0"
+                )
+                sha.update(hashlib.sha256(content).digest())
+                for include in cli_scan_includes(file, include_dir):
+                    if include not in seen:
+                        seen.add(include)
+                        stack.append(include)
+        except OSError:
+            return None
+        return sha.hexdigest()
+
+    def load(self, key: str, obj: Path) -> Optional[str]:
+        """
+        Restores the object file of the passed key.
+
+        :returns: The stored compiler messages or None if there is no entry
+        """
+        data = self.get(key)
+        if data is None:
+            return None
+
+        header, _, content = data.partition(b"\n")
+        try:
+            messages = str(json.loads(header)["messages"])
+            with open(obj, "wb") as file:
+                file.write(content)
+        except (ValueError, KeyError, TypeError, OSError):
+            return None  # Corrupted entries are treated as a miss
+        return messages
+
+    def store(self, key: str, obj: Path, messages: str) -> None:
+        """ Stores the object file and the compiler messages """
+        try:
+            with open(obj, "rb") as file:
+                content = file.read()
+        except OSError:
+            return
+        header = json.dumps({"messages": messages}).encode("utf-8")
+        self.put(key, header + b"\n" + content)
+
+
+class MakeJobServer:
+    """
+    Client of a GNU make jobserver, which limits the amount of jobs of all
+    processes of a make invocation. Every job except the first one requires a
+    token from the jobserver, which has to be returned once the job finished.
+    """
+
+    def __init__(self, read_fd: int, write_fd: int, owns_fds: bool = False):
+        """
+        :param read_fd: The file descriptor tokens are read from
+        :param write_fd: The file descriptor tokens are returned to
+        :param owns_fds: If set to True the descriptors are closed by close()
+        """
+        self._read_fd = read_fd
+        self._write_fd = write_fd
+        self._owns_fds = owns_fds
+
+    @classmethod
+    def from_makeflags(
+            cls,
+            makeflags: Optional[str] = None
+    ) -> Optional[MakeJobServer]:
+        """
+        Connects to the jobserver passed in 'MAKEFLAGS'. Returns None if no
+        jobserver was passed or its descriptors were not inherited.
+        """
+        if makeflags is None:
+            makeflags = os.environ.get("MAKEFLAGS", "")
+
+        match = _MAKEFLAGS_JOBSERVER_REGEX.search(makeflags)
+        if match is None:
+            return None
+
+        auth = match.group(1)
+        try:
+            if auth.startswith("fifo:"):
+                fd = os.open(auth[len("fifo:"):], os.O_RDWR)
+                return cls(fd, fd, owns_fds=True)
+
+            read_fd, write_fd = (int(i) for i in auth.split(","))
+            os.fstat(read_fd)
+            os.fstat(write_fd)
+            return cls(read_fd, write_fd)
+        except (OSError, ValueError):
+            # make only passes the descriptors to recipes marked with '+'
+            return None
+
+    def acquire(self) -> bytes:
+        """ Blocks until a token is available and returns it """
+        while True:
+            try:
+                token = os.read(self._read_fd, 1)
+            except InterruptedError:
+                continue
+            if token:
+                return token
+            raise CToolchainError("The make jobserver was closed")
+
+    def release(self, token: bytes) -> None:
+        """ Returns the token to the jobserver """
+        os.write(self._write_fd, token)
+
+    def close(self) -> None:
+        """ Closes the descriptors if they were opened by this client """
+        if self._owns_fds:
+            os.close(self._read_fd)
+
+
+class _JobSlots:
+    """
+    Slots limiting the jobs running at once. The first slot is always
+    available, while all further ones require a token of the jobserver.
+    """
+
+    def __init__(self, jobserver: Optional[MakeJobServer]):
+        self._jobserver = jobserver
+        self._implicit = threading.Lock()
+
+    def acquire(self) -> Optional[bytes]:
+        if self._jobserver is None or self._implicit.acquire(blocking=False):
+            return None
+        return self._jobserver.acquire()
+
+    def release(self, token: Optional[bytes]) -> None:
+        if self._jobserver is None:
+            return
+        elif token is None:
+            self._implicit.release()
+        else:
+            self._jobserver.release(token)
+
+
+def cli_get_job_limit(
+        jobs: Optional[int] = None,
+        makeflags: Optional[str] = None
+) -> int:
+    """
+    Returns the maximum amount of parallel jobs. An explicitly passed amount
+    is always used, else the '-j' of 'MAKEFLAGS' is used. If neither is set
+    the amount of CPUs is used.
+    """
+    if jobs:
+        return jobs
+
+    if makeflags is None:
+        makeflags = os.environ.get("MAKEFLAGS", "")
+    match = _MAKEFLAGS_JOBS_REGEX.search(makeflags)
+    if match and match.group(1):
+        return max(1, int(match.group(1)))
+    return os.cpu_count() or 1
+
+
+def cli_collect_c_sources(
+        build_path: Union[str, PathLike, Path]
+) -> List[Path]:
+    """ Returns the generated C sources inside the build folder, sorted """
+    build_path = Path(build_path)
+    return sorted(
+        p for p in build_path.rglob("*.c")
+        if _OBJECT_FOLDER not in p.relative_to(build_path).parts[:1]
+    )
+
+
+def _compile_c_unit(
+        toolchain: CToolchain,
+        source: Path,
+        build_path: Path,
+        slots: _JobSlots,
+        cache: Optional[ObjectCache]
+) -> CUnitResult:
+    obj = build_path / _OBJECT_FOLDER / source.relative_to(build_path)
+    obj = obj.with_suffix(".o")
+    obj.parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    key = None
+    if cache is not None:
+        key = cache.create_key(source, build_path, toolchain)
+        if key is not None and (messages := cache.load(key, obj)) is not None:
+            return CUnitResult(
+                str(source), str(obj), time.perf_counter() - start, True,
+                messages, cached=True
+            )
+
+    token = slots.acquire()
+    try:
+        start = time.perf_counter()
+        process = subprocess.run(
+            toolchain.compile_command(source, obj, build_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace"
+        )
+    finally:
+        slots.release(token)
+
+    success = process.returncode == 0
+    if success and key is not None:
+        cache.store(key, obj, process.stdout)
+    return CUnitResult(
+        str(source),
+        str(obj),
+        time.perf_counter() - start,
+        success,
+        process.stdout
+    )
+
+
+def cli_compile_c_units(
+        sources: List[Union[str, PathLike, Path]],
+        build_path: Union[str, PathLike, Path],
+        toolchain: CToolchain,
+        jobs: Optional[int] = None,
+        cache: Optional[ObjectCache] = None
+) -> Iterator[CUnitResult]:
+    """
+    Compiles the passed C sources into object files inside the build folder
+    and yields the results in the order the units finished.
+
+    :param sources: The C sources, which have to be inside the build folder
+    :param build_path: The build folder, which is also used as include path
+    :param toolchain: The toolchain used for compiling
+    :param jobs: The maximum amount of parallel compiler processes. If None
+     the limit of 'MAKEFLAGS' or the amount of CPUs is used
+    :param cache: The cache that should be used to look up and store object
+     files. If None every unit will be compiled
+    """
+    if len(sources) == 0:
+        return
+
+    build_path = Path(build_path).resolve()
+    sources = [Path(s).resolve() for s in sources]
+    workers = min(cli_get_job_limit(jobs), len(sources))
+
+    jobserver = MakeJobServer.from_makeflags() if jobs is None else None
+    slots = _JobSlots(jobserver)
+    hits = misses = 0
+    try:
+        # Threads are sufficient, since the work is done by the compilers
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _compile_c_unit, toolchain, source, build_path, slots,
+                    cache
+                )
+                for source in sources
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                hits += 1 if result.cached else 0
+                misses += 0 if result.cached else 1
+                yield result
+    finally:
+        if jobserver is not None:
+            jobserver.close()
+        if cache is not None:
+            cache.record_stats(hits, misses)
+            cache.prune_if_needed()
+
+
+def cli_link_executable(
+        objects: List[Union[str, PathLike, Path]],
+        output: Union[str, PathLike, Path],
+        toolchain: CToolchain
+) -> CUnitResult:
+    """ Links the passed object files into the executable """
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    # The dist folder may be a view of the artifact store, whose files must
+    # be replaced instead of being written in-place
+    if os.path.lexists(output):
+        os.unlink(output)
+    start = time.perf_counter()
+    process = subprocess.run(
+        toolchain.link_command(objects, output),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace"
+    )
+    return CUnitResult(
+        "Linking",
+        str(output),
+        time.perf_counter() - start,
+        process.returncode == 0,
+        process.stdout
+    )
+
+
+def cli_build_executable(
+        build_path: Union[str, PathLike, Path],
+        dist_path: Union[str, PathLike, Path],
+        name: str,
+        jobs: Optional[int] = None,
+        debug: bool = False,
+        toolchain: Optional[CToolchain] = None,
+        cache: Optional[ObjectCache] = None
+) -> Iterator[CUnitResult]:
+    """
+    Compiles all generated C sources of the build folder and links them into
+    an executable inside the dist folder. The result of every unit is yielded
+    once it finished, followed by the result of linking. If a unit failed,
+    nothing is linked.
+
+    :param build_path: The build folder containing the generated C sources
+    :param dist_path: The dist folder the executable is written to
+    :param name: The name of the executable (without a file ending)
+    :param jobs: The maximum amount of parallel compiler processes. If None
+     the limit of 'MAKEFLAGS' or the amount of CPUs is used
+    :param debug: If set to True the units are compiled with debug information
+    :param toolchain: The toolchain that should be used. If None the system
+     C compiler is detected
+    :param cache: The cache that should be used to look up and store object
+     files. If None every unit will be compiled
+    :raises CToolchainError: If no C compiler or C sources could be found
+    """
+    toolchain = toolchain or CToolchain.detect(debug)
+    sources = cli_collect_c_sources(build_path)
+    if len(sources) == 0:
+        raise CToolchainError(
+            f"No generated C sources were found in '{build_path}'"
+        )
+
+    objects = []
+    success = True
+    for result in cli_compile_c_units(
+            sources, build_path, toolchain, jobs, cache
+    ):
+        objects.append(result.output)
+        success = success and result.success
+        yield result
+
+    if success:
+        if sys.platform in ['cygwin', 'win32']:  # pragma: no cover
+            name += ".exe"
+        yield cli_link_executable(
+            sorted(objects), Path(dist_path) / name, toolchain
+        )
+
+
+def cli_log_c_unit_result(result: CUnitResult) -> None:
+    """
+    Logs the messages of the C compiler and prints the time the unit took.
+
+    Requires the CLI logging to be initialised!
+    """
+    if result.messages.strip():
+        cli_get_logger().log(
+            logging.WARNING if result.success else logging.ERROR,
+            result.messages.rstrip()
+        )
+
+    state = "[bold green]OK[/bold green]" if result.success else \
+        "[bold red]Failed[/bold red]"
+    get_console().print(
+        f"[bold bright_cyan]{result.source}[/bold bright_cyan] -> "
+        f"{result.output} - {state} [white]({result.duration:.3f}s"
+        f"{', cached' if result.cached else ''})[/white]",
+        highlight=False
+    )
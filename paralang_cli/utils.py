@@ -1,34 +1,55 @@
 # coding=utf-8
 """ Utilities for the paralang_cli module """
+from __future__ import annotations
+
+import atexit
 import functools
+import logging
 import os
+import re
 import shutil
 import sys
+import threading
+import time
+import uuid
 from os import PathLike
 from pathlib import Path
-from typing import Union, Tuple, Optional, List
-
-from paralang_base import (UserInputError, InternalError, InterruptError,
-                      ParaCompilerError)
-from paralang_base.compiler import CompileProcess, CompileResult
-from paralang_base.util import decode_if_bytes, escape_ansi
-from rich import get_console
-from rich.progress import Progress
+from typing import Union, Tuple, Optional, List, TYPE_CHECKING
 
-from . import RUNTIME_COMPILER
+from .__main__ import cli_get_runtime_compiler
 from .logging import (cli_get_rich_console as console, cli_log_traceback,
-                      cli_print_abort_banner, cli_print_result_banner)
+                      cli_print_abort_banner, cli_print_result_banner,
+                      cli_flush_logging)
+from . import logging as cli_logging
+from .profiling import cli_traced, cli_get_tracer, cli_finish_profiling
+
+_ANSI_ESCAPE_REGEX = re.compile(
+    r'(?:\x1B[@-_]|[\x80-\x9F])[0-?]*[ -/]*[@-~]'
+)
+
+# Prefix of output folders, which were moved aside to be removed
+_REMOVAL_PREFIX = ".para-removed-"
+_removal_threads: List[threading.Thread] = []
+
+if TYPE_CHECKING:
+    from paralang_base.compiler import (CompileProcess, CompileResult,
+                                        ParaCompiler)
 
 __all__ = [
     "cli_err_dir_already_exists",
     "cli_run_output_dir_validation",
     "cli_check_destination",
+    "cli_remove_in_background",
+    "cli_wait_for_removals",
     "cli_resolve_path",
     "cli_keep_open_callback",
     "cli_abortable",
     "cli_escape_ansi_args",
     'cli_create_process',
     'cli_run_process_with_logging',
+    'cli_get_base_version',
+    'cli_init_compiler_logging',
+    'cli_exec_program',
 ]
 
 
@@ -65,40 +86,46 @@ def cli_abortable(
         @functools.wraps(func)
         def _wrapper(*args, **kwargs):
             def _handle_abort(print_out: bool):
+                # Records of the queued logging mode should be written
+                # before the banner and before exiting
+                cli_flush_logging()
                 if print_out:
                     cli_print_abort_banner(step)
                 exit(1)
 
             try:
-                from . import RUNTIME_COMPILER
                 try:
                     return func(*args, **kwargs)
-                except InterruptError:
-                    _handle_abort(print_abort)
-
-                except KeyboardInterrupt as e:
-                    if preserve_exception:
-                        raise e
-                    else:
-                        raise InterruptError(exc=e) from e
-
-                except ParaCompilerError as e:
-                    if not RUNTIME_COMPILER.is_cli_logger_ready:
-                        RUNTIME_COMPILER.init_cli_logging()
-
-                    cli_log_traceback(
-                        level="critical",
-                        brief="Encountered unexpected exception while running",
-                        exc_info=sys.exc_info()
-                    )
-                    if preserve_exception:
-                        raise e
-                    else:
-                        raise InterruptError(exc=e) from e
-
-                except Exception as e:
-                    if not RUNTIME_COMPILER.is_cli_logger_ready:
-                        RUNTIME_COMPILER.init_cli_logging()
+                except (Exception, KeyboardInterrupt) as e:
+                    # Only imported once an exception occurred, since
+                    # importing 'paralang_base' loads the entire compiler
+                    from paralang_base import (InternalError, InterruptError,
+                                               ParaCompilerError)
+
+                    if isinstance(e, InterruptError):
+                        _handle_abort(print_abort)
+
+                    elif isinstance(e, KeyboardInterrupt):
+                        if preserve_exception:
+                            raise e
+                        else:
+                            raise InterruptError(exc=e) from e
+
+                    compiler = cli_get_runtime_compiler()
+                    if not compiler.is_cli_logger_ready:
+                        compiler.init_cli_logging()
+
+                    if isinstance(e, ParaCompilerError):
+                        cli_log_traceback(
+                            level="critical",
+                            brief="Encountered unexpected exception while "
+                                  "running",
+                            exc_info=sys.exc_info()
+                        )
+                        if preserve_exception:
+                            raise e
+                        else:
+                            raise InterruptError(exc=e) from e
 
                     if preserve_exception:
                         raise e
@@ -109,9 +136,12 @@ def cli_abortable(
                         ) from e
 
             except Exception as e:
+                from paralang_base import InternalError
+
                 if abort_on_internal_errors and type(e) is InternalError:
                     _handle_abort(print_abort)
                 elif reraise:
+                    cli_flush_logging()
                     raise e
                 else:
                     _handle_abort(print_abort)
@@ -124,6 +154,74 @@ def cli_abortable(
         return _decorator(_func)
 
 
+def cli_get_base_version() -> str:
+    """
+    Returns the version of the installed 'paralang_base' module.
+
+    The version is read from the source of the module without executing it,
+    so that the module itself (and with it the entire compiler) does not
+    have to be imported. If this fails it falls back to importing the module.
+    """
+    from importlib.util import find_spec
+
+    spec = find_spec("paralang_base")
+    if spec is not None and spec.origin and os.path.isfile(spec.origin):
+        with open(spec.origin, "r", encoding="utf-8") as file:
+            match = re.search(
+                r"^__version__\s*=\s*['\"]([^'\"]+)['\"]",
+                file.read(),
+                flags=re.MULTILINE
+            )
+        if match:
+            return match.group(1)
+
+    import paralang_base
+    return paralang_base.__version__
+
+
+@cli_traced
+def cli_init_compiler_logging(
+        log_path: Union[str, PathLike, Path, None],
+        level: int = logging.INFO,
+        banner_name: str = "Compiler"
+) -> ParaCompiler:
+    """
+    Initialises the CLI logging of the runtime compiler, if it was not
+    initialised yet, and returns the compiler.
+
+    'ParaCompiler.is_cli_logger_ready' can not be used for this, since the
+    logger of the compiler always falls back to the module logger.
+    """
+    compiler = cli_get_runtime_compiler()
+    if compiler.stream_handler is None:
+        compiler.init_cli_logging(
+            log_path, level=level, banner_name=banner_name
+        )
+        if cli_logging.QUEUED_LOGGING:
+            cli_logging.cli_enable_queued_logging(compiler.logger)
+    return compiler
+
+
+def cli_exec_program(
+        path: Union[str, PathLike, Path],
+        args: List[str]
+):
+    """
+    Replaces the current process with the passed program, so it directly
+    inherits the console and its exit code is returned to the caller. On
+    platforms without 'exec' the program is run as a child process instead.
+    """
+    path = str(path)
+    cli_flush_logging()
+    cli_finish_profiling()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if sys.platform in ['cygwin', 'win32']:  # pragma: no cover
+        import subprocess
+        sys.exit(subprocess.run([path, *args]).returncode)
+    os.execv(path, [path, *args])
+
+
 @cli_abortable(step="Validating Output", reraise=True)
 def cli_err_dir_already_exists(folder: Union[str, PathLike]) -> bool:
     """ Asks the user whether the build folder should be overwritten """
@@ -135,6 +233,7 @@ def cli_err_dir_already_exists(folder: Union[str, PathLike]) -> bool:
 
 
 @cli_abortable(step="Setup", reraise=True, preserve_exception=True)
+@cli_traced
 def cli_create_process(
         files: List[Union[str, bytes, PathLike, Path]],
         log_path: Union[str, bytes, PathLike, Path],
@@ -146,8 +245,11 @@ def cli_create_process(
 
     This will activate CLI logging and styling per default!
     """
-    if not RUNTIME_COMPILER.is_cli_logger_ready:
-        RUNTIME_COMPILER.init_cli_logging(log_path)
+    from paralang_base.compiler import CompileProcess
+
+    compiler = cli_get_runtime_compiler()
+    if not compiler.is_cli_logger_ready:
+        compiler.init_cli_logging(log_path)
 
     return CompileProcess(
         files, os.getcwd(), encoding
@@ -165,8 +267,9 @@ async def cli_run_process(
 
     This will activate CLI logging and styling per default!
     """
-    if not RUNTIME_COMPILER.is_cli_logger_ready:
-        RUNTIME_COMPILER.init_cli_logging(log_path)
+    compiler = cli_get_runtime_compiler()
+    if not compiler.is_cli_logger_ready:
+        compiler.init_cli_logging(log_path)
 
     finished_process = await p.compile()
     cli_print_result_banner()
@@ -185,13 +288,24 @@ async def cli_run_process_with_logging(
 
     This will activate CLI logging and styling per default!
     """
-    if not RUNTIME_COMPILER.is_cli_logger_ready:
-        RUNTIME_COMPILER.init_cli_logging(log_path)
+    from rich import get_console
+    from rich.progress import Progress
+    from .progress import cli_get_refresh_interval
+
+    compiler = cli_get_runtime_compiler()
+    if not compiler.is_cli_logger_ready:
+        compiler.init_cli_logging(log_path)
 
     finished_process: Optional[CompileResult] = None
 
-    # Some testing for now
-    with Progress(console=get_console(), refresh_per_second=30) as progress:
+    # Without a terminal the progress is not redrawn at all
+    interval = cli_get_refresh_interval(get_console())
+    with Progress(
+            console=get_console(),
+            auto_refresh=interval > 0,
+            refresh_per_second=1 / interval if interval > 0 else 1,
+            disable=interval == 0
+    ) as progress:
         max_progress = 100
         current_progress = 0
         main_task = progress.add_task(
@@ -199,12 +313,23 @@ async def cli_run_process_with_logging(
             total=max_progress
         )
 
+        # Every step of 'compile_gen()' is recorded as a span, which lasts
+        # until the next status was yielded
+        tracer = cli_get_tracer()
+        step, step_start = "compile_gen", time.perf_counter()
         async for p, status, level, end in p.compile_gen():
+            if tracer is not None:
+                now = time.perf_counter()
+                tracer.add_span(
+                    "compile_gen", step_start, now - step_start, status=step
+                )
+                step, step_start = status, now
+
             if end is not None:
                 finished_process = end
                 progress.update(main_task, advance=p - current_progress)
             else:
-                RUNTIME_COMPILER.logger.log(level=level, msg=status)
+                compiler.logger.log(level=level, msg=status)
                 progress.update(main_task, advance=p - current_progress)
                 current_progress = p
 
@@ -223,6 +348,9 @@ def cli_resolve_path(path: Union[bytes, str, Path, PathLike]) -> str:
     :raise UserInputError: If the inserted path can not be resolved due to an
     invalid format
     """
+    from paralang_base import UserInputError
+    from paralang_base.util import decode_if_bytes
+
     if str(path).strip() == "":
         raise UserInputError("Path can not be empty")
     if type(path) in (bytes, str, PathLike):
@@ -234,6 +362,55 @@ def cli_resolve_path(path: Union[bytes, str, Path, PathLike]) -> str:
     return str(path.resolve())
 
 
+def cli_remove_in_background(
+        path: Union[str, PathLike, Path]
+) -> Optional[threading.Thread]:
+    """
+    Removes the folder without waiting for it. The folder is atomically
+    renamed next to itself, so the path can be re-used immediately, and the
+    renamed folder is deleted on a background thread. If renaming fails (e.g.
+    because of locked files on Windows), the folder is removed directly.
+
+    Pending removals are finished on exit. Folders of an interrupted removal
+    are removed by the next call for the same parent folder.
+
+    :returns: The thread removing the folder or None if it was removed
+     directly
+    """
+    path = Path(path).absolute()
+    removed = path.parent / f"{_REMOVAL_PREFIX}{path.name}-{uuid.uuid4().hex}"
+    try:
+        os.rename(path, removed)
+    except OSError:
+        shutil.rmtree(path)
+        return None
+
+    folders = [removed] + [
+        path.parent / name for name in os.listdir(path.parent)
+        if name.startswith(_REMOVAL_PREFIX) and name != removed.name
+        and not any(t.name == name for t in _removal_threads)
+    ]
+    thread = threading.Thread(
+        target=lambda: [shutil.rmtree(f, ignore_errors=True) for f in folders],
+        name=removed.name,
+        daemon=True
+    )
+    _removal_threads.append(thread)
+    thread.start()
+    return thread
+
+
+def cli_wait_for_removals(timeout: Optional[float] = None) -> None:
+    """ Waits for the removals started by cli_remove_in_background() """
+    for thread in list(_removal_threads):
+        thread.join(timeout)
+        if not thread.is_alive():
+            _removal_threads.remove(thread)
+
+
+atexit.register(cli_wait_for_removals)
+
+
 def cli_check_destination(
         output_type: str,
         default_path: Union[str, PathLike],
@@ -245,6 +422,9 @@ def cli_check_destination(
     folder is available. If the folder already exists it will show a prompt
     to the user what should be done about the existing folder.
 
+    An overwritten folder is removed in the background using
+    'cli_remove_in_background()', so the build does not wait for it.
+
     :returns: The path to the folder
     """
     output = default_path
@@ -256,17 +436,25 @@ def cli_check_destination(
             overwrite = cli_err_dir_already_exists(output_type)
 
         if overwrite:
-            shutil.rmtree(output)
+            cli_remove_in_background(output)
             os.mkdir(output)
         else:
+            existing = set(os.listdir(work_dir))
             counter = 2
-            while os.path.exists(f"{work_dir}/{output_type}_{counter}"):
-                counter += 1
-            output = f"{work_dir}/{output_type}_{counter}"
-            os.mkdir(output)
+            while True:
+                while f"{output_type}_{counter}" in existing:
+                    counter += 1
+                output = f"{work_dir}/{output_type}_{counter}"
+                try:
+                    os.mkdir(output)
+                    break
+                except FileExistsError:
+                    # Created in the meantime by a concurrent build
+                    counter += 1
     return output
 
 
+@cli_traced
 def cli_run_output_dir_validation(
         overwrite_build: bool,
         overwrite_dist: bool,
@@ -324,6 +512,14 @@ def cli_keep_open_callback(_func=None):
         return _decorator(_func)
 
 
+def _escape_ansi(string: str) -> str:
+    """
+    Removes ansi colouring in the passed string. Same as
+    'paralang_base.util.escape_ansi()', but without importing the compiler.
+    """
+    return _ANSI_ESCAPE_REGEX.sub('', string)
+
+
 def cli_escape_ansi_args(_func):
     """
     Calls the function but removes ansi colouring on the args and kwargs on str
@@ -336,14 +532,14 @@ def cli_escape_ansi_args(_func):
             new_args = []
             for i in args:
                 if type(i) is str:
-                    new_args.append(escape_ansi(i))
+                    new_args.append(_escape_ansi(i))
                 else:
                     new_args.append(i)
 
             new_kwargs = {}
             for key, value in kwargs.items():
                 if type(value) is str:
-                    value = escape_ansi(value)
+                    value = _escape_ansi(value)
                 new_kwargs[key] = value
 
             return func(*new_args, **new_kwargs)
@@ -0,0 +1,360 @@
+# coding=utf-8
+"""
+Watch mode for the CLI, which keeps the runtime compiler warm and re-runs the
+syntax check or compilation for changed files
+"""
+from __future__ import annotations
+
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import List, Set, Dict, Tuple, Literal, Optional
+
+from .__main__ import cli_get_runtime_compiler
+from .logging import (cli_get_rich_console as get_console,
+                      cli_print_result_banner, cli_get_logger)
+from .syntax_check import (PARA_FILE_ENDINGS, cli_collect_files,
+                           cli_syntax_check_file, cli_log_syntax_check_result)
+
+__all__ = [
+    "FileWatcher",
+    "InotifyFileWatcher",
+    "PollingFileWatcher",
+    "cli_create_file_watcher",
+    "cli_watch",
+]
+
+# Interval in seconds in which the polling watcher rescans the files
+POLLING_INTERVAL: float = 0.5
+
+
+class FileWatcher(ABC):
+    """ Base class for watching a set of files and directories for changes """
+
+    def __init__(self, paths: List[str]):
+        """
+        :param paths: The files and directories that should be watched.
+         Directories are watched recursively for Para source files.
+        """
+        self._roots: List[str] = []
+        self._files: Set[str] = set()
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.isdir(path):
+                self._roots.append(path)
+            else:
+                self._files.add(path)
+
+    def is_watched(self, path: str) -> bool:
+        """ Returns True if the passed file is watched """
+        if path in self._files:
+            return True
+        return path.endswith(PARA_FILE_ENDINGS) and any(
+            path.startswith(root + os.sep) for root in self._roots
+        )
+
+    @abstractmethod
+    def poll(self, timeout: float) -> Set[str]:
+        """
+        Waits at most for the passed timeout in seconds and returns the
+        absolute paths of the watched files that were changed, created or
+        removed since the last call.
+        """
+
+    def close(self) -> None:
+        """ Releases the resources of the watcher """
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    Watcher comparing the modification time and size of the files on every
+    poll. Used on platforms where no native file notifications are available.
+    """
+
+    def __init__(self, paths: List[str]):
+        super().__init__(paths)
+        self._paths = paths
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for file in cli_collect_files(self._paths):
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            snapshot[os.path.abspath(file)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> Set[str]:
+        """
+        Waits for the passed timeout in seconds and returns the changed files
+        """
+        time.sleep(timeout)
+        snapshot = self._scan()
+        changed = {
+            file for file in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(file) != self._snapshot.get(file)
+        }
+        self._snapshot = snapshot
+        return changed
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Watcher using the Linux inotify API, which avoids rescanning the files
+    and directories on every poll
+    """
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_ISDIR = 0x40000000
+    _IN_CLOEXEC = 0o2000000
+    _MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | \
+        _IN_DELETE
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, paths: List[str]):
+        """
+        :raises OSError: If inotify is not available on this platform
+        """
+        import ctypes
+        import ctypes.util
+
+        super().__init__(paths)
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self._fd: int = self._libc.inotify_init1(self._IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "Failed to initialise inotify")
+
+        self._wds: Dict[int, str] = {}
+        for root in self._roots:
+            self._add_tree(root)
+        for file in self._files:
+            self._add_watch(os.path.dirname(file))
+
+    def _add_watch(self, directory: str) -> None:
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), self._MASK
+        )
+        if wd >= 0:
+            self._wds[wd] = directory
+
+    def _add_tree(self, directory: str) -> None:
+        for root, _, _ in os.walk(directory):
+            self._add_watch(root)
+
+    def poll(self, timeout: float) -> Set[str]:
+        """
+        Waits at most for the passed timeout in seconds for events and returns
+        the changed files
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        data = os.read(self._fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            directory = self._wds.get(wd)
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self._IN_ISDIR:
+                # New directories have to be watched as well, and may
+                # already contain files when they were moved
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO) and any(
+                        path.startswith(root + os.sep) for root in self._roots
+                ):
+                    self._add_tree(path)
+                    changed.update(
+                        os.path.abspath(f) for f in cli_collect_files([path])
+                    )
+            elif self.is_watched(path):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        """ Closes the inotify file descriptor """
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def cli_create_file_watcher(
+        paths: List[str],
+        force_polling: bool = False
+) -> FileWatcher:
+    """
+    Creates the most efficient watcher available on this platform. If native
+    file notifications are not available it falls back to polling.
+
+    :param paths: The files and directories that should be watched
+    :param force_polling: If set to True polling will always be used
+    """
+    if not force_polling:
+        try:
+            return InotifyFileWatcher(paths)
+        except (OSError, AttributeError):
+            ...
+    return PollingFileWatcher(paths)
+
+
+def _compile_units(
+        units: List[str],
+        encoding: str,
+        build_path: str,
+        dist_path: str,
+        debug: bool
+) -> bool:
+    """
+    Builds the passed units into the build and dist folder like 'para
+    compile' and logs the result of every unit that was not up-to-date
+
+    :returns: True if all units were compiled successfully
+    """
+    from .build import cli_run_build, cli_log_build_unit_result
+    from .store import ArtifactStore
+
+    success = True
+    try:
+        for result in cli_run_build(
+                units, encoding, build_path, dist_path, debug=debug,
+                store=ArtifactStore()
+        ):
+            if not result.skipped:
+                cli_log_build_unit_result(result)
+            success = success and result.success
+    except Exception as e:
+        cli_get_logger().error(
+            f"Failed to compile the changed files: "
+            f"{str(e) or type(e).__name__}"
+        )
+        success = False
+    return success
+
+
+def _run_cycle(
+        files: List[str],
+        encoding: str,
+        mode: Literal["syntax-check", "compile"],
+        debug: bool,
+        paths: Optional[List[str]] = None,
+        folders: Optional[Tuple[str, str]] = None
+) -> None:
+    """
+    Runs the syntax check or compilation for the passed files
+
+    :param paths: The watched files and directories. Required for compiling,
+     since all units are built, so units including the changed files are
+     rebuilt and the outputs of removed units are dropped
+    :param folders: The build and dist folder. Required for compiling
+    """
+    start = time.perf_counter()
+    if mode == "compile":
+        name = "Compilation"
+        success = _compile_units(
+            cli_collect_files(paths), encoding, *folders, debug
+        )
+    else:
+        name = "Syntax Check"
+        success = True
+        for file in files:
+            result = cli_syntax_check_file(file, encoding, debug)
+            cli_log_syntax_check_result(result)
+            success = success and result.success
+
+    cli_print_result_banner(name, success=success)
+    get_console().print(
+        f"[bold bright_cyan]Processed {len(files)} changed "
+        f"{'file' if len(files) == 1 else 'files'} in "
+        f"{time.perf_counter() - start:.3f}s[/bold bright_cyan]",
+        highlight=False
+    )
+
+
+def cli_watch(
+        paths: List[str],
+        encoding: str,
+        mode: Literal["syntax-check", "compile"] = "syntax-check",
+        debounce: float = 0.2,
+        force_polling: bool = False,
+        debug: bool = False
+) -> None:
+    """
+    Watches the passed files and directories and re-runs the syntax check or
+    compilation for every changed file, until the process is interrupted.
+
+    All files are processed once on start-up, which also warms up the runtime
+    compiler.
+
+    Requires the CLI logging of the runtime compiler to be initialised!
+
+    :param paths: The files and directories that should be watched
+    :param encoding: The encoding the files should be opened with
+    :param mode: Whether a syntax check or a compilation should be run. The
+     compilation writes into the build and dist folder like 'para compile'
+    :param debounce: Time in seconds no further changes have to occur, before
+     the changed files are processed. Avoids running multiple times for
+     rapid saves.
+    :param force_polling: If set to True polling will always be used
+    :param debug: If set to True debug messages will be logged as well
+    """
+    folders = None
+    if mode == "compile":
+        from .build import cli_run_build_dir_validation
+        folders = cli_run_build_dir_validation(False, False)
+
+    watcher = cli_create_file_watcher(paths, force_polling)
+    try:
+        files = cli_collect_files(paths)
+        if files:
+            _run_cycle(files, encoding, mode, debug, paths, folders)
+
+        get_console().print(
+            f"\n[bold bright_cyan]Watching for changes using "
+            f"{type(watcher).__name__} (Press CTRL+C to stop)"
+            "[/bold bright_cyan]",
+            highlight=False
+        )
+
+        pending: Set[str] = set()
+        while True:
+            changed = watcher.poll(debounce if pending else POLLING_INTERVAL)
+            if changed:
+                pending |= changed
+                continue
+            elif not pending:
+                continue
+
+            removed = {f for f in pending if not os.path.isfile(f)}
+            for file in sorted(removed):
+                cli_get_runtime_compiler().logger.info(
+                    f"File {file} was removed"
+                )
+
+            files = sorted(pending - removed)
+            pending = set()
+            if files or (removed and mode == "compile"):
+                _run_cycle(files, encoding, mode, debug, paths, folders)
+    except KeyboardInterrupt:
+        get_console().print("\n", end="")
+    finally:
+        watcher.close()
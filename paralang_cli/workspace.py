@@ -0,0 +1,541 @@
+# coding=utf-8
+"""
+Multi-project workspace builds for 'paraproj'. A workspace manifest declares
+several Para packages and the packages they depend on, which are then built
+in topological order.
+
+Independent packages are built concurrently in a process pool, while every
+package is built incrementally into its own build and dist folder using
+'cli_run_build()'. Packages whose input hash is recorded in the artifact
+store or whose units are all up-to-date are built inside the current
+process, since they do not need the compiler.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from os import PathLike
+from pathlib import Path
+from typing import (List, Dict, Tuple, Set, Optional, Union, Iterator,
+                    Iterable, TYPE_CHECKING)
+
+from .build import (BuildManifest, BuildGraph, BuildUnitResult,
+                    cli_run_build)
+from .cache import cli_mask_path
+from .logging import cli_get_rich_console as get_console
+from .profiling import cli_is_profiling
+
+if TYPE_CHECKING:
+    from .store import ArtifactStore
+
+__all__ = [
+    "WORKSPACE_MANIFEST_NAME",
+    "WorkspaceError",
+    "WorkspacePackage",
+    "Workspace",
+    "PackageBuildResult",
+    "cli_package_input_hash",
+    "cli_build_package",
+    "cli_run_workspace_build",
+    "cli_log_package_build_result",
+]
+
+# Name of the workspace manifest, which is searched for in the current
+# working directory
+WORKSPACE_MANIFEST_NAME: str = "para-workspace.json"
+
+
+class WorkspaceError(RuntimeError):
+    """ Exception raised if the workspace manifest is invalid """
+
+
+class WorkspacePackage:
+    """ A Para package of a workspace """
+
+    def __init__(
+            self,
+            name: str,
+            path: Union[str, PathLike, Path],
+            files: Optional[List[str]] = None,
+            dependencies: Optional[List[str]] = None
+    ):
+        """
+        :param name: The name of the package
+        :param path: The root folder of the package, which contains its build
+         and dist folder
+        :param files: The files, directories and glob patterns of the units,
+         relative to the root of the package. If None the root itself is used
+        :param dependencies: The names of the packages that must be built
+         before this package
+        """
+        self._name = name
+        self._path = os.path.abspath(path)
+        self._files = [
+            os.path.join(self._path, f) for f in (files or ["."])
+        ]
+        self._dependencies = list(dependencies or [])
+
+    @property
+    def name(self) -> str:
+        """ The name of the package """
+        return self._name
+
+    @property
+    def path(self) -> str:
+        """ The absolute path of the root folder of the package """
+        return self._path
+
+    @property
+    def dependencies(self) -> List[str]:
+        """ The names of the packages this package depends on """
+        return self._dependencies
+
+    @property
+    def build_path(self) -> str:
+        """ The build folder of the package """
+        return os.path.join(self._path, "build")
+
+    @property
+    def dist_path(self) -> str:
+        """ The dist folder of the package """
+        return os.path.join(self._path, "dist")
+
+    def collect_files(self) -> List[str]:
+        """ Returns the translation units of the package """
+        from .syntax_check import cli_collect_files
+
+        return cli_collect_files(self._files)
+
+
+class Workspace:
+    """
+    Workspace declared by a manifest in the following format, where the
+    'path' of a package defaults to its name and 'files' to the whole
+    package folder:
+
+    {
+        "packages": {
+            "core": {"path": "core", "files": ["src"]},
+            "app": {"path": "app", "dependencies": ["core"]}
+        }
+    }
+    """
+
+    def __init__(
+            self,
+            path: Union[str, PathLike, Path],
+            packages: List[WorkspacePackage]
+    ):
+        """
+        :param path: The path of the workspace manifest
+        :param packages: The packages of the workspace in declaration order
+        :raises WorkspaceError: If a package is declared twice, depends on an
+         unknown package or the dependencies contain a cycle
+        """
+        self._path = Path(path)
+        self._packages: Dict[str, WorkspacePackage] = {}
+        for package in packages:
+            if package.name in self._packages:
+                raise WorkspaceError(
+                    f"Package '{package.name}' is declared twice"
+                )
+            self._packages[package.name] = package
+
+        for package in packages:
+            for dependency in package.dependencies:
+                if dependency not in self._packages:
+                    raise WorkspaceError(
+                        f"Package '{package.name}' depends on the unknown "
+                        f"package '{dependency}'"
+                    )
+        self._order = self._sort(list(self._packages))
+
+    @property
+    def path(self) -> Path:
+        """ The path of the workspace manifest """
+        return self._path
+
+    @property
+    def packages(self) -> Dict[str, WorkspacePackage]:
+        """ The packages of the workspace keyed by their name """
+        return self._packages
+
+    @classmethod
+    def load(cls, path: Union[str, PathLike, Path] = None) -> Workspace:
+        """
+        Loads the workspace manifest. Relative package paths are resolved
+        against the folder of the manifest.
+
+        :param path: The manifest or the folder containing it. If None the
+         current working directory is used
+        :raises WorkspaceError: If the manifest can not be read or is invalid
+        """
+        path = Path(path or os.getcwd())
+        if path.is_dir():
+            path = path / WORKSPACE_MANIFEST_NAME
+
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except OSError as e:
+            raise WorkspaceError(
+                f"Failed to read the workspace manifest '{path}': {e}"
+            ) from e
+        except ValueError as e:
+            raise WorkspaceError(
+                f"The workspace manifest '{path}' is not valid JSON: {e}"
+            ) from e
+
+        declared = data.get("packages") if isinstance(data, dict) else None
+        if not isinstance(declared, dict):
+            raise WorkspaceError(
+                f"The workspace manifest '{path}' must contain a "
+                "'packages' object"
+            )
+
+        packages = []
+        for name, entry in declared.items():
+            entry = {} if entry is None else entry
+            files = entry.get("files") if isinstance(entry, dict) else None
+            dependencies = entry.get("dependencies", []) \
+                if isinstance(entry, dict) else None
+            if not isinstance(entry, dict) \
+                    or not isinstance(entry.get("path", name), str) \
+                    or not isinstance(files, (list, type(None))) \
+                    or not isinstance(dependencies, list):
+                raise WorkspaceError(
+                    f"Invalid declaration of the package '{name}' in the "
+                    f"workspace manifest '{path}'"
+                )
+            packages.append(WorkspacePackage(
+                name,
+                path.parent / entry.get("path", name),
+                [str(f) for f in files] if files is not None else None,
+                [str(d) for d in dependencies]
+            ))
+        return cls(path, packages)
+
+    def _sort(self, names: List[str]) -> List[str]:
+        """
+        Sorts the packages topologically, keeping the declaration order for
+        independent packages
+        """
+        remaining = set(names)
+        order = []
+        while remaining:
+            ready = [
+                n for n in self._packages if n in remaining and not any(
+                    d in remaining for d in self._packages[n].dependencies
+                )
+            ]
+            if not ready:
+                raise WorkspaceError(
+                    "Detected a dependency cycle between the packages: "
+                    + ", ".join(sorted(remaining))
+                )
+            order.extend(ready)
+            remaining.difference_update(ready)
+        return order
+
+    def order(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Returns the passed packages (by default all packages) and all
+        packages they depend on in the order they must be built in
+
+        :raises WorkspaceError: If a passed package does not exist
+        """
+        if names is None:
+            return list(self._order)
+
+        selected: Set[str] = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self._packages:
+                raise WorkspaceError(f"Unknown package '{name}'")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self._packages[name].dependencies)
+        return [n for n in self._order if n in selected]
+
+
+class PackageBuildResult:
+    """ Result of building a single package of a workspace """
+
+    def __init__(
+            self,
+            name: str,
+            units: List[BuildUnitResult],
+            duration: float,
+            skipped: bool = False
+    ):
+        """
+        :param name: The name of the package
+        :param units: The results of the translation units of the package
+        :param duration: The time in seconds the build took
+        :param skipped: If set to True the package was not built, since one
+         of its dependencies failed
+        """
+        self._name = name
+        self._units = units
+        self._duration = duration
+        self._skipped = skipped
+
+    @property
+    def name(self) -> str:
+        """ The name of the package """
+        return self._name
+
+    @property
+    def units(self) -> List[BuildUnitResult]:
+        """ The results of the translation units of the package """
+        return self._units
+
+    @property
+    def duration(self) -> float:
+        """ The time in seconds the build took """
+        return self._duration
+
+    @property
+    def skipped(self) -> bool:
+        """ Returns True if the package was skipped due to a dependency """
+        return self._skipped
+
+    @property
+    def compiled(self) -> int:
+        """ Amount of units that were compiled """
+        return sum(1 for u in self._units if not u.skipped and not u.restored)
+
+    @property
+    def state(self) -> str:
+        """
+        The state of the package, which is either 'skipped', 'up-to-date',
+        'restored' or 'built'
+        """
+        if self._skipped:
+            return "skipped"
+        elif all(u.skipped for u in self._units):
+            return "up-to-date"
+        elif self.compiled == 0:
+            return "restored"
+        return "built"
+
+    @property
+    def success(self) -> bool:
+        """ Returns True if all units were built successfully """
+        return not self._skipped and all(u.success for u in self._units)
+
+    @property
+    def errors(self) -> int:
+        """ Amount of errors (including critical errors) in all units """
+        return sum(u.errors for u in self._units)
+
+    @property
+    def warnings(self) -> int:
+        """ Amount of warnings in all units """
+        return sum(u.warnings for u in self._units)
+
+
+def cli_package_input_hash(
+        package: WorkspacePackage,
+        encoding: str,
+        debug: bool = False
+) -> Tuple[str, bool]:
+    """
+    Returns the input hash of the package, which is the hash of the input
+    hashes of all its units, and whether all units are up-to-date in its
+    build folder.
+
+    Dependencies are not part of the hash, since units only depend on the
+    files they include, which are already part of their input hashes.
+    """
+    graph = BuildGraph(
+        package.collect_files(), package.path, encoding, debug
+    )
+    manifest = BuildManifest.load(package.build_path, encoding)
+
+    sha = hashlib.sha256(b"workspace-package\0")
+    sha.update(package.name.encode("utf-8") + b"\0")
+    for unit in sorted(graph.units):
+        sha.update(graph.input_hash(unit).encode("ascii") + b"\0")
+    current = set(manifest.units) == set(graph.units) and all(
+        manifest.is_current(unit, graph.input_hash(unit))
+        for unit in graph.units
+    )
+    return sha.hexdigest(), current
+
+
+def cli_build_package(
+        package: WorkspacePackage,
+        encoding: str,
+        jobs: Optional[int] = None,
+        debug: bool = False,
+        store: Optional[ArtifactStore] = None
+) -> PackageBuildResult:
+    """
+    Builds all units of the package into its build and dist folder.
+
+    This function is also used as the worker of the process pool, where
+    every package prunes the artifact store if the outputs it added exceed
+    the estimated size of the store.
+    """
+    start = time.perf_counter()
+    os.makedirs(package.build_path, exist_ok=True)
+    os.makedirs(package.dist_path, exist_ok=True)
+    units = list(cli_run_build(
+        package.collect_files(), encoding, package.build_path,
+        package.dist_path, project_root=package.path, jobs=jobs, debug=debug,
+        store=store
+    ))
+    return PackageBuildResult(
+        package.name, units, time.perf_counter() - start
+    )
+
+
+def _store_package(
+        package: WorkspacePackage,
+        key: str,
+        result: PackageBuildResult,
+        encoding: str,
+        store: ArtifactStore
+) -> None:
+    """
+    Records the outputs of all units of the package under its input hash
+    """
+    manifest = BuildManifest.load(package.build_path, encoding)
+    outputs: Dict[str, Dict[str, str]] = {}
+    for unit in manifest.units:
+        for folder, files in manifest.outputs(unit).items():
+            outputs.setdefault(folder, {}).update(files)
+    store.store_unit(key, outputs, cli_mask_path(
+        [d for u in result.units for d in u.diagnostics], package.path
+    ))
+
+
+def cli_run_workspace_build(
+        workspace: Workspace,
+        encoding: str,
+        packages: Optional[Iterable[str]] = None,
+        jobs: Optional[int] = None,
+        debug: bool = False,
+        store: Optional[ArtifactStore] = None
+) -> Iterator[PackageBuildResult]:
+    """
+    Builds the passed packages and the packages they depend on in
+    topological order, and yields the result of every package once it
+    finished.
+
+    A package is built as soon as all its dependencies were built
+    successfully, where packages that need compiling are built concurrently
+    in a process pool if more than one job is allowed. Packages that are
+    up-to-date or whose input hash is recorded in the artifact store are
+    built in the current process. Packages depending on a failed package
+    are skipped.
+
+    :param workspace: The workspace that should be built
+    :param encoding: The encoding the files should be opened with
+    :param packages: The names of the packages that should be built. If None
+     all packages will be built
+    :param jobs: The amount of worker processes. If None the amount of CPUs
+     will be used
+    :param debug: If set to True debug messages will be collected as well
+    :param store: The artifact store the outputs are stored in. If None the
+     outputs are written directly into the build and dist folders
+    :raises WorkspaceError: If a passed package does not exist
+    """
+    pending = workspace.order(packages)
+    if not pending:
+        return
+
+    workers = 1 if cli_is_profiling() else min(
+        jobs or os.cpu_count() or 1, len(pending)
+    )
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    running = {}
+    keys: Dict[str, str] = {}
+    built: Set[str] = set()
+    failed: Set[str] = set()
+
+    def _finish(result: PackageBuildResult) -> PackageBuildResult:
+        if not result.success:
+            failed.add(result.name)
+            return result
+
+        built.add(result.name)
+        if store is not None and result.state == "built":
+            _store_package(
+                workspace.packages[result.name], keys[result.name], result,
+                encoding, store
+            )
+        return result
+
+    try:
+        while pending or running:
+            for name in list(pending):
+                package = workspace.packages[name]
+                if any(d in failed for d in package.dependencies):
+                    pending.remove(name)
+                    failed.add(name)
+                    yield PackageBuildResult(name, [], 0.0, skipped=True)
+                    continue
+                elif not all(d in built for d in package.dependencies):
+                    continue
+
+                pending.remove(name)
+                keys[name], current = cli_package_input_hash(
+                    package, encoding, debug
+                )
+                cached = current or (
+                    store is not None and store.load_unit(keys[name])
+                    is not None
+                )
+                if executor is None or cached:
+                    yield _finish(cli_build_package(
+                        package, encoding, jobs if executor is None else 1,
+                        debug, store
+                    ))
+                else:
+                    future = executor.submit(
+                        cli_build_package, package, encoding, 1, debug, store
+                    )
+                    running[future] = name
+
+            if running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    del running[future]
+                    yield _finish(future.result())
+    finally:
+        if executor is not None:
+            # Packages of an aborted build that did not start yet are dropped
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+
+def cli_log_package_build_result(result: PackageBuildResult) -> None:
+    """
+    Prints the state of the package. The units should be logged before using
+    'cli_log_build_unit_result()'.
+
+    Requires the CLI logging to be initialised!
+    """
+    if result.skipped:
+        state = "[white](skipped, a dependency failed)[/white]"
+    else:
+        units = len(result.units)
+        state = (
+            f"[white]({result.state}, {units} "
+            f"{'unit' if units == 1 else 'units'}, "
+            f"{result.duration:.3f}s)[/white]"
+        )
+    colour = "bright_green" if result.success else "red"
+    get_console().print(
+        f"[bold {colour}]Package {result.name}[/bold {colour}] - "
+        f"[bold yellow]{result.warnings} Warnings [/bold yellow]"
+        f"[bold red]{result.errors} Errors[/bold red] {state}",
+        highlight=False
+    )
@@ -0,0 +1,190 @@
+# coding=utf-8
+"""
+Benchmarks of the CLI hot paths. The benchmarks are skipped unless pytest is
+run with '--benchmark', '--benchmark-save' or '--benchmark-compare':
+
+    python -m pytest benchmarks --benchmark-save baseline.json
+    python -m pytest benchmarks --benchmark-compare baseline.json
+
+When comparing, a benchmark fails if its median is slower than the baseline
+by more than '--benchmark-threshold' (default 25%). The syntax check of
+generated trees is limited to '--benchmark-max-files' (default 100), since
+bigger trees take minutes. Use '--benchmark-max-files 10000' to run all of
+them.
+
+Results depend on the machine, so baselines should only be compared with
+results of the same machine.
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional, List, Dict, Any, Union
+
+from tests import BASE_TEST_PATH
+
+# Version of the JSON format of saved results
+RESULTS_VERSION: int = 1
+# Source used for generated '.para' files
+PARA_SOURCE: str = (BASE_TEST_PATH / "test_files" / "main.para").read_text(
+    encoding="utf-8"
+)
+
+
+class BenchmarkResult:
+    """ The measured times of a single benchmark """
+
+    def __init__(
+            self,
+            name: str,
+            times: List[float],
+            extra: Optional[Dict[str, Any]] = None
+    ):
+        """
+        :param name: The name of the benchmark
+        :param times: The duration of every round in seconds
+        :param extra: Additional information like the amount of items
+        """
+        self.name = name
+        self.times = times
+        self.extra = extra or {}
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def min(self) -> float:
+        return min(self.times)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "median": self.median,
+            "min": self.min,
+            "rounds": len(self.times),
+            **self.extra
+        }
+
+
+class BenchmarkSession:
+    """ Collects the results of a test session and compares them """
+
+    def __init__(
+            self,
+            baseline: Optional[Dict[str, Dict[str, Any]]] = None,
+            threshold: float = 0.25
+    ):
+        """
+        :param baseline: The saved results of a previous session
+        :param threshold: The allowed relative slow-down compared to the
+         baseline
+        """
+        self.results: Dict[str, BenchmarkResult] = {}
+        self.baseline = baseline or {}
+        self.threshold = threshold
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
+        """ Loads the benchmarks of a saved results file """
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data.get("version") != RESULTS_VERSION:
+            raise ValueError(f"Unsupported benchmark results file '{path}'")
+        return data["benchmarks"]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """ Writes the results with information about the machine """
+        data = {
+            "version": RESULTS_VERSION,
+            "machine": {
+                "python": sys.version.split()[0],
+                "implementation": platform.python_implementation(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "benchmarks": {
+                name: result.to_json()
+                for name, result in sorted(self.results.items())
+            }
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+
+    def add(self, result: BenchmarkResult) -> Optional[str]:
+        """
+        Adds the result and compares it with the baseline
+
+        :returns: A message describing the regression or None if the result
+         is within the threshold or there is no baseline for it
+        """
+        self.results[result.name] = result
+        change = self.change(result.name)
+        if change is not None and change > self.threshold:
+            return (
+                f"Benchmark '{result.name}' regressed by {change:.1%}: "
+                f"{result.median:.6f}s (baseline "
+                f"{self.baseline[result.name]['median']:.6f}s, threshold "
+                f"{self.threshold:.0%})"
+            )
+        return None
+
+    def change(self, name: str) -> Optional[float]:
+        """
+        Returns the relative change of the median compared to the baseline.
+        Positive values mean the benchmark got slower
+        """
+        baseline = self.baseline.get(name)
+        if baseline is None or not baseline.get("median"):
+            return None
+        return self.results[name].median / baseline["median"] - 1
+
+
+def measure(
+        func: Callable[[], Any],
+        setup: Optional[Callable[[], Any]] = None,
+        rounds: int = 5,
+        warmup: int = 1
+) -> List[float]:
+    """
+    Runs the function repeatedly and returns the duration of every round.
+    The setup is run before every round and is not measured
+    """
+    times = []
+    for i in range(warmup + rounds):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        if i >= warmup:
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def create_para_tree(folder: Path, count: int) -> List[str]:
+    """
+    Creates a tree of '.para' files with 100 files per directory and returns
+    their paths
+    """
+    files = []
+    for i in range(count):
+        directory = folder / f"module_{i // 100}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"unit_{i}.para"
+        path.write_text(PARA_SOURCE, encoding="utf-8")
+        files.append(str(path))
+    return files
+
+
+def create_output_tree(folder: Path, count: int, size: int = 1024) -> None:
+    """
+    Creates a previous output folder with the passed amount of files spread
+    across nested directories
+    """
+    content = b"x" * size
+    for i in range(count):
+        directory = folder / f"dir_{i // 200}" / f"sub_{i // 20 % 10}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file_{i}.c").write_bytes(content)
@@ -0,0 +1,75 @@
+# coding=utf-8
+""" Fixtures and reporting of the benchmarks """
+from typing import Callable, Optional, Any
+
+import pytest
+
+from . import BenchmarkSession, BenchmarkResult, measure
+
+_session: Optional[BenchmarkSession] = None
+
+
+def _enabled(config: pytest.Config) -> bool:
+    return any(
+        config.getoption(option)
+        for option in ("benchmark", "benchmark_save", "benchmark_compare")
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    global _session
+    compare = config.getoption("benchmark_compare")
+    _session = BenchmarkSession(
+        baseline=BenchmarkSession.load(compare) if compare else None,
+        threshold=config.getoption("benchmark_threshold")
+    )
+
+
+@pytest.fixture
+def max_files(request) -> int:
+    """ The maximum amount of files of generated trees """
+    return request.config.getoption("benchmark_max_files")
+
+
+@pytest.fixture
+def para_benchmark(request) -> Callable[..., BenchmarkResult]:
+    """
+    Returns a function measuring the passed function, which adds the result
+    to the session and fails the test if it regressed compared to the
+    baseline
+    """
+    if not _enabled(request.config):
+        pytest.skip("Benchmarks are only run using '--benchmark'")
+
+    def _run(
+            func: Callable[[], Any],
+            setup: Optional[Callable[[], Any]] = None,
+            rounds: int = 5,
+            warmup: int = 1,
+            **extra: Any
+    ) -> BenchmarkResult:
+        result = BenchmarkResult(
+            request.node.name, measure(func, setup, rounds, warmup), extra
+        )
+        if (regression := _session.add(result)) is not None:
+            pytest.fail(regression)
+        return result
+
+    return _run
+
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config) -> None:
+    if _session is None or not _session.results:
+        return
+
+    terminalreporter.section("benchmarks")
+    for name, result in sorted(_session.results.items()):
+        change = _session.change(name)
+        terminalreporter.write_line(
+            f"{name:<60} {result.median * 1000:>12.3f}ms"
+            + (f" {change:>+8.1%}" if change is not None else "")
+        )
+
+    if path := config.getoption("benchmark_save"):
+        _session.save(path)
+        terminalreporter.write_line(f"Saved the results to '{path}'")
@@ -0,0 +1,149 @@
+# coding=utf-8
+""" Benchmarks of the CLI hot paths """
+import io
+import logging
+import shutil
+import statistics
+
+import pytest
+from rich.console import Console
+
+from paralang_cli.logging import (ParaCLIStreamHandler, ParaCLIFileHandler,
+                                  ParaCLIFormatter)
+from paralang_cli.syntax_check import cli_run_syntax_check
+from paralang_cli.utils import cli_check_destination
+from tests.test_logging import LegacyParaCLIFormatter, create_record
+from tests.test_startup import run_para, get_imports
+
+from . import create_para_tree, create_output_tree, measure
+
+TREE_SIZES = (10, 100, 1000, 10000)
+LOG_RECORDS = 2000
+# Maximum cumulative import time in seconds for 'para --version'
+IMPORT_BUDGET: float = 0.250
+
+
+class BufferStreamHandler(ParaCLIStreamHandler):
+    """ Stream handler writing into a buffer instead of the terminal """
+
+    def __init__(self):
+        self._console = Console(file=io.StringIO(), width=200)
+        super().__init__()
+
+    @property
+    def console(self) -> Console:
+        return self._console
+
+
+def emit_records(handler: logging.Handler) -> None:
+    """ Passes the records through the handler """
+    for i in range(LOG_RECORDS):
+        handler.handle(logging.LogRecord(
+            "parac", logging.INFO, __file__, 0, "Compiled unit %s", (i,),
+            None
+        ))
+
+
+def test_cold_start_version(para_benchmark):
+    def _run():
+        assert run_para("--version").returncode == 0
+
+    para_benchmark(_run, rounds=5)
+
+
+def test_version_import_budget(para_benchmark):
+    totals = []
+
+    def _run():
+        p = run_para("--version", import_time=True)
+        assert p.returncode == 0, p.stderr
+        assert "Para Compiler" in p.stdout
+        totals.append(sum(get_imports(p.stderr).values()) / 1_000_000)
+
+    para_benchmark(_run, rounds=5, warmup=0)
+    total = statistics.median(totals)
+    assert total < IMPORT_BUDGET, \
+        f"Import time of {total:.3f}s exceeds the budget of " \
+        f"{IMPORT_BUDGET:.3f}s"
+
+
+@pytest.mark.parametrize("files", TREE_SIZES)
+def test_syntax_check_tree(para_benchmark, max_files, tmp_path, files):
+    if files > max_files:
+        pytest.skip(f"Exceeds --benchmark-max-files={max_files}")
+    tree = create_para_tree(tmp_path, files)
+
+    def _run():
+        results = list(cli_run_syntax_check(tree, "utf-8"))
+        assert all(r.success for r in results)
+
+    # Big trees take minutes, so they are only measured once
+    big = files >= 1000
+    para_benchmark(
+        _run, rounds=1 if big else 3, warmup=0 if big else 1, files=files
+    )
+
+
+def test_stream_handler_throughput(para_benchmark):
+    handler = BufferStreamHandler()
+    handler.setFormatter(ParaCLIFormatter(datefmt="%H:%M:%S"))
+
+    def _reset():
+        handler.console.file.seek(0)
+        handler.console.file.truncate()
+
+    para_benchmark(
+        lambda: emit_records(handler), setup=_reset, records=LOG_RECORDS
+    )
+
+
+def test_formatter_throughput(para_benchmark):
+    records = [
+        create_record(level) for level in (
+            logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR,
+            logging.CRITICAL
+        )
+    ] * (LOG_RECORDS // 5)
+    formatter = ParaCLIFormatter(datefmt="%H:%M:%S")
+    legacy = LegacyParaCLIFormatter(datefmt="%H:%M:%S")
+    legacy_median = statistics.median(
+        measure(lambda: [legacy.format(r) for r in records])
+    )
+
+    result = para_benchmark(
+        lambda: [formatter.format(r) for r in records],
+        records=len(records),
+        legacy_median=legacy_median
+    )
+    # Only a loose bound compared to the previous implementation, which
+    # swapped the format of the shared style for every record
+    assert result.median < legacy_median / 0.75
+
+
+def test_file_handler_throughput(para_benchmark, tmp_path):
+    handler = ParaCLIFileHandler(
+        filename=tmp_path / "para.log", max_size=0, rotate_interval=0
+    )
+    handler.setFormatter(ParaCLIFormatter(file_mng=True))
+    try:
+        para_benchmark(lambda: emit_records(handler), records=LOG_RECORDS)
+    finally:
+        handler.close()
+
+
+@pytest.mark.parametrize("files", (1000, 10000))
+def test_check_destination_overwrite(
+        para_benchmark, tmp_path, files
+):
+    output = tmp_path / "build"
+
+    def _setup():
+        shutil.rmtree(output, ignore_errors=True)
+        create_output_tree(output, files)
+
+    para_benchmark(
+        lambda: cli_check_destination("build", output, True, tmp_path),
+        setup=_setup,
+        rounds=3,
+        files=files
+    )
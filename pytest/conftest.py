@@ -1,2 +1,100 @@
 # coding=utf-8
 """ Configuration file for pytest """
+import os
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+ENCODING = 'utf-8'
+
+
+class FakeCompileResult:
+    """ Result writing a C file named after the unit into the build folder """
+
+    def __init__(self, file: str):
+        self.file = Path(file)
+
+    def write_results(self, build_path: str, dist_path: str) -> None:
+        os.makedirs(build_path, exist_ok=True)
+        content = self.file.read_text(encoding=ENCODING)
+        Path(build_path, f"{self.file.stem}.c").write_text(
+            f"/* {content.strip()} */\n", encoding=ENCODING
+        )
+
+
+@pytest.fixture
+def compiled_units(monkeypatch) -> List[str]:
+    """
+    Replaces the compile process and records the paths of the compiled
+    units. Units containing 'error' fail to compile
+    """
+    import paralang_base.compiler
+    compiled = []
+
+    class FakeCompileProcess:
+        def __init__(self, files, *_):
+            self.files = files
+
+        async def compile(self):
+            compiled.append(str(self.files[0]))
+            if "error" in Path(self.files[0]).read_text(encoding=ENCODING):
+                raise RuntimeError("Invalid unit")
+            return FakeCompileResult(self.files[0])
+
+    monkeypatch.setattr(
+        paralang_base.compiler, "CompileProcess", FakeCompileProcess
+    )
+    return compiled
+
+
+@pytest.fixture
+def build_project() -> Callable[..., list]:
+    """
+    Returns a function building the passed units of a project into its build
+    and dist folder using an artifact store
+    """
+    from paralang_cli.build import cli_run_build
+
+    def _build(project: Path, store, *names: str, remote=None) -> list:
+        return list(cli_run_build(
+            [str(project / f"{n}.para") for n in names], ENCODING,
+            project / "build", project / "dist", project_root=project,
+            jobs=1, store=store, remote=remote
+        ))
+
+    return _build
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "Para CLI benchmarks")
+    group.addoption(
+        "--benchmark",
+        action="store_true",
+        help="Run the benchmarks in 'benchmarks/'"
+    )
+    group.addoption(
+        "--benchmark-save",
+        metavar="PATH",
+        help="Run the benchmarks and save the results as JSON"
+    )
+    group.addoption(
+        "--benchmark-compare",
+        metavar="PATH",
+        help="Run the benchmarks and fail those that regressed compared to "
+             "the saved results"
+    )
+    group.addoption(
+        "--benchmark-threshold",
+        type=float,
+        default=0.25,
+        help="Allowed relative slow-down compared to the saved results "
+             "(default: 0.25)"
+    )
+    group.addoption(
+        "--benchmark-max-files",
+        type=int,
+        default=100,
+        help="Maximum amount of files of the generated syntax-check trees "
+             "(default: 100)"
+    )
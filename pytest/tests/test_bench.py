@@ -0,0 +1,78 @@
+# coding=utf-8
+""" Tests for the compiler throughput benchmark used by 'para bench' """
+import io
+import json
+
+import pytest
+
+from paralang_cli.bench import BenchReport, cli_run_bench
+from paralang_cli.output import cli_set_output_format
+from paralang_cli.scripts.para import ParaCLI
+
+from .test_syntax_check import main_file_path
+
+ENCODING = 'utf-8'
+
+
+def test_run_bench():
+    results = list(cli_run_bench(
+        [str(main_file_path)], ENCODING, str(main_file_path.parent),
+        ("syntax-check",), rounds=3, warmup=1
+    ))
+    assert len(results) == 1
+    result = results[0].to_json()
+    assert result["files"] == 1 and result["failures"] == 0
+    assert len(result["rounds"]) == 3
+    assert result["lines_per_second"] > 0
+    assert set(result["file_percentiles"]) == {"p50", "p90", "p95", "p99"}
+    assert result["peak_rss"] is None or result["peak_rss"] > 0
+
+
+def test_report_compare(tmp_path):
+    stages = {"syntax-check": {"lines_per_second": 100.0}}
+    BenchReport(stages).save(tmp_path / "baseline.json")
+    baseline = BenchReport.load(tmp_path / "baseline.json")
+    assert baseline.info["paralang_base"]
+
+    report = BenchReport({
+        "syntax-check": {"lines_per_second": 80.0},
+        "compile": {"lines_per_second": 10.0}
+    })
+    assert report.compare(baseline) == {"syntax-check": pytest.approx(-0.2)}
+
+    # Failing files finish early, so stages with failures are not compared
+    failing = BenchReport({
+        "syntax-check": {"lines_per_second": 1000.0, "failures": 1}
+    })
+    assert failing.compare(baseline) == {}
+    assert failing.incomparable(baseline) == ["syntax-check"]
+    assert baseline.compare(failing) == {}
+
+    (tmp_path / "invalid.json").write_text("[]")
+    with pytest.raises(ValueError):
+        BenchReport.load(tmp_path / "invalid.json")
+
+
+def test_bench_command(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    BenchReport({
+        "syntax-check": {"lines_per_second": 1e12}
+    }).save(baseline)
+
+    stream = io.StringIO()
+    cli_set_output_format("ndjson", stream)
+    try:
+        with pytest.raises(SystemExit):
+            ParaCLI.para_bench(
+                (str(main_file_path),), (), ENCODING, 1, 0, "syntax-check",
+                str(tmp_path / "results.json"), str(baseline), 0.1, False,
+                keep_open=False
+            )
+    finally:
+        cli_set_output_format("text")
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["stage"] for r in records if r["type"] == "stage"] == \
+        ["syntax-check"]
+    assert records[-1]["regressions"] == ["syntax-check"]
+    saved = BenchReport.load(tmp_path / "results.json")
+    assert saved.info["rounds"] == 1
@@ -0,0 +1,203 @@
+# coding=utf-8
+""" Tests for the incremental build """
+import json
+from pathlib import Path
+
+import pytest
+
+from paralang_cli import build
+from paralang_cli.build import (BuildManifest, BuildGraph, BuildUnitResult,
+                                BUILD_MANIFEST_NAME, cli_scan_includes,
+                                cli_run_build, cli_get_current_executable)
+
+ENCODING = 'utf-8'
+
+
+def create_units(folder: Path) -> dict:
+    """
+    Creates the units 'a' (independent), 'b' (includes 'header') and 'c'
+    (includes 'b') and returns their paths
+    """
+    (folder / "header.parah").write_text("int h();\n", encoding=ENCODING)
+    (folder / "a.para").write_text("int a() {}\n", encoding=ENCODING)
+    (folder / "b.para").write_text(
+        '#include "header.parah"\nint b() {}\n', encoding=ENCODING
+    )
+    (folder / "c.para").write_text(
+        '  #include "b.para"\n#include <c-stdio.h>\nint c() {}\n',
+        encoding=ENCODING
+    )
+    return {n: str(folder / f"{n}.para") for n in ("a", "b", "c")}
+
+
+class TestBuildManifest:
+    def test_round_trip(self, tmp_path):
+        manifest = BuildManifest.load(tmp_path, ENCODING)
+        assert manifest.units == {}
+        assert not BuildManifest.exists(tmp_path)
+
+        manifest.update("/main.para", "hash")
+        manifest.save()
+        assert BuildManifest.exists(tmp_path)
+        assert BuildManifest.load(tmp_path, ENCODING).is_current(
+            "/main.para", "hash"
+        )
+
+    def test_invalidated_by_options(self, tmp_path):
+        manifest = BuildManifest(
+            tmp_path / BUILD_MANIFEST_NAME, ENCODING, "0.0.0"
+        )
+        manifest.update("/main.para", "hash")
+        manifest.save()
+        assert BuildManifest.load(tmp_path, ENCODING).units == {}
+
+        BuildManifest(
+            tmp_path / BUILD_MANIFEST_NAME, "ascii", units={"/a": "hash"}
+        ).save()
+        assert BuildManifest.load(tmp_path, ENCODING).units == {}
+        assert BuildManifest.load(tmp_path, "ascii").units == {"/a": "hash"}
+
+    def test_executable(self, tmp_path):
+        program = tmp_path / "main"
+        program.write_bytes(b"program")
+        manifest = BuildManifest.load(tmp_path, ENCODING)
+        manifest.update("/main.para", "hash")
+        manifest.set_executable(program, ["/main.para"])
+        manifest.save()
+
+        manifest = BuildManifest.load(tmp_path, ENCODING)
+        assert manifest.get_executable(["/main.para"]) == str(program)
+        assert manifest.get_executable(["/main.para", "/b.para"]) is None
+
+        program.write_bytes(b"modified program")
+        assert manifest.get_executable(["/main.para"]) is None
+
+    def test_corrupted(self, tmp_path):
+        (tmp_path / BUILD_MANIFEST_NAME).write_text("{", encoding=ENCODING)
+        assert BuildManifest.load(tmp_path, ENCODING).units == {}
+
+
+class TestBuildGraph:
+    def test_scan_includes(self, tmp_path):
+        units = create_units(tmp_path)
+        assert cli_scan_includes(units["c"], tmp_path) == [units["b"]]
+        assert cli_scan_includes(units["a"], tmp_path) == []
+
+    def test_waves(self, tmp_path):
+        units = create_units(tmp_path)
+        graph = BuildGraph(
+            [units["c"], units["b"], units["a"]], tmp_path, ENCODING
+        )
+        assert graph.dependencies(units["c"]) == {units["b"]}
+        assert graph.waves() == [[units["b"], units["a"]], [units["c"]]]
+
+    def test_cycle(self, tmp_path):
+        units = create_units(tmp_path)
+        (tmp_path / "header.parah").write_text(
+            '#include "c.para"\n', encoding=ENCODING
+        )
+        graph = BuildGraph(list(units.values()), tmp_path, ENCODING)
+        assert graph.waves() == [[units["a"]], [units["b"], units["c"]]]
+
+    def test_input_hash(self, tmp_path):
+        units = create_units(tmp_path)
+        graph = BuildGraph(list(units.values()), tmp_path, ENCODING)
+        before = {u: graph.input_hash(u) for u in units.values()}
+
+        # Changing an include changes every unit including it transitively
+        with open(tmp_path / "header.parah", "a", encoding=ENCODING) as file:
+            file.write("\n")
+        graph = BuildGraph(list(units.values()), tmp_path, ENCODING)
+        after = {u: graph.input_hash(u) for u in units.values()}
+        assert before[units["a"]] == after[units["a"]]
+        assert before[units["b"]] != after[units["b"]]
+        assert before[units["c"]] != after[units["c"]]
+
+        debug_graph = BuildGraph(
+            list(units.values()), tmp_path, ENCODING, debug=True
+        )
+        assert debug_graph.input_hash(units["a"]) != after[units["a"]]
+
+
+class TestRunBuild:
+    def test_incremental(self, tmp_path, compiled_units):
+        units = create_units(tmp_path)
+        build_path = tmp_path / "build"
+        build_path.mkdir()
+        files = list(units.values())
+
+        def _run():
+            compiled_units.clear()
+            return list(cli_run_build(
+                files, ENCODING, build_path, tmp_path / "dist", tmp_path,
+                jobs=1
+            ))
+
+        results = _run()
+        assert not any(r.skipped for r in results)
+        assert compiled_units == [units["a"], units["b"], units["c"]]
+
+        results = _run()
+        assert all(r.skipped for r in results)
+        assert compiled_units == []
+
+        # Linked executables are outdated once a unit is recompiled
+        program = tmp_path / "dist" / "a"
+        program.parent.mkdir()
+        program.write_bytes(b"program")
+        manifest = BuildManifest.load(build_path, ENCODING)
+        manifest.set_executable(program, files)
+        manifest.save()
+        assert cli_get_current_executable(
+            files, ENCODING, build_path, tmp_path
+        ) == str(program)
+
+        with open(units["b"], "a", encoding=ENCODING) as file:
+            file.write("\n")
+        assert cli_get_current_executable(
+            files, ENCODING, build_path, tmp_path
+        ) is None
+        _run()
+        assert compiled_units == [units["b"], units["c"]]
+        assert BuildManifest.load(build_path, ENCODING).get_executable(
+            files
+        ) is None
+
+    def test_numbered_build_folder(self, tmp_path, compiled_units):
+        # The default build folder contained other files, so the build was
+        # written into a numbered folder by cli_check_destination()
+        units = create_units(tmp_path)
+        (tmp_path / "build").mkdir()
+        (tmp_path / "build" / "other.txt").write_text("")
+        build_path = tmp_path / "build_2"
+        build_path.mkdir()
+        files = list(units.values())
+        list(cli_run_build(
+            files, ENCODING, build_path, tmp_path / "dist", tmp_path, jobs=1
+        ))
+        assert cli_get_current_executable(files, ENCODING, None, tmp_path) \
+            is None
+
+        program = tmp_path / "dist" / "a"
+        program.parent.mkdir()
+        program.write_bytes(b"program")
+        manifest = BuildManifest.load(build_path, ENCODING)
+        manifest.set_executable(program, files)
+        manifest.save()
+        assert cli_get_current_executable(
+            files, ENCODING, project_root=tmp_path
+        ) == str(program)
+
+    def test_failed_units_are_rebuilt(self, tmp_path, monkeypatch):
+        units = create_units(tmp_path)
+        monkeypatch.setattr(
+            build,
+            "cli_compile_unit",
+            lambda f, *_: BuildUnitResult(f, [(40, "error")], 0.0, False)
+        )
+        results = list(cli_run_build(
+            [units["a"]], ENCODING, tmp_path, tmp_path, tmp_path, jobs=1
+        ))
+        assert results[0].errors == 1
+        with open(tmp_path / BUILD_MANIFEST_NAME, encoding=ENCODING) as file:
+            assert json.load(file)["units"] == {}
@@ -0,0 +1,93 @@
+# coding=utf-8
+""" Tests for the persistent CLI cache """
+import os
+import time
+
+from paralang_cli.cache import (ParaCLICache, cli_hash_file,
+                                cli_get_key_path, cli_mask_path,
+                                cli_unmask_path)
+
+
+class TestCache:
+    def test_put_and_get(self, tmp_path):
+        cache = ParaCLICache("test", cache_dir=tmp_path)
+        assert cache.get("a" * 64) is None
+
+        cache.put("a" * 64, b"data")
+        assert cache.get("a" * 64) == b"data"
+        assert cache.size() == 4
+
+    def test_prune_least_recently_used(self, tmp_path):
+        cache = ParaCLICache("test", cache_dir=tmp_path, max_size=8)
+        for i, key in enumerate(("a" * 64, "b" * 64, "c" * 64)):
+            cache.put(key, b"1234")
+            path = cache.path / key[:2] / key
+            mtime = time.time() - 7200 + i
+            os.utime(path, (mtime, mtime))
+
+        # Marks 'a' as recently used, so 'b' is the oldest entry
+        assert cache.get("a" * 64) is not None
+        assert cache.prune() == 1
+        assert cache.get("b" * 64) is None
+        assert cache.get("a" * 64) is not None
+        assert cache.get("c" * 64) is not None
+
+    def test_prune_if_needed(self, tmp_path, monkeypatch):
+        cache = ParaCLICache("test", cache_dir=tmp_path, max_size=8)
+        cache.put("a" * 64, b"1234")
+        assert cache.prune_if_needed() == 0
+
+        # Runs that only read entries or stay below the estimate never walk
+        # the namespace
+        walks = []
+        entries = cache._entries
+        monkeypatch.setattr(
+            cache, "_entries", lambda: walks.append(1) or entries()
+        )
+        assert cache.get("a" * 64) == b"1234"
+        assert cache.prune_if_needed() == 0
+        cache.put("b" * 64, b"1234")
+        assert cache.prune_if_needed() == 0
+        assert walks == []
+
+        cache.put("c" * 64, b"1234")
+        assert cache.prune_if_needed() == 1
+        assert walks == [1]
+        assert cache.size() == 8
+
+    def test_clear(self, tmp_path):
+        cache = ParaCLICache("test", cache_dir=tmp_path)
+        cache.put("a" * 64, b"data")
+        cache.clear()
+        assert cache.get("a" * 64) is None
+        assert not cache.path.exists()
+
+    def test_stats(self, tmp_path):
+        cache = ParaCLICache("test", cache_dir=tmp_path, max_size=0)
+        assert cache.load_stats() == {"hits": 0, "misses": 0}
+
+        cache.record_stats(2, 1)
+        cache.record_stats(1, 0)
+        cache.prune()
+        assert cache.load_stats() == {"hits": 3, "misses": 1}
+
+        cache.clear()
+        assert cache.load_stats() == {"hits": 0, "misses": 0}
+
+    def test_hash_file(self, tmp_path):
+        path = tmp_path / "file.para"
+        path.write_bytes(b"int x;")
+        assert cli_hash_file(path) == cli_hash_file(path)
+        assert cli_hash_file(path, "utf-8") != cli_hash_file(path, "ascii")
+
+    def test_key_path(self, tmp_path):
+        assert cli_get_key_path(tmp_path / "src" / "a.para", tmp_path) == \
+            "src/a.para"
+
+    def test_mask_path(self, tmp_path):
+        file = str(tmp_path / "a" / "main.para")
+        masked = cli_mask_path([(40, f"In file '{file}'")], tmp_path / "a")
+        assert str(tmp_path) not in masked[0][1]
+
+        unmasked = cli_unmask_path(masked, tmp_path / "b")
+        assert unmasked == [(40, f"In file '{tmp_path / 'b' / 'main.para'}'")]
@@ -0,0 +1,103 @@
+# coding=utf-8
+""" Tests for the terminal detection and the plain console """
+import io
+
+import pytest
+
+from paralang_cli import console
+from paralang_cli.console import (TERMINAL_CAPS_ENV, TerminalCapabilities,
+                                  ParaCLIPlainConsole,
+                                  ParaCLIOutputMultiplexer,
+                                  cli_get_terminal_capabilities,
+                                  cli_use_rich_console)
+
+
+@pytest.fixture
+def clean_capabilities(monkeypatch):
+    """ Removes the cached capabilities of the process """
+    monkeypatch.setattr(console, "_capabilities", None)
+    monkeypatch.delenv(TERMINAL_CAPS_ENV, raising=False)
+    for var in console.CI_ENV_VARS:
+        monkeypatch.delenv(var, raising=False)
+
+
+class TestTerminalCapabilities:
+    def test_env_round_trip(self):
+        caps = TerminalCapabilities(True, False, 150, True, "1:2")
+        assert TerminalCapabilities.from_env(caps.to_env()) == caps
+        assert TerminalCapabilities.from_env("") is None
+        assert TerminalCapabilities.from_env("width=a") is None
+
+    def test_cached_in_env(self, clean_capabilities, monkeypatch):
+        caps = cli_get_terminal_capabilities()
+        assert TerminalCapabilities.from_env(
+            console.os.environ[TERMINAL_CAPS_ENV]
+        ) == caps
+
+        # A child writing to the same output reuses the capabilities
+        cached = TerminalCapabilities(True, False, 200, True, caps.output_id)
+        monkeypatch.setenv(TERMINAL_CAPS_ENV, cached.to_env())
+        assert cli_get_terminal_capabilities(refresh=False) is caps
+        monkeypatch.setattr(console, "_capabilities", None)
+        assert cli_get_terminal_capabilities() == cached
+
+        # ... while a child with another output detects them again
+        other = TerminalCapabilities(True, False, 200, True, "other")
+        monkeypatch.setenv(TERMINAL_CAPS_ENV, other.to_env())
+        monkeypatch.setattr(console, "_capabilities", None)
+        assert cli_get_terminal_capabilities() == caps
+
+    def test_ci(self, clean_capabilities, monkeypatch):
+        monkeypatch.setenv("GITHUB_ACTIONS", "true")
+        assert cli_get_terminal_capabilities().ci
+        assert not cli_use_rich_console()
+
+
+class TestPlainConsole:
+    def test_print(self):
+        out = ParaCLIPlainConsole(width=20, file=io.StringIO())
+        out.print("[bold red]Error[/bold red] \\[x] [1, 2]", "[/]a")
+        out.print("[b]ab", justify="center")
+        out.rule("[bold]Result")
+        out.rule()
+        assert out.file.getvalue().splitlines() == [
+            "Error [x] [1, 2] a",
+            "         ab",
+            "------ Result ------",
+            "-" * 20
+        ]
+
+
+class BufferedStream:
+    """ Stream, which only writes into the shared output once flushed """
+
+    def __init__(self, output: list, buffered: bool):
+        self.output = output
+        self.buffered = buffered
+        self.buffer = []
+
+    def write(self, text: str) -> int:
+        self.buffer.append(text)
+        if not self.buffered:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        self.output.extend(self.buffer)
+        self.buffer.clear()
+
+
+class TestOutputMultiplexer:
+    def test_order(self):
+        output = []
+        stdout = BufferedStream(output, buffered=True)
+        stderr = BufferedStream(output, buffered=False)
+        multiplexer = ParaCLIOutputMultiplexer(stdout, stderr)
+
+        multiplexer.write(stdout, "banner\n")
+        multiplexer.write(stdout, "log\n")
+        assert output == []
+        multiplexer.write(stderr, "error\n")
+        multiplexer.write(stdout, "result\n")
+        multiplexer.flush()
+        assert output == ["banner\n", "log\n", "error\n", "result\n"]
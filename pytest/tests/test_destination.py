@@ -0,0 +1,63 @@
+# coding=utf-8
+""" Tests for the validation of the output folders """
+import os
+
+from paralang_cli.utils import (cli_check_destination,
+                                cli_remove_in_background,
+                                cli_wait_for_removals)
+
+from . import overwrite_builtin_input, reset_input
+
+
+def create_output(path, files: int = 20) -> None:
+    """ Creates an output folder containing files in a nested folder """
+    os.makedirs(path / "nested")
+    for i in range(files):
+        (path / "nested" / f"file_{i}.c").write_text("int x;\n")
+
+
+class TestRemoveInBackground:
+    def test_path_is_free_immediately(self, tmp_path):
+        create_output(tmp_path / "build")
+        thread = cli_remove_in_background(tmp_path / "build")
+        assert thread is not None
+        assert not (tmp_path / "build").exists()
+
+        cli_wait_for_removals()
+        assert not thread.is_alive()
+        assert os.listdir(tmp_path) == []
+
+    def test_interrupted_removals_are_finished(self, tmp_path):
+        create_output(tmp_path / ".para-removed-build-interrupted")
+        create_output(tmp_path / "dist")
+        cli_remove_in_background(tmp_path / "dist")
+        cli_wait_for_removals()
+        assert os.listdir(tmp_path) == []
+
+
+class TestCheckDestination:
+    @staticmethod
+    def teardown_method(_):
+        reset_input()
+
+    def test_overwrite(self, tmp_path):
+        output = tmp_path / "build"
+        create_output(output)
+        result = cli_check_destination("build", output, True, tmp_path)
+        assert result == output
+        assert os.listdir(output) == []
+
+        cli_wait_for_removals()
+        assert os.listdir(tmp_path) == ["build"]
+
+    def test_numbered_copy(self, tmp_path):
+        output = tmp_path / "build"
+        create_output(output)
+        os.mkdir(tmp_path / "build_2")
+        os.mkdir(tmp_path / "build_3")
+
+        overwrite_builtin_input("n")
+        result = cli_check_destination("build", output, False, tmp_path)
+        assert result == f"{tmp_path}/build_4"
+        assert os.path.isdir(result)
+        assert len(os.listdir(output / "nested")) == 20
@@ -0,0 +1,139 @@
+# coding=utf-8
+""" Tests for the import-graph index and the affected-target queries """
+import io
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from paralang_cli.graph import (ImportGraphIndex, GraphError,
+                                cli_git_changed_files)
+from paralang_cli.output import cli_set_output_format
+from paralang_cli.scripts.paraproj import ParaProjCLI
+
+ENCODING = 'utf-8'
+
+
+def create_project(root: Path) -> dict:
+    """
+    Creates a project, where 'main' includes 'net', which includes 'core',
+    and 'tool' is independent
+    """
+    files = {
+        "core.ph": "int core;\n",
+        "net/net.ph": '#include "core.ph"\n',
+        "main.para": '#include "net/net.ph"\nint main() {}\n',
+        "tool.para": "int tool() {}\n",
+    }
+    paths = {}
+    for name, content in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding=ENCODING)
+        paths[path.stem] = str(path)
+    return paths
+
+
+@pytest.fixture
+def index(tmp_path) -> ImportGraphIndex:
+    return ImportGraphIndex(tmp_path / "project", tmp_path / "index.json")
+
+
+class TestImportGraphIndex:
+    def test_incremental_update(self, tmp_path, index):
+        files = create_project(tmp_path / "project")
+        assert index.update() == 4
+        assert index.includes(files["net"]) == [files["core"]]
+
+        # Reloading the index and touching a file does not rescan anything
+        index = ImportGraphIndex(index.project_root, index.path)
+        os.utime(files["main"], ns=(0, 0))
+        assert index.update() == 0
+        assert index.files == sorted(files.values())
+
+        Path(files["tool"]).write_text('#include "core.ph"\n')
+        assert index.update() == 1
+        assert index.dependents(files["core"]) == {
+            files["net"], files["tool"]
+        }
+
+    def test_affected(self, tmp_path, index):
+        files = create_project(tmp_path / "project")
+        index.update()
+        assert index.affected([files["core"]]) == sorted(
+            files[n] for n in ("core", "net", "main")
+        )
+        assert index.affected([files["tool"]]) == [files["tool"]]
+        assert index.affected([tmp_path / "unrelated.para"]) == []
+
+    def test_removed_file(self, tmp_path, index):
+        files = create_project(tmp_path / "project")
+        index.update()
+        os.remove(files["net"])
+        assert index.affected([files["net"]]) == [files["main"]]
+
+    def test_include_resolution(self, tmp_path, index):
+        files = create_project(tmp_path / "project")
+        index.update()
+
+        # A new file next to the includer takes precedence over the root
+        local = tmp_path / "project" / "net" / "core.ph"
+        local.write_text("int local;\n")
+        index.update()
+        assert index.includes(files["net"]) == [str(local)]
+        assert index.affected([files["core"]]) == [files["core"]]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="Requires git")
+class TestGitChangedFiles:
+    @staticmethod
+    def git(root: Path, *args: str) -> None:
+        subprocess.run(
+            ["git", "-c", "user.name=para", "-c", "user.email=para@local",
+             *args],
+            cwd=root, check=True, capture_output=True
+        )
+
+    def test_changed_files(self, tmp_path):
+        project = tmp_path / "project"
+        files = create_project(project)
+        self.git(project, "init", "-q")
+        self.git(project, "add", ".")
+        self.git(project, "commit", "-q", "-m", "init")
+
+        Path(files["core"]).write_text("int core2;\n")
+        os.remove(files["tool"])
+        (project / "new.para").write_text("int new;\n")
+        assert cli_git_changed_files("HEAD", project / "net") == [
+            os.path.realpath(p) for p in
+            (files["core"], project / "new.para", files["tool"])
+        ]
+        with pytest.raises(GraphError, match="bad revision"):
+            cli_git_changed_files("missing", project)
+
+
+def test_affected_command(tmp_path, monkeypatch):
+    monkeypatch.setenv("PARA_CACHE_DIR", str(tmp_path / "cache"))
+    project = tmp_path / "project"
+    files = create_project(project)
+    (project / "para-workspace.json").write_text(json.dumps({
+        "packages": {".": {"files": ["main.para"]}, "tools": {"path": "."}}
+    }))
+
+    stream = io.StringIO()
+    cli_set_output_format("ndjson", stream)
+    try:
+        ParaProjCLI.paraproj_affected(
+            (files["net"],), None, str(project), None, False, keep_open=False
+        )
+    finally:
+        cli_set_output_format("text")
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r.get("file") for r in records if r["type"] == "file"] == [
+        "main.para", os.path.join("net", "net.ph")
+    ]
+    assert [r["name"] for r in records if r["type"] == "package"] == \
+        [".", "tools"]
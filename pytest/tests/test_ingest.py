@@ -0,0 +1,91 @@
+# coding=utf-8
+""" Tests for the streaming ingestion of source files """
+import pytest
+
+from paralang_cli.ingest import (ParaCLICommentStripper, ParaCLISourceStream,
+                                 cli_validate_encoding)
+from paralang_cli.profiling import cli_get_peak_rss
+from paralang_cli.syntax_check import cli_syntax_check_file
+
+from . import BASE_TEST_PATH
+
+ENCODING = 'utf-8'
+main_file_path = BASE_TEST_PATH / "test_files" / "main.para"
+
+SOURCES = [
+    "int a; // comment\nint b;\n",
+    "int a; /* multi\nline */ int b;",
+    "a*//b\nc/*/d*/e",
+    "/**/x/***/y//\r\nz\r\rw\r",
+    "x / y /* unterminated",
+    "// only a comment",
+    "",
+]
+
+
+def strip(text: str, chunk_size: int) -> str:
+    """ Removes the comments by passing the text in chunks """
+    stripper = ParaCLICommentStripper()
+    chunks = (
+        text[i:i + chunk_size] for i in range(0, len(text), chunk_size)
+    )
+    return "".join(stripper.feed(c) for c in chunks) + stripper.close()
+
+
+class TestCommentStripper:
+    @pytest.mark.parametrize("text", SOURCES)
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 1024])
+    def test_matches_compiler(self, text, chunk_size):
+        from paralang_base.compiler import ParaCompiler
+        expected = ParaCompiler.remove_comments_from_str(text)
+        assert strip(text, chunk_size) == expected
+
+
+class TestSourceStream:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+    def test_from_file(self, tmp_path, chunk_size):
+        path = tmp_path / "unit.para"
+        path.write_text("int ä; // ü\r\nint 𝔁;\n", encoding=ENCODING)
+        stream = ParaCLISourceStream.from_file(path, ENCODING, chunk_size)
+
+        assert stream.strdata == "int ä; \nint 𝔁;\n"
+        assert stream.fileName == str(path)
+        assert list(stream.data) == [ord(c) for c in stream.strdata]
+        assert stream.LA(1) == ord("i")
+        assert stream.getText(4, 4) == "ä"
+
+    def test_invalid_encoding(self, tmp_path):
+        path = tmp_path / "unit.para"
+        path.write_bytes(b"int a;\n" * 10 + b"\xff")
+        with pytest.raises(UnicodeDecodeError, match="at byte 70"):
+            cli_validate_encoding(path, ENCODING, chunk_size=16)
+        with pytest.raises(UnicodeDecodeError):
+            ParaCLISourceStream.from_file(path, ENCODING, chunk_size=16)
+
+
+class TestStreamingSyntaxCheck:
+    def test_valid_file(self):
+        result = cli_syntax_check_file(
+            str(main_file_path), ENCODING, streaming=True
+        )
+        assert result.success
+        assert result.diagnostics == cli_syntax_check_file(
+            str(main_file_path), ENCODING
+        ).diagnostics
+
+    def test_invalid_file(self, tmp_path):
+        path = tmp_path / "invalid.para"
+        path.write_text("int main() { return 0 }\n", encoding=ENCODING)
+        result = cli_syntax_check_file(str(path), ENCODING, streaming=True)
+        assert not result.success
+
+    def test_invalid_encoding(self, tmp_path):
+        path = tmp_path / "invalid.para"
+        path.write_bytes(b"\xff\xfe")
+        result = cli_syntax_check_file(str(path), ENCODING, streaming=True)
+        assert result.errors == 1
+
+
+def test_peak_rss():
+    peak = cli_get_peak_rss()
+    assert peak is None or peak > 1024 ** 2
@@ -0,0 +1,229 @@
+# coding=utf-8
+""" Tests for the logging handlers and formatter of the CLI """
+import gzip
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from rich.console import Console
+
+from paralang_cli.logging import (ParaCLIStreamHandler, ParaCLIFileHandler,
+                                  ParaCLIFormatter, ParaCLIQueueHandler,
+                                  cli_enable_queued_logging,
+                                  cli_flush_logging, cli_stop_queued_logging)
+
+
+class RecordingStreamHandler(ParaCLIStreamHandler):
+    """ Stream handler writing onto its own recording console """
+
+    def __init__(self, console: Console):
+        self._console = console
+        super().__init__()
+
+    @property
+    def console(self) -> Console:
+        return self._console
+
+
+@pytest.fixture
+def queued_logger(tmp_path):
+    """ Returns a logger with a stream and file handler in queued mode """
+    log = logging.getLogger("parac.test_logging")
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+
+    console = Console(record=True, width=200, force_terminal=False)
+    stream_handler = RecordingStreamHandler(console)
+    stream_handler.setLevel(logging.INFO)
+    stream_handler.setFormatter(ParaCLIFormatter())
+    file_handler = ParaCLIFileHandler(
+        filename=tmp_path / "para.log", encoding="utf-8"
+    )
+    file_handler.setFormatter(ParaCLIFormatter(file_mng=True))
+    log.addHandler(stream_handler)
+    log.addHandler(file_handler)
+
+    cli_enable_queued_logging(log)
+    yield log, stream_handler, file_handler, console
+    cli_stop_queued_logging(log)
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+        handler.close()
+
+
+class TestQueuedLogging:
+    def test_handlers_are_replaced(self, queued_logger):
+        log, stream_handler, file_handler, _ = queued_logger
+        assert stream_handler not in log.handlers
+        assert file_handler not in log.handlers
+        assert any(isinstance(h, ParaCLIQueueHandler) for h in log.handlers)
+
+        cli_stop_queued_logging(log)
+        assert stream_handler in log.handlers
+        assert file_handler in log.handlers
+        assert not any(
+            isinstance(h, ParaCLIQueueHandler) for h in log.handlers
+        )
+
+    def test_records_are_written(self, queued_logger):
+        log, stream_handler, file_handler, console = queued_logger
+
+        threads = [
+            threading.Thread(
+                target=lambda i=i: [
+                    log.warning(f"warning {i}-{n}") for n in range(50)
+                ]
+            ) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        log.error("error")
+        log.debug("debug")
+
+        # Counters are updated once the record is enqueued
+        assert stream_handler.warnings == 200
+        assert stream_handler.errors == 1
+
+        cli_flush_logging()
+        output = console.export_text()
+        assert output.count("warning") == 200
+        assert "error" in output
+        assert "debug" not in output
+
+        with open(file_handler.baseFilename, encoding="utf-8") as file:
+            content = file.read()
+        assert content.count("warning") == 200
+        assert "[bold]" not in content
+        assert "debug" in content
+
+
+class LegacyParaCLIFormatter(logging.Formatter):
+    """
+    Previous implementation of ParaCLIFormatter, which swaps the format of
+    the shared style for every record
+    """
+    level_formatting = ParaCLIFormatter.level_formatting
+
+    def __init__(self, file_mng: bool = False, *args, **kwargs):
+        self.file_mng = file_mng
+        super().__init__(ParaCLIFormatter.default, *args, **kwargs)
+
+    def format(self, record: logging.LogRecord):
+        format_orig = getattr(self._style, '_fmt')
+        if not self.file_mng:
+            self._style._fmt = self.level_formatting[record.levelno]
+        result = logging.Formatter.format(self, record)
+        self._style._fmt = format_orig
+        return result
+
+
+def create_record(level: int, msg: str = "message %s") -> logging.LogRecord:
+    """ Creates a record of the passed level """
+    return logging.LogRecord(
+        "parac", level, __file__, 0, msg, ("arg",), None
+    )
+
+
+class TestParaCLIFormatter:
+    LEVELS = (
+        logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR,
+        logging.CRITICAL
+    )
+
+    def test_level_formatting(self):
+        formatter = ParaCLIFormatter(datefmt="%H:%M:%S")
+        for level in self.LEVELS:
+            record = create_record(level)
+            assert formatter.format(record) == \
+                LegacyParaCLIFormatter(datefmt="%H:%M:%S").format(record)
+
+        file_formatter = ParaCLIFormatter(file_mng=True)
+        result = file_formatter.format(create_record(logging.ERROR))
+        assert result.startswith("[ERROR] - (")
+        assert result.endswith("): message arg")
+
+    def test_asctime_cache(self):
+        formatter = ParaCLIFormatter(datefmt="%H:%M:%S")
+        record = create_record(logging.INFO)
+        record.created = 3600.5
+        first = formatter.formatTime(record, "%H:%M:%S")
+        record.created = 3601.0
+        second = formatter.formatTime(record, "%H:%M:%S")
+        assert first != second
+        assert formatter.formatTime(record, "%S") == time.strftime(
+            "%S", formatter.converter(3601)
+        )
+
+        # Without a datefmt the milliseconds are appended
+        record.created, record.msecs = 3601.25, 250
+        assert formatter.formatTime(record).endswith(",250")
+
+    def test_shared_across_threads(self):
+        formatter = ParaCLIFormatter(datefmt="%H:%M:%S")
+
+        def _format(level: int) -> bool:
+            prefix = formatter.level_formatting[level].split("[%")[0]
+            return all(
+                formatter.format(create_record(level)).startswith(prefix)
+                for _ in range(2000)
+            )
+
+        with ThreadPoolExecutor(max_workers=len(self.LEVELS)) as executor:
+            assert all(executor.map(_format, self.LEVELS * 4))
+
+
+def create_file_handler(path, **kwargs) -> ParaCLIFileHandler:
+    """ Creates a file handler using the file formatter """
+    handler = ParaCLIFileHandler(filename=path, **kwargs)
+    handler.setFormatter(ParaCLIFormatter(file_mng=True))
+    return handler
+
+
+class TestParaCLIFileHandler:
+    def test_message_is_not_modified(self, tmp_path):
+        handler = create_file_handler(tmp_path / "para.log")
+        msg = "Compiled %s [1, 2]"
+        record = create_record(logging.INFO, msg)
+        handler.handle(record)
+        handler.close()
+
+        # Bracketed text is kept and the record is not modified for the
+        # other handlers
+        assert record.msg is msg
+        content = (tmp_path / "para.log").read_text(encoding="utf-8")
+        assert content.endswith("): Compiled arg [1, 2]\n")
+
+    def test_size_rotation(self, tmp_path):
+        path = tmp_path / "para.log"
+        handler = create_file_handler(
+            path, max_size=100, backup_count=2, rotate_interval=0,
+            compress=False
+        )
+        for i in range(12):
+            handler.handle(create_record(logging.INFO, f"record {i:02} %s"))
+        handler.close()
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "para.log", "para.log.1", "para.log.2"
+        ]
+        assert "record 11" in path.read_text(encoding="utf-8")
+        assert path.stat().st_size < 200
+
+    def test_compressed_time_rotation(self, tmp_path):
+        path = tmp_path / "para.log"
+        handler = create_file_handler(
+            path, max_size=0, rotate_interval=60, compress=True
+        )
+        handler.handle(create_record(logging.INFO, "first %s"))
+        record = create_record(logging.INFO, "second %s")
+        record.created += 120
+        handler.handle(record)
+        handler.close()
+
+        with gzip.open(tmp_path / "para.log.1.gz", "rt") as file:
+            assert file.read().endswith("): first arg\n")
+        assert path.read_text(encoding="utf-8").endswith("): second arg\n")
@@ -0,0 +1,81 @@
+# coding=utf-8
+""" Tests for the structured output of the CLI """
+import io
+import json
+import logging
+
+import pytest
+
+from paralang_cli.output import (StructuredOutput, cli_set_output_format,
+                                 cli_get_structured_output)
+from paralang_cli.scripts.para import ParaCLI
+
+from . import BASE_TEST_PATH
+
+ENCODING = 'utf-8'
+main_file_path = BASE_TEST_PATH / "test_files" / "main.para"
+
+
+@pytest.fixture
+def structured_stream():
+    """ Enables the 'ndjson' output and returns the stream it writes to """
+    stream = io.StringIO()
+    cli_set_output_format("ndjson", stream)
+    yield stream
+    cli_set_output_format("text")
+
+
+class TestStructuredOutput:
+    def test_ndjson_is_streamed(self):
+        stream = io.StringIO()
+        output = StructuredOutput("ndjson", stream)
+        output.emit_diagnostics("main.para", [(logging.WARNING, "[red]x")])
+        assert json.loads(stream.getvalue()) == {
+            "type": "diagnostic",
+            "file": "main.para",
+            "level": "WARNING",
+            "levelno": logging.WARNING,
+            "msg": "[red]x"
+        }
+
+    def test_json_is_written_on_close(self):
+        stream = io.StringIO()
+        output = StructuredOutput("json", stream)
+        output.emit("file", file="main.para")
+        output.emit_summary("syntax-check", success=True)
+        assert stream.getvalue() == ""
+
+        output.close()
+        records = json.loads(stream.getvalue())
+        assert [r["type"] for r in records] == ["file", "summary"]
+        assert records[1]["duration"] >= 0
+
+    def test_set_output_format(self):
+        cli_set_output_format("text")
+        assert cli_get_structured_output() is None
+        with pytest.raises(ValueError):
+            cli_set_output_format("xml")
+
+    def test_syntax_check(self, structured_stream, tmp_path):
+        invalid_file = tmp_path / "invalid.para"
+        invalid_file.write_text("int main() { return 0 }\n", encoding=ENCODING)
+
+        with pytest.raises(SystemExit) as exc_info:
+            ParaCLI.para_syntax_check(
+                (str(main_file_path), str(invalid_file)), (), ENCODING,
+                "none", jobs=1, cache=False, server=False, debug=False,
+                keep_open=False
+            )
+        assert exc_info.value.code == 1
+        lines = structured_stream.getvalue().splitlines()
+        records = [json.loads(line) for line in lines]
+        files = [r for r in records if r["type"] == "file"]
+        assert [r["success"] for r in files] == [True, False]
+        assert any(
+            r["type"] == "diagnostic" and r["levelno"] >= logging.ERROR
+            and r["file"] == str(invalid_file) for r in records
+        )
+        assert records[-1]["type"] == "summary"
+        assert records[-1]["files"] == 2
+        assert records[-1]["failed"] == 1
+        assert not records[-1]["success"]
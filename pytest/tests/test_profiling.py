@@ -0,0 +1,109 @@
+# coding=utf-8
+""" Tests for the profiling hooks """
+import json
+import pstats
+import time
+
+import paralang_cli.syntax_check
+from paralang_cli.profiling import (ParaCLITracer, cli_start_tracing,
+                                    cli_start_profiling, cli_finish_profiling,
+                                    cli_get_tracer, cli_trace_span, cli_traced,
+                                    cli_trace_results, cli_is_profiling)
+from paralang_cli.syntax_check import cli_run_syntax_check
+
+from .test_syntax_check import main_file_path
+
+
+class UnitResult:
+    """ Result of a processed unit """
+
+    def __init__(self, file: str, duration: float, skipped: bool = False):
+        self.file = file
+        self.duration = duration
+        self.skipped = skipped
+
+
+@cli_traced
+def traced_function(value: int) -> int:
+    return value * 2
+
+
+class TestTracer:
+    def test_span(self):
+        tracer = ParaCLITracer()
+        with tracer.span("stage", file="main.para"):
+            time.sleep(0.01)
+        tracer.add_span("unit", time.perf_counter(), 0.5, track="units")
+
+        stage, unit = tracer.events
+        assert stage["name"] == "stage"
+        assert stage["ph"] == "X"
+        assert stage["dur"] >= 10_000
+        assert stage["args"] == {"file": "main.para"}
+        assert unit["tid"] == "units"
+        assert unit["dur"] == 500_000
+
+    def test_disabled(self):
+        assert cli_get_tracer() is None
+        with cli_trace_span("stage"):
+            pass
+        assert traced_function(2) == 4
+        results = [UnitResult("a.para", 0.1)]
+        assert list(cli_trace_results(results, "unit", "units")) == results
+        cli_finish_profiling()
+
+    def test_trace_file(self, tmp_path):
+        path = tmp_path / "trace.json"
+        cli_start_tracing(path)
+        try:
+            with cli_trace_span("stage"):
+                assert traced_function(3) == 6
+            list(cli_trace_results(
+                [UnitResult("a.para", 0.1), UnitResult("b.para", 0, True)],
+                "unit", "units"
+            ))
+        finally:
+            cli_finish_profiling()
+        assert cli_get_tracer() is None
+
+        events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+        names = [e["name"] for e in events]
+        assert names == ["traced_function", "stage", "unit"]
+        assert events[-1]["args"] == {"file": "a.para"}
+
+
+class TestProfiling:
+    def test_pstats_file(self, tmp_path):
+        path = tmp_path / "para.pstats"
+        cli_start_profiling(path)
+        try:
+            traced_function(1)
+        finally:
+            cli_finish_profiling()
+
+        stats = pstats.Stats(str(path))
+        assert any(
+            func[2] == "traced_function" for func in stats.stats.keys()
+        )
+
+    def test_workers_run_in_process(self, tmp_path, monkeypatch):
+        def _no_pool(*_, **__):
+            raise AssertionError("Workers are not covered by the profile")
+
+        monkeypatch.setattr(
+            paralang_cli.syntax_check, "ProcessPoolExecutor", _no_pool
+        )
+        files = [str(main_file_path), str(tmp_path / "missing.para")]
+        cli_start_profiling(tmp_path / "para.pstats")
+        try:
+            assert cli_is_profiling()
+            results = list(cli_run_syntax_check(files, "utf-8", jobs=2))
+        finally:
+            cli_finish_profiling()
+        assert not cli_is_profiling()
+        assert [r.success for r in results] == [True, False]
+
+        stats = pstats.Stats(str(tmp_path / "para.pstats"))
+        assert any(
+            func[2] == "validate_syntax" for func in stats.stats.keys()
+        )
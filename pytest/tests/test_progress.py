@@ -0,0 +1,86 @@
+# coding=utf-8
+""" Tests for the progress dashboard """
+import io
+
+from rich.console import Console
+
+from paralang_cli.progress import (ParaCLIDashboard, cli_get_progress_mode,
+                                   cli_get_refresh_interval, cli_count_lines)
+
+
+def create_console(terminal: bool) -> Console:
+    """ Creates a console writing into a buffer """
+    return Console(
+        file=io.StringIO(), force_terminal=terminal, width=120,
+        color_system=None
+    )
+
+
+class TestProgressMode:
+    def test_refresh_interval(self, monkeypatch):
+        monkeypatch.delenv("SSH_CONNECTION", raising=False)
+        monkeypatch.delenv("SSH_TTY", raising=False)
+        terminal = create_console(terminal=True)
+        assert cli_get_refresh_interval(create_console(terminal=False)) == 0
+        local = cli_get_refresh_interval(terminal)
+        assert local > 0
+
+        monkeypatch.setenv("SSH_CONNECTION", "10.0.0.1 22 10.0.0.2 22")
+        assert cli_get_refresh_interval(terminal) > local
+
+    def test_mode(self):
+        assert cli_get_progress_mode(None, create_console(True)) == "rich"
+        assert cli_get_progress_mode(None, create_console(False)) == "plain"
+        assert cli_get_progress_mode("none", create_console(True)) == "none"
+
+        # Without a terminal the dashboard is never rendered live
+        dashboard = ParaCLIDashboard("rich", create_console(False))
+        assert dashboard.mode == "plain"
+
+    def test_count_lines(self, tmp_path):
+        file = tmp_path / "main.para"
+        file.write_bytes(b"int main() {\n    return 0;\n}\n")
+        assert cli_count_lines(file) == 3
+        assert cli_count_lines(tmp_path / "missing.para") == 0
+
+
+class TestDashboard:
+    def test_plain(self):
+        console = create_console(terminal=False)
+        with ParaCLIDashboard("plain", console) as dashboard:
+            stage = dashboard.add_stage("Para units", total=2)
+            dashboard.advance(stage, "a.para", lines=10)
+            dashboard.advance(stage, "b.para", lines=30, success=False)
+
+        lines = console.file.getvalue().splitlines()
+        assert lines[0].startswith("Para units: 1/2 (")
+        assert "ETA" in lines[0]
+        assert lines[-1].startswith("Para units: 2/2 (")
+        assert "lines/s" in lines[-1]
+        assert "ETA" not in lines[-1]
+
+        stats = dashboard.stats["Para units"]
+        assert (stats["completed"], stats["failed"], stats["lines"]) == \
+            (2, 1, 40)
+        assert stats["eta"] == 0
+
+    def test_none(self):
+        console = create_console(terminal=True)
+        with ParaCLIDashboard("none", console) as dashboard:
+            stage = dashboard.add_stage("Para units", total=1)
+            dashboard.advance(stage, "a.para")
+        assert console.file.getvalue() == ""
+
+    def test_rich(self):
+        console = create_console(terminal=True)
+        with ParaCLIDashboard("rich", console) as dashboard:
+            c_stage = dashboard.add_stage("C sources", total=2)
+            dashboard.add_stage("Linking", total=1)
+            dashboard.advance(c_stage, "main.c", lines=5, duration=0.5)
+            dashboard.refresh(force=True)
+            output = console.file.getvalue()
+
+        assert "C sources" in output
+        assert "Linking" in output
+        assert "1/2" in output
+        assert "main.c" in output
@@ -0,0 +1,155 @@
+# coding=utf-8
+""" Tests for the remote cache backends, client and reference server """
+import hashlib
+
+import pytest
+
+from paralang_cli.remote import (FileSystemBackend, HTTPBackend, RemoteCache,
+                                 RemoteCacheError, RemoteCacheServer,
+                                 cli_create_remote_backend)
+from paralang_cli.store import ArtifactStore
+from paralang_cli.syntax_check import (cli_run_syntax_check, SyntaxCheckCache,
+                                       SyntaxCheckResult)
+
+from .test_syntax_check import main_file_path
+
+ENCODING = 'utf-8'
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = RemoteCacheServer(tmp_path / "remote").start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def remote(server) -> RemoteCache:
+    return RemoteCache(HTTPBackend(server.url))
+
+
+class TestBackends:
+    def test_file_system(self, tmp_path):
+        backend = cli_create_remote_backend((tmp_path / "shared").as_uri())
+        assert isinstance(backend, FileSystemBackend)
+        assert backend.get("blobs", digest(b"a")) is None
+
+        backend.put("blobs", digest(b"a"), b"a")
+        assert backend.get_many("blobs", [digest(b"a"), digest(b"b")]) == {
+            digest(b"a"): b"a"
+        }
+        with pytest.raises(ValueError):
+            backend.get("blobs", "../escape")
+
+    def test_http(self, server):
+        backend = cli_create_remote_backend(server.url)
+        assert isinstance(backend, HTTPBackend)
+        keys = [digest(bytes([i])) for i in range(5)]
+        for key in keys[:3]:
+            backend.put("units", key, key.encode())
+        assert backend.get("units", keys[4]) is None
+        assert backend.get_many("units", keys) == {
+            k: k.encode() for k in keys[:3]
+        }
+
+        # Blobs are content-addressed, so the server verifies the digest
+        with pytest.raises(RemoteCacheError, match="400"):
+            backend.put("blobs", digest(b"a"), b"b")
+
+
+class TestRemoteCache:
+    def test_upload_in_background(self, remote):
+        remote.upload("blobs", digest(b"a"), lambda: b"a")
+        remote.upload("blobs", digest(b"a"), b"a")  # Uploaded once
+        assert remote.flush(timeout=10)
+        assert remote.lookup("blobs", [digest(b"a"), digest(b"b")]) == {
+            digest(b"a"): b"a"
+        }
+        assert remote.stats == {"hits": 1, "misses": 1, "uploads": 1}
+
+    def test_unreachable(self, tmp_path):
+        server = RemoteCacheServer(tmp_path / "remote")
+        url = server.url
+        server.server_close()
+
+        remote = RemoteCache(HTTPBackend(url, timeout=1))
+        assert remote.lookup("units", [digest(b"a")]) == {}
+        assert not remote.available
+        remote.upload("units", digest(b"a"), b"a")
+        assert remote.flush(timeout=1)
+
+
+class TestSharedResults:
+    def test_syntax_check(self, tmp_path, remote):
+        def _check(cache_dir: str) -> list:
+            return list(cli_run_syntax_check(
+                [str(main_file_path)], ENCODING, jobs=1,
+                cache=SyntaxCheckCache(tmp_path / cache_dir), remote=remote
+            ))
+
+        assert not _check("agent_1")[0].cached
+        assert remote.flush(timeout=10)
+
+        # Another agent with an empty local cache uses the shared result
+        result = _check("agent_2")[0]
+        assert result.cached and result.success
+        assert remote.stats["hits"] == 1
+
+    def test_syntax_check_other_checkout(self, tmp_path, remote, monkeypatch):
+        def _check(agent: str) -> SyntaxCheckResult:
+            checkout = tmp_path / agent / "project"
+            checkout.mkdir(parents=True)
+            (checkout / "main.para").write_bytes(main_file_path.read_bytes())
+            monkeypatch.chdir(checkout)
+            return list(cli_run_syntax_check(
+                ["main.para"], ENCODING, jobs=1,
+                cache=SyntaxCheckCache(tmp_path / agent / "cache"),
+                remote=remote
+            ))[0]
+
+        assert not _check("agent_1").cached
+        assert remote.flush(timeout=10)
+
+        # The key does not depend on the folder of the checkout, while the
+        # diagnostics refer to the file of the second checkout
+        result = _check("agent_2")
+        assert result.cached and result.success
+        path = str(tmp_path / "agent_2" / "project" / "main.para")
+        assert any(path in msg for _, msg in result.diagnostics)
+        assert not any("agent_1" in msg for _, msg in result.diagnostics)
+
+    def test_build(self, tmp_path, remote, compiled_units, build_project):
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "a.para").write_text("int a() {}\n", encoding=ENCODING)
+
+        store = ArtifactStore(tmp_path / "agent_1")
+        results = build_project(project, store, "a", remote=remote)
+        assert not results[0].restored
+        assert remote.flush(timeout=10)
+
+        (project / "build" / ".para-manifest.json").unlink()
+        store = ArtifactStore(tmp_path / "agent_2")
+        results = build_project(project, store, "a", remote=remote)
+        assert results[0].restored
+        assert compiled_units == [str(project / "a.para")]
+        assert (project / "build" / "a.c").read_text() == \
+            "/* int a() {} */\n"
+
+    def test_build_other_checkout(
+            self, tmp_path, remote, compiled_units, build_project
+    ):
+        for agent in ("agent_1", "agent_2"):
+            project = tmp_path / agent / "project"
+            project.mkdir(parents=True)
+            (project / "a.para").write_text("int a() {}\n", encoding=ENCODING)
+            store = ArtifactStore(tmp_path / agent / "cache")
+            results = build_project(project, store, "a", remote=remote)
+            assert remote.flush(timeout=10)
+
+        assert results[0].restored
+        assert compiled_units == [str(tmp_path / "agent_1/project/a.para")]
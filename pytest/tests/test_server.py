@@ -0,0 +1,103 @@
+# coding=utf-8
+""" Tests for the compile server and its client """
+import socket
+import threading
+
+import pytest
+
+from . import BASE_TEST_PATH
+
+server_module = pytest.importorskip("paralang_cli.server")
+ParaServer = server_module.ParaServer
+ParaServerClient = server_module.ParaServerClient
+ParaServerError = server_module.ParaServerError
+cli_connect_server = server_module.cli_connect_server
+
+ENCODING = 'utf-8'
+main_file_path = BASE_TEST_PATH / "test_files" / "main.para"
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"),
+    reason="Unix domain sockets are not available"
+)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ParaServer(tmp_path / "para.sock")
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    yield server
+
+    client = cli_connect_server(server.socket_path)
+    if client is not None:
+        client.shutdown()
+    thread.join(timeout=5)
+
+
+class TestServer:
+    def test_not_running(self, tmp_path):
+        assert cli_connect_server(tmp_path / "para.sock") is None
+
+    def test_already_running(self, server):
+        with pytest.raises(ParaServerError):
+            ParaServer(server.socket_path)
+
+    def test_busy_server_socket_is_kept(self, tmp_path):
+        # A busy server or one of another version does not answer the ping
+        path = tmp_path / "para.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as busy:
+            busy.bind(str(path))
+            busy.listen(1)
+            assert cli_connect_server(path) is None
+            with pytest.raises(ParaServerError):
+                ParaServer(path)
+            assert path.exists()
+
+    def test_stale_socket(self, tmp_path):
+        path = tmp_path / "para.sock"
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as crashed:
+            crashed.bind(str(path))
+        server = ParaServer(path)
+        server.server_close()
+
+    def test_syntax_check(self, server, tmp_path):
+        invalid_file = tmp_path / "invalid.para"
+        invalid_file.write_text("int main() { return 0 }\n")
+
+        client = cli_connect_server(server.socket_path)
+        assert client is not None
+
+        files = [str(main_file_path), str(invalid_file)]
+        results = list(client.syntax_check(files, ENCODING, 1, cache=False))
+        assert [r.file for r in results] == files
+        assert [r.success for r in results] == [True, False]
+
+    def test_compile(self, server, tmp_path, compiled_units):
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "a.para").write_text("int a() {}\n", encoding=ENCODING)
+        for folder in ("build", "dist"):
+            (project / folder).mkdir()
+
+        def _compile() -> list:
+            return list(cli_connect_server(server.socket_path).compile(
+                [str(project / "a.para")], ENCODING, project / "build",
+                project / "dist", project_root=project, jobs=1,
+                artifact_store=False
+            ))
+
+        results = _compile()
+        assert [r.success for r in results] == [True]
+        assert compiled_units == [str(project / "a.para")]
+        assert (project / "build" / "a.c").exists()
+        assert _compile()[0].skipped
+
+    def test_invalid_command(self, server):
+        client = ParaServerClient(server.socket_path)
+        with pytest.raises(ParaServerError):
+            list(client.request("not-a-command"))
+
+    def test_shutdown(self, server):
+        cli_connect_server(server.socket_path).shutdown()
+        assert cli_connect_server(server.socket_path) is None
@@ -0,0 +1,123 @@
+# coding=utf-8
+""" Start-up tests for the Para CLI """
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from paralang_cli.build import BuildGraph, BuildManifest
+from paralang_cli.utils import cli_get_base_version
+
+from . import BASE_TEST_PATH
+
+# Modules, which should never be imported when the compiler is not used
+HEAVY_MODULES = ("paralang_base", "antlr4")
+
+RUN_PARA_SCRIPT = ''.join([
+    "import sys;",
+    "sys.argv = ['para', *sys.argv[1:]];",
+    "from paralang_cli.scripts.para import cli_run;",
+    "cli_run()"
+])
+
+
+def run_para(
+        *args: str,
+        import_time: bool = False,
+        cwd: str = None,
+        env: dict = None,
+        merge_stderr: bool = False
+) -> subprocess.Popen:
+    """
+    Runs the 'para' CLI in a new interpreter and returns the process. If
+    merge_stderr is set, stderr is written into the same pipe as stdout
+    """
+    env = {**os.environ, **(env or {})}
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, (str(BASE_TEST_PATH.parent), env.get("PYTHONPATH")))
+    )
+    cmd = [sys.executable]
+    if import_time:
+        cmd += ["-X", "importtime"]
+    return subprocess.run(
+        [*cmd, "-c", RUN_PARA_SCRIPT, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE,
+        text=True,
+        env=env,
+        cwd=cwd
+    )
+
+
+def get_imports(stderr: str) -> dict:
+    """
+    Parses the '-X importtime' output and returns the cumulative import time
+    in microseconds for every top-level module
+    """
+    imports = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match and len(match.group(2)) == 1:
+            imports[match.group(3)] = int(match.group(1))
+    return imports
+
+
+class TestStartup:
+    @pytest.mark.parametrize("args", [["--version"], ["--help"]])
+    def test_compiler_not_imported(self, args):
+        p = run_para(*args, import_time=True)
+        assert p.returncode == 0, p.stderr
+
+        imported = get_imports(p.stderr)
+        for module in HEAVY_MODULES:
+            assert not any(
+                i == module or i.startswith(f"{module}.") for i in imported
+            ), f"'{module}' should not be imported for 'para {args[0]}'"
+
+    @pytest.mark.skipif(os.name != "posix", reason="Requires a shell script")
+    def test_run_up_to_date_program(self, tmp_path):
+        (tmp_path / "main.para").write_text("int main() {}\n")
+        (tmp_path / "build").mkdir()
+        (tmp_path / "dist").mkdir()
+        program = tmp_path / "dist" / "main"
+        program.write_text('#!/bin/sh\necho "program $1"\nexit 3\n')
+        program.chmod(0o755)
+
+        unit = str(tmp_path / "main.para")
+        graph = BuildGraph([unit], tmp_path, "utf-8")
+        manifest = BuildManifest.load(tmp_path / "build", "utf-8")
+        manifest.update(unit, graph.input_hash(unit))
+        manifest.set_executable(program, [unit])
+        manifest.save()
+
+        p = run_para("run", "--", "arg", import_time=True, cwd=tmp_path)
+        assert p.returncode == 3, p.stderr
+        assert p.stdout == "program arg\n"
+
+        imported = get_imports(p.stderr)
+        for module in HEAVY_MODULES:
+            assert not any(
+                i == module or i.startswith(f"{module}.") for i in imported
+            ), f"'{module}' should not be imported for 'para run'"
+
+    def test_plain_console_in_ci(self):
+        p = run_para("--version", import_time=True, env={"CI": "true"})
+        assert p.returncode == 0, p.stderr
+        assert p.stdout == f"Para Compiler {cli_get_base_version()}\n"
+
+        imported = get_imports(p.stderr)
+        for module in ("rich", "colorama"):
+            assert module not in imported, \
+                f"'{module}' should not be imported in CI environments"
+
+    def test_banner_before_stderr(self):
+        # The usage error of the subcommand is written onto stderr after the
+        # banner was written onto the buffered stdout
+        p = run_para(
+            "compile", "--jobs", "0", merge_stderr=True,
+            env={"PYTHONUNBUFFERED": ""}
+        )
+        assert p.returncode == 2
+        assert p.stdout.index("Para Compiler |") < p.stdout.index("Usage:")
@@ -0,0 +1,173 @@
+# coding=utf-8
+""" Tests for the content-addressed artifact store """
+import os
+
+import pytest
+
+from paralang_cli import store as store_module
+from paralang_cli.store import ArtifactStore, cli_link_file
+
+ENCODING = 'utf-8'
+
+
+@pytest.fixture
+def store(tmp_path) -> ArtifactStore:
+    return ArtifactStore(tmp_path / "cache")
+
+
+class TestLinkFile:
+    @pytest.mark.parametrize("mode", ["hardlink", "copy"])
+    def test_modes(self, tmp_path, mode):
+        src = tmp_path / "src"
+        src.write_bytes(b"content")
+        dest = tmp_path / "view" / "dest"
+        dest.parent.mkdir()
+        dest.write_bytes(b"old")
+
+        assert cli_link_file(src, dest, mode) == mode
+        assert dest.read_bytes() == b"content"
+        assert os.path.samefile(src, dest) == (mode == "hardlink")
+        assert os.listdir(dest.parent) == ["dest"]
+
+    def test_fallback(self, tmp_path):
+        src = tmp_path / "src"
+        src.write_bytes(b"content")
+        mode = cli_link_file(src, tmp_path / "dest")
+        assert mode in ("reflink", "hardlink")
+
+
+class TestArtifactStore:
+    def test_add_and_checkout(self, tmp_path, store):
+        output = tmp_path / "output"
+        (output / "nested").mkdir(parents=True)
+        (output / "a.c").write_text("a")
+        (output / "nested" / "b.c").write_text("b")
+        (output / "copy.c").write_text("a")
+
+        files = store.add_folder(output)
+        assert set(files) == {"a.c", "nested/b.c", "copy.c"}
+        assert files["a.c"] == files["copy.c"]
+        assert store.entries() == 2
+
+        view = tmp_path / "view"
+        assert store.checkout(files, view) == 3
+        assert (view / "nested" / "b.c").read_text() == "b"
+
+        # Only changed files are linked and removed files are deleted
+        changed = {"a.c": files["nested/b.c"]}
+        assert store.checkout(changed, view, previous=files) == 1
+        assert (view / "a.c").read_text() == "b"
+        assert not (view / "copy.c").exists()
+        assert not (view / "nested" / "b.c").exists()
+
+    def test_units(self, store, tmp_path):
+        (tmp_path / "a.c").write_text("a")
+        digest = store.add(tmp_path / "a.c")
+        store.store_unit("key", {"build": {"a.c": digest}}, [(30, "warning")])
+        assert store.load_unit("key") == (
+            {"build": {"a.c": digest}}, [(30, "warning")]
+        )
+        assert store.load_unit("missing") is None
+
+    def test_prune(self, tmp_path, store, monkeypatch):
+        monkeypatch.setattr(store_module, "_PRUNE_GRACE_PERIOD", 0)
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text("{}")
+        for name in ("used", "cached", "unused"):
+            (tmp_path / name).write_text(name)
+        used = store.add(tmp_path / "used")
+        cached = store.add(tmp_path / "cached")
+        store.add(tmp_path / "unused")
+        store.store_unit("unit", {"build": {"cached.c": cached}}, [])
+        store.update_view(manifest, [used])
+
+        assert store.prune() == 1
+        assert store.entries() == 2
+
+        # Evicted units release their blobs, while views keep them alive
+        store._max_size = 0
+        assert store.prune() == 1
+        assert store.load_unit("unit") is None
+
+        manifest.unlink()
+        assert store.prune() == 1
+        assert store.entries() == 0
+
+    def test_prune_grace_period(self, tmp_path, store):
+        # Blobs of a concurrent build are not referenced by its units yet
+        (tmp_path / "new").write_text("new")
+        (tmp_path / "old").write_text("old")
+        store.add(tmp_path / "new")
+        old = store.blob_path(store.add(tmp_path / "old"))
+        os.utime(old, (0, 0))
+        assert store.prune() == 1
+        assert store.entries() == 1
+
+        # Adding an existing blob protects it again
+        os.utime(store.blob_path(store.add(tmp_path / "new")), (0, 0))
+        store.add(tmp_path / "new")
+        assert store.prune() == 0
+
+    def test_prune_if_needed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(store_module, "_PRUNE_GRACE_PERIOD", 0)
+        store = ArtifactStore(tmp_path / "cache", max_size=8)
+        for name in ("a", "b", "c"):
+            (tmp_path / name).write_text(name * 4)
+
+        # The size of the store is unknown, so it is pruned once
+        store.add(tmp_path / "a")
+        assert store.prune_if_needed() == 1
+
+        # Builds staying below the estimated size never walk the store
+        prune = store.prune
+        monkeypatch.setattr(store, "prune", lambda: pytest.fail("Pruned"))
+        store.add(tmp_path / "a")
+        store.add(tmp_path / "b")
+        assert store.prune_if_needed() == 0
+        assert store.entries() == 2
+
+        monkeypatch.setattr(store, "prune", prune)
+        store.add(tmp_path / "c")
+        assert store.prune_if_needed() == 3
+
+
+class TestBuildWithStore:
+    def test_restore_units(
+            self, tmp_path, store, compiled_units, build_project
+    ):
+        a = tmp_path / "a.para"
+        a.write_text("int a() {}\n", encoding=ENCODING)
+        (tmp_path / "b.para").write_text("int b() {}\n", encoding=ENCODING)
+
+        assert all(r.success for r in build_project(tmp_path, store, "a", "b"))
+        assert len(compiled_units) == 2
+        view = tmp_path / "build" / "a.c"
+        assert view.read_text() == "/* int a() {} */\n"
+        assert store.entries() == 2
+
+        a.write_text("int a2() {}\n", encoding=ENCODING)
+        build_project(tmp_path, store, "a", "b")
+        assert len(compiled_units) == 3
+        assert view.read_text() == "/* int a2() {} */\n"
+
+        # Switching back restores the previous outputs without compiling
+        a.write_text("int a() {}\n", encoding=ENCODING)
+        results = build_project(tmp_path, store, "a", "b")
+        assert len(compiled_units) == 3
+        assert [r.restored for r in results] == [False, True]
+        assert view.read_text() == "/* int a() {} */\n"
+        assert store.load_stats() == {"hits": 1, "misses": 3}
+
+    def test_removed_unit_outputs(
+            self, tmp_path, store, compiled_units, build_project
+    ):
+        for name in ("a", "b"):
+            (tmp_path / f"{name}.para").write_text(
+                f"int {name}() {{}}\n", encoding=ENCODING
+            )
+        build_project(tmp_path, store, "a", "b")
+        assert (tmp_path / "build" / "b.c").exists()
+
+        build_project(tmp_path, store, "a")
+        assert not (tmp_path / "build" / "b.c").exists()
+        assert (tmp_path / "build" / "a.c").exists()
@@ -0,0 +1,89 @@
+# coding=utf-8
+""" Tests for the multi-file syntax check """
+import os
+from pathlib import Path
+
+from paralang_cli.syntax_check import (cli_collect_files,
+                                       cli_syntax_check_file,
+                                       cli_run_syntax_check,
+                                       SyntaxCheckCache)
+
+from . import BASE_TEST_PATH
+
+ENCODING = 'utf-8'
+TEST_FILES_PATH = BASE_TEST_PATH / "test_files"
+main_file_path = TEST_FILES_PATH / "main.para"
+
+
+def create_invalid_file(folder: Path) -> str:
+    """ Creates a file containing a syntax error and returns its path """
+    path = folder / "invalid.para"
+    path.write_text("int main() { return 0 }\n", encoding=ENCODING)
+    return str(path)
+
+
+class TestCollectFiles:
+    def test_directory(self):
+        files = cli_collect_files([TEST_FILES_PATH])
+        assert str(main_file_path) in files
+        assert str(TEST_FILES_PATH / "preprocessor" / "main.para") in files
+        assert all(f.endswith(".para") for f in files)
+
+    def test_glob_and_duplicates(self):
+        files = cli_collect_files([
+            main_file_path, str(TEST_FILES_PATH / "*.para")
+        ])
+        assert files[0] == str(main_file_path)
+        assert files.count(str(main_file_path)) == 1
+        assert str(TEST_FILES_PATH / "preprocessor" / "main.para") \
+            not in files
+
+    def test_missing_file_is_kept(self):
+        assert cli_collect_files(["not_existing.para"]) == \
+            ["not_existing.para"]
+
+
+class TestSyntaxCheck:
+    def test_valid_file(self):
+        result = cli_syntax_check_file(str(main_file_path), ENCODING)
+        assert result.success
+        assert result.errors == 0
+        assert result.duration > 0
+
+    def test_invalid_file(self, tmp_path):
+        result = cli_syntax_check_file(create_invalid_file(tmp_path), ENCODING)
+        assert not result.success
+        assert result.errors > 0
+
+    def test_missing_file(self):
+        result = cli_syntax_check_file(
+            os.path.join(BASE_TEST_PATH, "not_existing.para"), ENCODING
+        )
+        assert not result.success
+
+    def test_worker_pool(self, tmp_path):
+        invalid_file = create_invalid_file(tmp_path)
+        files = [str(main_file_path), invalid_file, str(main_file_path)]
+
+        results = list(cli_run_syntax_check(files, ENCODING, jobs=2))
+        assert [r.file for r in results] == files
+        assert [r.success for r in results] == [True, False, True]
+
+    def test_cache(self, tmp_path):
+        cache = SyntaxCheckCache(cache_dir=tmp_path)
+        invalid_file = create_invalid_file(tmp_path)
+        files = [str(main_file_path), invalid_file]
+
+        results = list(cli_run_syntax_check(files, ENCODING, 1, cache=cache))
+        assert not any(r.cached for r in results)
+
+        cached = list(cli_run_syntax_check(files, ENCODING, 1, cache=cache))
+        assert all(r.cached for r in cached)
+        assert [r.diagnostics for r in cached] == \
+            [r.diagnostics for r in results]
+
+        # Changing the content invalidates the entry
+        with open(invalid_file, "a", encoding=ENCODING) as file:
+            file.write("\n")
+        changed = list(cli_run_syntax_check(files, ENCODING, 1, cache=cache))
+        assert [r.cached for r in changed] == [True, False]
@@ -0,0 +1,141 @@
+# coding=utf-8
+""" Tests for the native C toolchain stage """
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from paralang_cli.toolchain import (CToolchain, CToolchainError,
+                                    MakeJobServer, ObjectCache,
+                                    cli_get_job_limit,
+                                    cli_collect_c_sources,
+                                    cli_build_executable)
+
+requires_cc = pytest.mark.skipif(
+    not any(shutil.which(cc) for cc in ("cc", "gcc", "clang")),
+    reason="No C compiler available"
+)
+
+
+def create_c_sources(build_path: Path, valid: bool = True) -> None:
+    """ Creates a small C program consisting of two units and a header """
+    (build_path / "lib").mkdir(parents=True, exist_ok=True)
+    (build_path / "lib" / "value.h").write_text("int value(void);\n")
+    (build_path / "lib" / "value.c").write_text(
+        '#include "lib/value.h"\nint value(void) { return 3; }\n'
+        if valid else "int value(void) { return }\n"
+    )
+    (build_path / "main.c").write_text(
+        '#include "lib/value.h"\nint main(void) { return value(); }\n'
+    )
+
+
+class TestJobLimit:
+    def test_explicit_jobs(self):
+        assert cli_get_job_limit(3, makeflags="-j8") == 3
+
+    def test_makeflags(self):
+        assert cli_get_job_limit(makeflags="k -j4 --jobserver-auth=3,4") == 4
+        assert cli_get_job_limit(makeflags="-j") == os.cpu_count()
+        assert cli_get_job_limit(makeflags="") == os.cpu_count()
+
+    def test_jobserver(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            os.write(write_fd, b"++")
+            jobserver = MakeJobServer.from_makeflags(
+                f" -j3 --jobserver-auth={read_fd},{write_fd}"
+            )
+            assert jobserver.acquire() == b"+"
+            jobserver.release(b"+")
+            assert os.read(read_fd, 3) == b"++"
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+    def test_jobserver_not_inherited(self):
+        assert MakeJobServer.from_makeflags("-j --jobserver-auth=998,999") \
+            is None
+        assert MakeJobServer.from_makeflags("-j2") is None
+
+
+class TestToolchain:
+    def test_collect_sources(self, tmp_path):
+        create_c_sources(tmp_path)
+        (tmp_path / "obj").mkdir()
+        (tmp_path / "obj" / "main.c").write_text("")
+        assert cli_collect_c_sources(tmp_path) == [
+            tmp_path / "lib" / "value.c", tmp_path / "main.c"
+        ]
+
+    def test_missing_compiler(self, monkeypatch):
+        monkeypatch.setenv("CC", "not-existing-para-cc")
+        with pytest.raises(CToolchainError):
+            CToolchain.detect()
+
+    def test_no_sources(self, tmp_path):
+        with pytest.raises(CToolchainError):
+            list(cli_build_executable(
+                tmp_path, tmp_path, "main", toolchain=CToolchain("cc", [])
+            ))
+
+    @requires_cc
+    def test_build_executable(self, tmp_path):
+        build_path, dist_path = tmp_path / "build", tmp_path / "dist"
+        create_c_sources(build_path)
+
+        results = list(cli_build_executable(
+            build_path, dist_path, "main", jobs=2
+        ))
+        assert all(r.success for r in results)
+        assert results[-1].source == "Linking"
+        assert sorted(r.source for r in results[:-1]) == [
+            str((build_path / "lib" / "value.c").resolve()),
+            str((build_path / "main.c").resolve())
+        ]
+        assert subprocess.run([results[-1].output]).returncode == 3
+
+    @requires_cc
+    def test_failed_unit_is_not_linked(self, tmp_path):
+        create_c_sources(tmp_path, valid=False)
+        results = list(cli_build_executable(tmp_path, tmp_path, "main"))
+        assert len(results) == 2
+        failed = next(r for r in results if not r.success)
+        assert failed.source.endswith("value.c")
+        assert failed.messages
+        assert not (tmp_path / "main").exists()
+
+    @requires_cc
+    def test_object_cache(self, tmp_path):
+        cache = ObjectCache(cache_dir=tmp_path / "cache")
+        toolchain = CToolchain.detect()
+        first, second = tmp_path / "first", tmp_path / "second"
+        create_c_sources(first)
+        create_c_sources(second)
+
+        results = list(cli_build_executable(
+            first, first, "main", toolchain=toolchain, cache=cache
+        ))
+        assert not any(r.cached for r in results)
+
+        # Identical sources in another build folder are restored
+        results = list(cli_build_executable(
+            second, second, "main", toolchain=toolchain, cache=cache
+        ))
+        assert [r.cached for r in results] == [True, True, False]
+        assert subprocess.run([results[-1].output]).returncode == 3
+        assert cache.load_stats() == {"hits": 2, "misses": 2}
+
+        # Changing a header or the flags invalidates the units including it
+        (second / "lib" / "value.h").write_text("int value(void);\n\n")
+        results = list(cli_build_executable(
+            second, second, "main", toolchain=toolchain, cache=cache
+        ))
+        assert not any(r.cached for r in results)
+        optimised = CToolchain(toolchain.cc, [*toolchain.cflags, "-O3"])
+        results = list(cli_build_executable(
+            first, first, "main", toolchain=optimised, cache=cache
+        ))
+        assert not any(r.cached for r in results)
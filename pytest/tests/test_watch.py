@@ -0,0 +1,90 @@
+# coding=utf-8
+""" Tests for the file watchers used by 'para watch' """
+import os
+import sys
+
+import pytest
+
+from paralang_cli.watch import (InotifyFileWatcher, PollingFileWatcher,
+                                cli_create_file_watcher, _run_cycle)
+
+
+@pytest.mark.parametrize(
+    "watcher_type", [
+        PollingFileWatcher,
+        pytest.param(
+            InotifyFileWatcher,
+            marks=pytest.mark.skipif(
+                not sys.platform.startswith("linux"),
+                reason="inotify is only available on Linux"
+            )
+        )
+    ]
+)
+class TestFileWatcher:
+    def test_changed_files(self, tmp_path, watcher_type):
+        existing = tmp_path / "main.para"
+        existing.write_text("int x;")
+        os.mkdir(tmp_path / "sub")
+
+        watcher = watcher_type([str(tmp_path)])
+        try:
+            assert watcher.poll(0.05) == set()
+
+            existing.write_text("int x = 2;")
+            (tmp_path / "sub" / "new.para").write_text("int y;")
+            (tmp_path / "ignored.txt").write_text("")
+            assert watcher.poll(0.1) == {
+                str(existing), str(tmp_path / "sub" / "new.para")
+            }
+
+            existing.unlink()
+            assert watcher.poll(0.1) == {str(existing)}
+        finally:
+            watcher.close()
+
+    def test_single_file(self, tmp_path, watcher_type):
+        file = tmp_path / "main.para"
+        file.write_text("int x;")
+        (tmp_path / "other.para").write_text("int y;")
+
+        watcher = watcher_type([str(file)])
+        try:
+            (tmp_path / "other.para").write_text("int y = 2;")
+            file.write_text("int x = 2;")
+            assert watcher.poll(0.1) == {str(file)}
+        finally:
+            watcher.close()
+
+
+def test_force_polling(tmp_path):
+    watcher = cli_create_file_watcher([str(tmp_path)], force_polling=True)
+    assert isinstance(watcher, PollingFileWatcher)
+
+
+def test_compile_cycle(tmp_path, monkeypatch, compiled_units):
+    monkeypatch.setenv("PARA_CACHE_DIR", str(tmp_path / "cache"))
+    project = tmp_path / "project"
+    project.mkdir()
+    a, b = project / "a.para", project / "b.para"
+    a.write_text("int a() {}\n")
+    b.write_text("int b() {}\n")
+    folders = (str(project / "build"), str(project / "dist"))
+    for folder in folders:
+        os.mkdir(folder)
+
+    def _run(*files) -> list:
+        compiled_units.clear()
+        _run_cycle(
+            [str(f) for f in files], "utf-8", "compile", False,
+            [str(project)], folders
+        )
+        return sorted(os.path.basename(f) for f in compiled_units)
+
+    assert _run(a, b) == ["a.para", "b.para"]
+    assert (project / "build" / "a.c").exists()
+
+    # Only changed units are compiled, while the others keep their outputs
+    b.write_text("error\n")
+    assert _run(b) == ["b.para"]
+    assert (project / "build" / "a.c").exists()
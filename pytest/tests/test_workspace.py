@@ -0,0 +1,116 @@
+# coding=utf-8
+""" Tests for the multi-project workspace builds """
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from paralang_cli.store import ArtifactStore
+from paralang_cli.workspace import (Workspace, WorkspaceError,
+                                    cli_run_workspace_build)
+
+ENCODING = 'utf-8'
+
+
+def stems(files: list) -> list:
+    """ Returns the names of the passed units """
+    return [Path(f).stem for f in files]
+
+
+def create_workspace(root: Path, packages: dict) -> Path:
+    """
+    Creates a workspace, where every package contains a unit named after it
+    """
+    declared = {}
+    for name, dependencies in packages.items():
+        (root / name).mkdir()
+        (root / name / f"{name}.para").write_text(
+            f"int {name}() {{}}\n", encoding=ENCODING
+        )
+        declared[name] = {"dependencies": dependencies}
+    path = root / "para-workspace.json"
+    path.write_text(json.dumps({"packages": declared}), encoding=ENCODING)
+    return path
+
+
+def build(root: Path, store=None, jobs=1, packages=None) -> dict:
+    """ Builds the workspace and returns the results keyed by package """
+    return {
+        r.name: r for r in cli_run_workspace_build(
+            Workspace.load(root), ENCODING, packages, jobs, store=store
+        )
+    }
+
+
+class TestWorkspace:
+    def test_order(self, tmp_path):
+        create_workspace(tmp_path, {
+            "app": ["net", "core"], "net": ["core"], "core": [], "tool": []
+        })
+        workspace = Workspace.load(tmp_path)
+        assert workspace.order() == ["core", "tool", "net", "app"]
+        assert workspace.order(["net"]) == ["core", "net"]
+        assert workspace.packages["app"].path == str(tmp_path / "app")
+
+    @pytest.mark.parametrize("packages, message", [
+        ({"a": ["b"], "b": ["a"]}, "cycle"),
+        ({"a": ["missing"]}, "unknown package"),
+    ])
+    def test_invalid(self, tmp_path, packages, message):
+        create_workspace(tmp_path, packages)
+        with pytest.raises(WorkspaceError, match=message):
+            Workspace.load(tmp_path)
+
+    def test_missing_manifest(self, tmp_path):
+        with pytest.raises(WorkspaceError, match="Failed to read"):
+            Workspace.load(tmp_path)
+
+
+class TestWorkspaceBuild:
+    def test_incremental(self, tmp_path, compiled_units):
+        create_workspace(tmp_path, {"core": [], "app": ["core"]})
+        results = build(tmp_path)
+        assert list(results) == ["core", "app"]
+        assert all(r.state == "built" for r in results.values())
+        assert (tmp_path / "app" / "build" / "app.c").exists()
+
+        results = build(tmp_path)
+        assert all(r.state == "up-to-date" for r in results.values())
+        assert stems(compiled_units) == ["core", "app"]
+
+        (tmp_path / "core" / "core.para").write_text("int c2() {}\n")
+        results = build(tmp_path)
+        assert [r.state for r in results.values()] == ["built", "up-to-date"]
+
+    def test_failed_dependency(self, tmp_path, compiled_units):
+        create_workspace(tmp_path, {"core": [], "app": ["core"], "tool": []})
+        (tmp_path / "core" / "core.para").write_text("error\n")
+        results = build(tmp_path)
+        assert not results["core"].success
+        assert results["app"].skipped
+        assert results["tool"].success
+        assert "app" not in stems(compiled_units)
+
+    def test_restore_from_store(self, tmp_path, compiled_units):
+        store = ArtifactStore(tmp_path / "cache")
+        create_workspace(tmp_path, {"core": [], "app": ["core"]})
+        build(tmp_path, store)
+        for name in ("core", "app"):
+            shutil.rmtree(tmp_path / name / "build")
+
+        results = build(tmp_path, store)
+        assert all(r.state == "restored" for r in results.values())
+        assert stems(compiled_units) == ["core", "app"]
+        assert (tmp_path / "app" / "build" / "app.c").read_text() == \
+            "/* int app() {} */\n"
+
+    def test_parallel(self, tmp_path, compiled_units):
+        create_workspace(tmp_path, {
+            "a": [], "b": [], "c": [], "app": ["a", "b", "c"]
+        })
+        results = build(tmp_path, ArtifactStore(tmp_path / "cache"), jobs=3)
+        assert list(results)[-1] == "app"
+        assert all(r.success for r in results.values())
+        for name in results:
+            assert (tmp_path / name / "build" / f"{name}.c").exists()